@@ -0,0 +1,143 @@
+"""
+Array-backed language models.
+
+ArrayLanguageModel is a LanguageModel whose terms are given integer IDs (their position in the model's vocabulary), with the
+count and probability of every term computed once, when the model is built. Looking up a term's probability is then a single
+dictionary lookup and list index, rather than a membership test, a lookup and a division on every call.
+
+For scoring many terms at once, get_term_ids() maps a list of terms to an array of IDs (-1 for terms outside the vocabulary),
+and get_term_probs()/get_log_term_probs()/get_counts() return NumPy arrays of the values for those IDs. The NumPy arrays
+are built the first time they are needed. term_probs() and term_counts() do the same for any language model - using the
+arrays where the model has them - and are used by the batch methods (get_term_probs_for_terms()) of the smoothed language
+models.
+
+The values are identical to those of LanguageModel: probabilities are float(count)/float(total), 0 for terms that do not
+occur, and log probabilities are math.log(probability, 2.0).
+"""
+
+import math
+
+from ifind.common.language_model import LanguageModel
+
+
+class ArrayLanguageModel(LanguageModel):
+    """
+    A LanguageModel with precomputed term probabilities, supporting batch lookups over arrays of term IDs.
+    The model is a snapshot of the counts it is given; changing the dictionary afterwards does not change the model.
+    """
+    def __init__(self, file=None, term_dict=None):
+        super(ArrayLanguageModel, self).__init__(file=file, term_dict=term_dict)
+        self.terms = list(self.occurrence_dict)
+        self._term_ids = dict(zip(self.terms, range(len(self.terms))))
+        self._counts = [self.occurrence_dict[term] for term in self.terms]
+        self._probabilities = None
+        self._arrays = None
+
+        if self.total_occurrences:
+            total = float(self.total_occurrences)
+            self._probabilities = [(float(count) / total) if count != 0 else 0 for count in self._counts]
+
+    def get_term_id(self, term):
+        """
+        Returns the ID of the given term, or None if the term is not in the model's vocabulary.
+        """
+        return self._term_ids.get(term)
+
+    def get_num_terms(self):
+        return len(self.terms)
+
+    def get_num_occurrences(self, term):
+        term_id = self._term_ids.get(term)
+
+        if term_id is None:
+            return 0
+
+        return self._counts[term_id]
+
+    def get_term_prob(self, term):
+        if self._probabilities is None:
+            return super(ArrayLanguageModel, self).get_term_prob(term)
+
+        term_id = self._term_ids.get(term)
+
+        if term_id is None:
+            return 0
+
+        return self._probabilities[term_id]
+
+    def _get_arrays(self):
+        """
+        Returns the (counts, probabilities, log probabilities) NumPy arrays, building them if need be.
+        Each array has an extra element (0, or -inf for the log probabilities) at the end, so that ID -1 looks up a term that does not occur.
+        """
+        if self._arrays is None:
+            import numpy
+
+            counts = numpy.zeros(len(self.terms) + 1)
+            counts[:-1] = self._counts
+            probabilities = numpy.zeros(len(self.terms) + 1)
+
+            if self._probabilities is not None:
+                probabilities[:-1] = self._probabilities
+
+            log_probabilities = numpy.full(len(self.terms) + 1, -numpy.inf)
+            log_probabilities[:-1] = [math.log(probability, 2.0) if probability > 0 else -numpy.inf for probability in probabilities[:-1].tolist()]
+
+            self._arrays = (counts, probabilities, log_probabilities)
+
+        return self._arrays
+
+    def get_term_ids(self, terms):
+        """
+        Returns a NumPy array of the IDs of the given terms, with -1 for any term not in the model's vocabulary.
+        """
+        import numpy
+
+        get = self._term_ids.get
+        return numpy.fromiter((get(term, -1) for term in terms), dtype=numpy.int64, count=len(terms))
+
+    def get_counts(self, term_ids):
+        """
+        Returns a NumPy array of the counts of the terms with the given IDs (as floats).
+        """
+        return self._get_arrays()[0][term_ids]
+
+    def get_term_probs(self, term_ids):
+        """
+        Returns a NumPy array of the probabilities of the terms with the given IDs.
+        """
+        return self._get_arrays()[1][term_ids]
+
+    def get_log_term_probs(self, term_ids):
+        """
+        Returns a NumPy array of the log (base 2) probabilities of the terms with the given IDs; -inf where a term does not occur.
+        """
+        return self._get_arrays()[2][term_ids]
+
+
+def term_probs(language_model, terms):
+    """
+    Returns a NumPy array of the probabilities of the given terms under any language model (with a get_term_prob() method).
+    Array-backed models look the terms up by ID (with get_term_probs()); smoothed models use their get_term_probs_for_terms().
+    """
+    import numpy
+
+    if hasattr(language_model, 'get_term_ids'):
+        return language_model.get_term_probs(language_model.get_term_ids(terms))
+
+    if hasattr(language_model, 'get_term_probs_for_terms'):
+        return language_model.get_term_probs_for_terms(terms)
+
+    return numpy.array([language_model.get_term_prob(term) for term in terms], dtype=float)
+
+
+def term_counts(language_model, terms):
+    """
+    Returns a NumPy array of the counts of the given terms under any LanguageModel, as floats.
+    """
+    import numpy
+
+    if hasattr(language_model, 'get_term_ids'):
+        return language_model.get_counts(language_model.get_term_ids(terms))
+
+    return numpy.array([language_model.get_num_occurrences(term) for term in terms], dtype=float)
@@ -0,0 +1,292 @@
+"""
+Background language models (vocabulary files of term/value pairs), loaded once per process.
+
+Vocabulary files are text files with a term and a value (a count or a score) on each line, e.g. "term,42".
+A vocabulary file can be compiled (see compile_background(), or run this module as a script) into a binary file holding:
+    - a header, including the total of the values;
+    - the terms, sorted, in a single newline-separated block;
+    - the value of every term, as an array of 64-bit integers (or doubles, for scores);
+    - the probability of every term (its value over the total), as an array of doubles.
+The compiled file is memory-mapped, so its pages are shared between processes through the operating system's page cache.
+
+load_background() returns a BackgroundModel for a text or compiled file, caching it for the lifetime of the process,
+so the many components (and simulation permutations) reading the same file share a single parsed copy.
+
+Usage: python -m ifind.common.background_model <vocab_filename> [compiled_filename] [int|float]
+"""
+
+import os
+import sys
+import mmap
+import struct
+import threading
+from array import array
+
+from ifind.common.array_language_model import ArrayLanguageModel
+
+MAGIC = b'SIMBGLM1'
+HEADER = struct.Struct('<8scxxxII')  # magic, value type code ('q' or 'd'), term count, length of the terms block
+TOTAL = {'q': struct.Struct('<q'), 'd': struct.Struct('<d')}
+COMPILED_EXTENSION = '.bglm'
+
+
+def parse_background_line(line, value_type=int, delimiter=','):
+    """
+    Parses a vocabulary file line of the form <term><delimiter><value>. If delimiter is None, any whitespace separates the two.
+    Returns a (term, value) tuple, or None if the line is blank.
+    """
+    parts = line.strip().split(delimiter)
+
+    if not parts or not parts[0]:
+        return None
+
+    return parts[0], value_type(parts[1])
+
+
+class BackgroundModel(object):
+    """
+    A read-only vocabulary of terms, with the value (count or score) of each term, the total and each term's probability.
+    Each term has an integer ID - its position in the sorted vocabulary - indexing the values and probabilities arrays.
+    """
+    def __init__(self, terms, values, probabilities, total):
+        self.terms = terms
+        self.values = values
+        self.probabilities = probabilities
+        self.total = total
+        self._term_ids = dict(zip(terms, range(len(terms))))
+
+    @classmethod
+    def from_dict(cls, vocab):
+        """
+        Creates a BackgroundModel from a dictionary of term -> value.
+        """
+        terms = sorted(vocab)
+        values = [vocab[term] for term in terms]
+        total = sum(values)
+        probabilities = [(float(value) / float(total)) if total else 0.0 for value in values]
+        return cls(terms, values, probabilities, total)
+
+    def get_term_id(self, term):
+        """
+        Returns the ID of the given term, or None if the term is not in the vocabulary.
+        """
+        return self._term_ids.get(term)
+
+    def get_value(self, term, default=0):
+        term_id = self._term_ids.get(term)
+
+        if term_id is None:
+            return default
+
+        return self.values[term_id]
+
+    def get_term_prob(self, term):
+        """
+        Returns the probability of the given term (its value over the total), or 0 if the term is not in the vocabulary.
+        """
+        term_id = self._term_ids.get(term)
+
+        if term_id is None:
+            return 0
+
+        return self.probabilities[term_id] or 0
+
+    def get_total(self):
+        return self.total
+
+    def to_dict(self, value_type=None):
+        """
+        Returns a new dictionary of term -> value, converting the values to value_type if it is specified.
+        """
+        if value_type is None:
+            return dict(zip(self.terms, self.values))
+
+        return dict(zip(self.terms, map(value_type, self.values)))
+
+    def __contains__(self, term):
+        return term in self._term_ids
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __deepcopy__(self, memo):
+        """
+        The model is read-only (and may be memory-mapped), so it is shared rather than copied.
+        """
+        return self
+
+
+class BackgroundLanguageModel(ArrayLanguageModel):
+    """
+    A LanguageModel over a BackgroundModel, using the precomputed total and term probabilities (and the model's term IDs).
+    """
+    def __init__(self, model):
+        self.model = model
+        self.occurrence_dict = model.to_dict()
+        self.total_occurrences = model.get_total()
+        self.terms = model.terms
+        self._term_ids = model._term_ids
+        self._counts = model.values
+        self._probabilities = model.probabilities
+        self._arrays = None
+
+    def get_term_prob(self, term):
+        return self.model.get_term_prob(term)
+
+    def __deepcopy__(self, memo):
+        """
+        Background language models are shared between components, and are never modified; they are not copied.
+        """
+        return self
+
+
+def read_background(filename, value_type=int, delimiter=','):
+    """
+    Parses a vocabulary text file, returning a BackgroundModel. Where a term appears more than once, the last value is used.
+    """
+    vocab = {}
+
+    with open(filename, 'r') as f:
+        for line in f:
+            parsed = parse_background_line(line, value_type=value_type, delimiter=delimiter)
+
+            if parsed is not None:
+                vocab[parsed[0]] = parsed[1]
+
+    return BackgroundModel.from_dict(vocab)
+
+
+def compile_background(filename, compiled_filename=None, value_type=int, delimiter=','):
+    """
+    Converts the given vocabulary text file to the compiled format, returning the filename of the compiled file.
+    If compiled_filename is not specified, the compiled file is placed alongside the text file (with a .bglm extension).
+    """
+    if compiled_filename is None:
+        compiled_filename = filename + COMPILED_EXTENSION
+
+    write_compiled_background(read_background(filename, value_type=value_type, delimiter=delimiter), compiled_filename)
+    return compiled_filename
+
+
+def write_compiled_background(model, compiled_filename):
+    """
+    Writes the given BackgroundModel to a compiled file. The file is written to a temporary name and then renamed.
+    """
+    code = 'd' if any(isinstance(value, float) for value in model.values) else 'q'
+    terms = '\n'.join(model.terms).encode('utf-8')
+    temporary_filename = '{0}.{1}.tmp'.format(compiled_filename, os.getpid())
+
+    with open(temporary_filename, 'wb') as compiled_file:
+        compiled_file.write(HEADER.pack(MAGIC, code.encode('ascii'), len(model.terms), len(terms)))
+        compiled_file.write(TOTAL[code].pack(model.total))
+        compiled_file.write(terms)
+        compiled_file.write(b'\0' * (-(HEADER.size + 8 + len(terms)) % 8))  # Align the arrays that follow.
+        compiled_file.write(array(code, model.values).tobytes())
+        compiled_file.write(array('d', model.probabilities).tobytes())
+
+    os.replace(temporary_filename, compiled_filename)
+
+
+def read_compiled_background(compiled_filename):
+    """
+    Memory-maps a compiled vocabulary file, returning a BackgroundModel whose value and probability arrays are views of the mapping.
+    """
+    with open(compiled_filename, 'rb') as compiled_file:
+        mapping = mmap.mmap(compiled_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, code, term_count, terms_length = HEADER.unpack_from(mapping, 0)
+
+    if magic != MAGIC:
+        raise IOError("The file '{0}' is not a compiled background model.".format(compiled_filename))
+
+    code = code.decode('ascii')
+    offset = HEADER.size
+    total = TOTAL[code].unpack_from(mapping, offset)[0]
+    offset = offset + TOTAL[code].size
+
+    terms = mapping[offset:offset + terms_length].decode('utf-8').split('\n') if term_count else []
+    offset = offset + terms_length
+    offset = offset + (-offset % 8)
+
+    view = memoryview(mapping)
+    values = view[offset:offset + (term_count * 8)].cast(code)
+    offset = offset + (term_count * 8)
+    probabilities = view[offset:offset + (term_count * 8)].cast('d')
+
+    return BackgroundModel(terms, values, probabilities, total)
+
+
+def is_compiled_background(filename):
+    """
+    Returns True iif the given file is a compiled background model.
+    """
+    try:
+        with open(filename, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except IOError:
+        return False
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_background(filename, value_type=int, delimiter=','):
+    """
+    Returns the BackgroundModel for the given vocabulary file, which may be a text file or a compiled file.
+    If a text file has an up-to-date compiled counterpart (the same filename with a .bglm extension), the compiled file is used.
+    Models are cached for the lifetime of the process; a file is only read again if it is modified.
+    """
+    compiled_filename = filename + COMPILED_EXTENSION
+
+    if not is_compiled_background(filename) and os.path.exists(compiled_filename) \
+            and os.path.getmtime(compiled_filename) >= os.path.getmtime(filename):
+        filename = compiled_filename
+
+    status = os.stat(filename)
+    key = (os.path.realpath(filename), status.st_mtime, status.st_size, value_type, delimiter)
+
+    with _loaded_lock:
+        model = _loaded.get(key)
+
+        if model is None:
+            if is_compiled_background(filename):
+                model = read_compiled_background(filename)
+            else:
+                model = read_background(filename, value_type=value_type, delimiter=delimiter)
+
+            _loaded[key] = model
+
+        return model
+
+
+def load_background_language_model(filename):
+    """
+    Returns a (shared) LanguageModel of the term counts in the given vocabulary file; see load_background().
+    """
+    model = load_background(filename)
+
+    with _loaded_lock:
+        language_model = _loaded.get((model, 'language_model'))
+
+        if language_model is None:
+            language_model = BackgroundLanguageModel(model)
+            _loaded[(model, 'language_model')] = language_model
+
+        return language_model
+
+
+def usage(script_name):
+    """
+    Prints the usage message to the output stream.
+    """
+    print("Usage: {0} <vocab_filename> [compiled_filename] [int|float]".format(script_name))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or len(sys.argv) > 4:
+        usage(sys.argv[0])
+    else:
+        value_type = float if len(sys.argv) > 3 and sys.argv[3] == 'float' else int
+        output_filename = compile_background(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None, value_type=value_type)
+        print("Compiled background model written to {0}".format(output_filename))
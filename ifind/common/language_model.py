@@ -25,13 +25,8 @@ class LanguageModel(object):
         :param fileName
         """
         if file_name:
-            f = open(file_name, 'r')
-            for line in f:
-                split_line=line.split()
-                term = split_line[0]
-                #TODO need to make robust for errors in input file
-                count = int(split_line[1])
-                self.occurrence_dict[term] = count
+            from ifind.common.background_model import load_background
+            self.occurrence_dict.update(load_background(file_name, delimiter=None).to_dict())
 
     def _calc_total_occurrences(self):
         """
@@ -0,0 +1,306 @@
+"""
+Fast removal of HTML markup from text, shared by everything that reads the text of documents and snippets.
+
+Two forms of cleaning are provided, each reproducing the output of the implementation it replaces exactly:
+    - strip_tags() removes anything that looks like a tag (the regular expression <.*?>), leaving entities as they are.
+      This is the cleaning done by simiir.utils.tidy.clean_html().
+    - html_to_text() parses the markup (with the standard library's streaming HTMLParser), decoding entities and
+      character references, and dropping comments, declarations and the contents of <script>, <style> (and similar)
+      elements. The text returned is the same as BeautifulSoup(markup, 'html.parser').get_text() - but no parse tree
+      is built, which is where BeautifulSoup spends most of its time.
+
+Both take an optional docid. The same document (or snippet) is typically cleaned many times over a simulation - by each
+component that looks at it, for each query it is returned for - so text given with a docid is memoised: the cleaned text
+is kept (in a bounded, least recently used, cache) under the docid and the markup, and is only cleaned once. The markup
+is part of the key, so a snippet and the document it was taken from (which share a docid) are kept apart.
+
+HTMLTextExtractor can also be fed markup in pieces, for text that is read in chunks.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+
+TAG_PATTERN = re.compile('<.*?>')
+
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'  # Whitespace, as BeautifulSoup collapses it.
+
+# Elements as BeautifulSoup's html.parser tree builder treats them.
+EMPTY_ELEMENTS = frozenset(['area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed', 'frame', 'hr',
+                            'image', 'img', 'input', 'isindex', 'keygen', 'link', 'menuitem', 'meta', 'nextid',
+                            'param', 'source', 'spacer', 'track', 'wbr'])
+PRESERVE_WHITESPACE_ELEMENTS = frozenset(['pre', 'textarea'])
+NON_TEXT_ELEMENTS = frozenset(['rp', 'rt', 'script', 'style', 'template'])  # Their contents are not part of the text.
+
+_DECIMAL_REFERENCE = re.compile('^([0-9]+)(.*)')
+_HEX_REFERENCE = re.compile('^([0-9a-f]+)(.*)')
+
+CACHE_SIZE = 4096  # The number of cleaned texts memoised (for each form of cleaning).
+
+_entities = None
+
+
+def _get_entities():
+    """
+    Returns the mapping of entity names to characters - BeautifulSoup's, so that entities are decoded as it decodes them.
+    """
+    global _entities
+
+    if _entities is None:
+        from bs4.dammit import EntitySubstitution
+        _entities = EntitySubstitution.HTML_ENTITY_TO_CHARACTER
+
+    return _entities
+
+
+def _dereference(name):
+    """
+    Returns the text for the numeric character reference with the given name (e.g. '65' or 'x41') - the character, and any
+    data following a reference that was not terminated - as BeautifulSoup's html.parser tree builder does.
+    """
+    from bs4.dammit import UnicodeDammit
+
+    base = 10
+    pattern = _DECIMAL_REFERENCE
+
+    if name.startswith('x') or name.startswith('X'):
+        name = name[1:]
+        base = 16
+        pattern = _HEX_REFERENCE
+
+    extra_data = ''
+
+    try:
+        number = int(name, base)
+    except ValueError:
+        match = pattern.search(name)
+
+        if match is None:
+            return name
+
+        number = int(match.group(1), base)
+        extra_data = match.group(2)
+
+    return UnicodeDammit.numeric_character_reference(number)[0] + extra_data
+
+
+class HTMLTextExtractor(HTMLParser):
+    """
+    Collects the text of the markup fed to it, as it is parsed. Feed markup with feed(), then call close(); the text is
+    then available from get_text(). Only the state BeautifulSoup keeps that affects the text is kept here: which
+    elements are open, and the data seen since the last tag.
+    """
+    def __init__(self):
+        super(HTMLTextExtractor, self).__init__(convert_charrefs=False)
+        self._entities = _get_entities()
+        self._text = []
+        self._data = []
+        self._open = []  # The names of the open elements, innermost last.
+        self._open_counts = {}
+        self._preserve_whitespace = 0  # The number of open <pre> and <textarea> elements.
+        self._non_text = 0  # The number of open elements whose contents are not text.
+        self._closed_empty = []  # Empty elements (e.g. <br>) closed as they were opened; a later end tag is ignored.
+
+    def _end_data(self, is_text=True):
+        """
+        Ends the current run of data, adding it to the text if it is text. Whitespace-only data is collapsed to a single
+        newline (or space), unless it is within a <pre> or <textarea> element.
+        """
+        if not self._data:
+            return
+
+        data = ''.join(self._data)
+        self._data = []
+
+        if not self._preserve_whitespace and not data.strip(ASCII_SPACES):
+            data = '\n' if '\n' in data else ' '
+
+        if is_text:
+            self._text.append(data)
+
+    def _open_element(self, tag):
+        self._open.append(tag)
+        self._open_counts[tag] = self._open_counts.get(tag, 0) + 1
+
+        if tag in PRESERVE_WHITESPACE_ELEMENTS:
+            self._preserve_whitespace += 1
+
+        if tag in NON_TEXT_ELEMENTS:
+            self._non_text += 1
+
+    def _close_element(self, tag):
+        """
+        Closes the most recently opened element with the given name, along with any elements opened within it.
+        End tags for elements that are not open are ignored.
+        """
+        open_counts = self._open_counts
+
+        while self._open and open_counts.get(tag):
+            closed = self._open.pop()
+            open_counts[closed] -= 1
+
+            if closed in PRESERVE_WHITESPACE_ELEMENTS:
+                self._preserve_whitespace -= 1
+
+            if closed in NON_TEXT_ELEMENTS:
+                self._non_text -= 1
+
+            if closed == tag:
+                break
+
+    def handle_starttag(self, tag, attrs, is_empty=True):
+        self._end_data(not self._non_text)
+        self._open_element(tag)
+
+        if is_empty and tag in EMPTY_ELEMENTS:
+            self.handle_endtag(tag, closed_empty=False)
+            self._closed_empty.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, is_empty=False)
+        self.handle_endtag(tag, closed_empty=False)
+
+    def handle_endtag(self, tag, closed_empty=True):
+        if closed_empty and tag in self._closed_empty:
+            self._closed_empty.remove(tag)
+            return
+
+        self._end_data(not self._non_text)
+        self._close_element(tag)
+
+    def handle_data(self, data):
+        self._data.append(data)
+
+    def handle_entityref(self, name):
+        character = self._entities.get(name)
+        self._data.append(character if character is not None else '&' + name)
+
+    def handle_charref(self, name):
+        self._data.append(_dereference(name))
+
+    def _handle_non_text(self, data):
+        """
+        Comments, declarations and processing instructions end the current data; their own contents are not text.
+        """
+        self._end_data(not self._non_text)
+
+    handle_comment = handle_decl = handle_pi = _handle_non_text
+
+    def unknown_decl(self, data):
+        self._end_data(not self._non_text)
+
+        if data.upper().startswith('CDATA['):
+            self._data.append(data[len('CDATA['):])
+            self._end_data()
+
+    def close(self):
+        super(HTMLTextExtractor, self).close()
+        self._end_data(not self._non_text)
+
+    def get_text(self):
+        """
+        Returns the text of the markup fed so far (call close() first, so that all of the markup has been parsed).
+        """
+        return ''.join(self._text)
+
+
+def _decode(markup):
+    if isinstance(markup, str):
+        return markup
+
+    return markup.decode('utf-8')
+
+
+def _strip_tags(markup):
+    if '<' not in markup:
+        return markup
+
+    return TAG_PATTERN.sub('', markup)
+
+
+def _html_to_text(markup):
+    if '<' not in markup and '&' not in markup:
+        # Nothing to parse: the text is the markup itself (or, if it is only whitespace, the whitespace collapsed).
+        if not markup or markup.strip(ASCII_SPACES):
+            return markup
+
+        return '\n' if '\n' in markup else ' '
+
+    extractor = HTMLTextExtractor()
+    extractor.feed(markup)
+    extractor.close()
+    return extractor.get_text()
+
+
+class _Memo(object):
+    """
+    A bounded, least recently used, cache of cleaned texts, keyed by docid and markup.
+    """
+    def __init__(self, clean, size=CACHE_SIZE):
+        self._clean = clean
+        self._size = size
+        self._texts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, markup, docid):
+        key = (docid, markup)
+
+        with self._lock:
+            text = self._texts.get(key)
+
+            if text is not None:
+                self._texts.move_to_end(key)
+                return text
+
+        text = self._clean(markup)
+
+        with self._lock:
+            self._texts[key] = text
+
+            if len(self._texts) > self._size:
+                self._texts.popitem(last=False)
+
+        return text
+
+    def clear(self):
+        with self._lock:
+            self._texts.clear()
+
+
+_stripped = _Memo(_strip_tags)
+_texts = _Memo(_html_to_text)
+
+
+def strip_tags(markup, docid=None):
+    """
+    Returns the given markup (a string, or utf-8 encoded bytes) with anything that looks like a tag removed.
+    Entities are left as they are. If a docid is given, the result is memoised.
+    """
+    markup = _decode(markup)
+
+    if docid is None:
+        return _strip_tags(markup)
+
+    return _stripped.get(markup, docid)
+
+
+def html_to_text(markup, docid=None):
+    """
+    Returns the text of the given markup (a string, or utf-8 encoded bytes), with entities decoded - the same text as
+    BeautifulSoup(markup, 'html.parser').get_text(). If a docid is given, the result is memoised.
+    """
+    markup = _decode(markup)
+
+    if docid is None:
+        return _html_to_text(markup)
+
+    return _texts.get(markup, docid)
+
+
+def clear_cache():
+    """
+    Empties the memoised texts.
+    """
+    _stripped.clear()
+    _texts.clear()
@@ -0,0 +1,112 @@
+"""
+A micro-benchmark of the markup cleaning in ifind.common.markup against the implementations it replaces.
+
+Each implementation cleans the same set of snippet-like documents several times over, as happens over a simulation
+(every component that looks at a document cleans it again, for every query it is returned for).
+
+Run with:
+    python -m ifind.common.markup_benchmark [documents] [passes]
+"""
+
+import re
+import sys
+import random
+import timeit
+
+from ifind.common.markup import strip_tags, html_to_text, clear_cache
+
+WORDS = ['the', 'economic', 'impact', 'of', 'oil', 'spills', 'on', 'coastal', 'fisheries', 'report', 'said', 'tuesday',
+         'officials', 'estimated', 'damage', 'million', 'dollars', 'cleanup', 'crews', 'beaches']
+MARKUP = ['<b>', '</b>', '<p>', '</p>', '<br>', '<span class="hl">', '</span>', '&amp;', '&quot;', '&#39;', '&nbsp;']
+
+
+def make_documents(count, length=120, seed=0):
+    """
+    Returns a list of count (docid, markup) pairs, each with about length words of text, with tags and entities mixed in.
+    """
+    generator = random.Random(seed)
+    documents = []
+
+    for i in range(count):
+        parts = []
+
+        for j in range(length):
+            parts.append(generator.choice(WORDS))
+
+            if generator.random() < 0.15:
+                parts.append(generator.choice(MARKUP))
+
+        documents.append(('DOC-{0:05d}'.format(i), ' '.join(parts)))
+
+    return documents
+
+
+def regex_strip(markup):
+    """
+    simiir.utils.tidy.clean_html(), as it was: an uncompiled regular expression applied on every call.
+    """
+    return re.sub('<.*?>', '', markup)
+
+
+def soup_text(markup):
+    """
+    SmarterQueryGenerator._get_snip_text() and QueryGeneration.extract_queries_from_html(), as they were.
+    """
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(markup, 'html.parser').get_text()
+
+
+def lxml_clean(markup):
+    """
+    DifferenceDecisionMaker.__clean_markup(), as it was: a new lxml Cleaner for every call.
+    """
+    from lxml.html.clean import Cleaner
+    cleaner = Cleaner(allow_tags=[''], remove_unknown_tags=False)
+    return cleaner.clean_html(markup)[5:][:-6]
+
+
+def time_cleaning(clean, documents, passes, memoised=False):
+    """
+    Returns the time taken (in seconds) for clean to clean every document, passes times over.
+    """
+    clear_cache()
+
+    if memoised:
+        run = lambda: [clean(markup, docid=docid) for docid, markup in documents]
+    else:
+        run = lambda: [clean(markup) for docid, markup in documents]
+
+    return timeit.timeit(run, number=passes)
+
+
+def run_benchmark(count=500, passes=10):
+    documents = make_documents(count)
+    comparisons = [('tag stripping (clean_html)', regex_strip, strip_tags)]
+
+    try:
+        import bs4
+        comparisons.append(('text extraction (BeautifulSoup)', soup_text, html_to_text))
+    except ImportError:
+        print("BeautifulSoup is not installed; skipping the text extraction comparison.")
+
+    try:
+        import lxml.html.clean
+        comparisons.append(('markup cleaning (lxml Cleaner)', lxml_clean, html_to_text))
+    except ImportError:
+        print("lxml (with lxml.html.clean) is not installed; skipping the lxml comparison.")
+
+    print("{0} documents, {1} passes".format(count, passes))
+    print("{0:<34}{1:>12}{2:>12}{3:>10}{4:>16}{5:>10}".format('', 'before (s)', 'after (s)', 'speedup', 'memoised (s)', 'speedup'))
+
+    for name, before, after in comparisons:
+        before_time = time_cleaning(before, documents, passes)
+        after_time = time_cleaning(after, documents, passes)
+        memoised_time = time_cleaning(after, documents, passes, memoised=True)
+
+        print("{0:<34}{1:>12.4f}{2:>12.4f}{3:>9.1f}x{4:>16.4f}{5:>9.1f}x".format(
+            name, before_time, after_time, before_time / after_time, memoised_time, before_time / memoised_time))
+
+
+if __name__ == '__main__':
+    arguments = [int(argument) for argument in sys.argv[1:3]]
+    run_benchmark(*arguments)
@@ -9,11 +9,12 @@ Version: 0.1
 from collections import Counter
 from re import sub
 from nltk import clean_html, regexp_tokenize
-from bs4 import BeautifulSoup
 
 from ifind.common.pipeline import TermPipeline
 from ifind.common.pipeline import TermProcessor,AlphaTermProcessor,StopwordTermProcessor,SpecialCharProcessor,\
     LengthTermProcessor,PunctuationTermProcessor
+from ifind.common.tokenizer import get_term_cleaner
+from ifind.common.markup import html_to_text
 
 class QueryGeneration(object):
     """
@@ -27,15 +28,14 @@ class QueryGeneration(object):
         self.min_len = minlen
         self.stop_filename = stopwordfile
 
-    def extract_queries_from_html(self, html):
+    def extract_queries_from_html(self, html, docid=None):
         """
         :param url: the html from which the queries are to be constructed
+        :param docid: the id of the document the html is from; if given, the text of the html is memoised
         :return: list of queries
         """
 
-        soup = BeautifulSoup(html,'html.parser')
-
-        content = soup.get_text()
+        content = html_to_text(html, docid=docid)
         #content = ' '.join(content.split())
         return self.extract_queries_from_text(content)
 
@@ -54,7 +54,11 @@ class QueryGeneration(object):
         """ normalizes the text
         :param text: a string of text, to be cleaned.
         :return: a list of terms (i.e. tokenized)
+        Unless construct_pipeline() is overridden, the compiled equivalent of the pipeline is used (see ifind.common.tokenizer).
         """
+        if type(self).construct_pipeline is QueryGeneration.construct_pipeline:
+            return get_term_cleaner(self.min_len, self.stop_filename).clean_text(text)
+
         if text:
             text = text.lower()
             text = text.replace('-', ' ')
@@ -1,7 +1,10 @@
 __author__ = 'leif'
 from ifind.common.language_model import LanguageModel
 from ifind.common.smoothed_language_model import SmoothedLanguageModel
+from ifind.common.array_language_model import term_probs
 import math
+import heapq
+import operator
 
 class QueryRanker(object):
 
@@ -17,6 +20,8 @@ class QueryRanker(object):
         """
         self.lm = smoothed_language_model
         self.ranked_queries = {}
+        self._term_scores = {}  # term -> score, for the language model in self._term_scores_lm
+        self._term_scores_lm = None
 
     def calculate_query_probability(self, query):
         """
@@ -38,6 +43,44 @@ class QueryRanker(object):
         except:
             return 0.0
 
+    def _get_term_scores(self, terms):
+        """
+        Returns a list of the scores of the given (distinct) terms, as given by _calculate_term_score().
+        Scores are kept for the lifetime of the ranker (or until its language model is replaced), so each term is scored once.
+        Unless _calculate_term_score() is overridden, the probabilities of new terms are looked up in a single batch.
+        """
+        if self._term_scores_lm is not self.lm:
+            self._term_scores = {}
+            self._term_scores_lm = self.lm
+
+        new_terms = [term for term in terms if term not in self._term_scores]
+
+        if new_terms:
+            scores = None
+
+            if type(self)._calculate_term_score is QueryRanker._calculate_term_score:
+                try:
+                    scores = [self._log_prob(prob) for prob in term_probs(self.lm, new_terms).tolist()]
+                except:
+                    scores = None
+
+            if scores is None:
+                scores = [self._calculate_term_score(term) for term in new_terms]
+
+            self._term_scores.update(zip(new_terms, scores))
+
+        return [self._term_scores[term] for term in terms]
+
+    @staticmethod
+    def _log_prob(prob):
+        """
+        Returns log2 of the given probability, or 0.0 where it is undefined (i.e. for a probability of zero) - as _calculate_term_score().
+        """
+        try:
+            return math.log(prob, 2.0)
+        except:
+            return 0.0
+
     def calculate_query_list_probabilities(self, query_list):
         """
         takes a query list and calculates the probabilities of each
@@ -46,23 +89,60 @@ class QueryRanker(object):
         :return:a dictionary of queries (key) with their probability scores (value)
         """
         self.ranked_queries = {}
-        for query in query_list:
-            score = self.calculate_query_probability(query)
-            #print "adding query ", query
-            #print "with score ", score
+        for query, score in zip(query_list, self.calculate_query_probabilities(query_list)):
             self.ranked_queries[query] = score
 
         #order queries by probability scores
         #self.ranked_queries = OrderedDict(sorted(self.ranked_queries, key=self.ranked_queries.__getitem__,reverse=True))
         return self.ranked_queries
 
+    def calculate_query_probabilities(self, query_list):
+        """
+        calculates the probabilities of a list of queries in a batch - the scores are identical to calculate_query_probability()
+        each query is split into terms once, giving a matrix of term ids (one row per query); the scores of the distinct
+        terms are then gathered and summed a column at a time, so each query's score is summed in term order
+        :param query_list: a list of query strings
+        :return: a list of the probability scores of the queries, in order
+        """
+        import numpy
+
+        if not query_list:
+            return []
+
+        term_ids = {}
+        rows = []
+
+        for query in query_list:
+            rows.append([term_ids.setdefault(term, len(term_ids)) for term in query.split(" ")])
+
+        # Rows shorter than the longest query are padded with an id whose score is 0.0 (so adding it leaves the sum unchanged).
+        matrix = numpy.full((len(rows), max(map(len, rows))), len(term_ids), dtype=numpy.int64)
+        lengths = numpy.empty(len(rows))
+
+        for i, row in enumerate(rows):
+            matrix[i, :len(row)] = row
+            lengths[i] = len(row)
+
+        term_scores = numpy.zeros(len(term_ids) + 1)
+        term_scores[:-1] = self._get_term_scores(list(term_ids))
+        scores = numpy.zeros(len(rows))
+
+        for column in range(matrix.shape[1]):
+            scores = scores + term_scores[matrix[:, column]]
+
+        return (scores / lengths).tolist()
+
     def get_top_queries(self, k):
         """
         Returns top k ranked queries
         :param k: number of queries to return
         :return: list of top k queries ordered in descending order by probability
+        queries with equal scores are returned in the order they were ranked, as with a (stable) sort;
+        a heap is used to select the top k, rather than sorting every query
         """
-        import operator
+        if k >= 0:
+            return heapq.nlargest(k, self.ranked_queries.items(), key=operator.itemgetter(1))
+
         sorted_x = sorted(self.ranked_queries.items(), key=operator.itemgetter(1), reverse=True)
 
         #ordered = sorted(self.ranked_queries.keys(), reverse=True)
@@ -1,5 +1,6 @@
 __author__ = 'rose'
 from ifind.common.language_model import LanguageModel
+from ifind.common.array_language_model import term_probs, term_counts
 
 class SmoothedLanguageModel(object):
     """
@@ -53,6 +54,14 @@ class SmoothedLanguageModel(object):
         score = (self.lam * doc_prob) + ((1.0 - self.lam) * collection_prob)
         return score
 
+    def get_term_probs_for_terms(self, terms):
+        """
+        Returns a NumPy array of the likelihood of each of the given terms (a list), identical to get_term_prob() for each.
+        """
+        collection_probs = term_probs(self.colLM, terms)
+        doc_probs = term_probs(self.docLM, terms)
+        return (self.lam * doc_probs) + ((1.0 - self.lam) * collection_probs)
+
 class LaPlaceLanguageModel(SmoothedLanguageModel):
 
     def get_term_prob(self, term):
@@ -64,6 +73,14 @@ class LaPlaceLanguageModel(SmoothedLanguageModel):
         denominator = float(self.docLM.get_total_occurrences() + (self.colLM.get_num_terms() * self.alpha ))
         return numerator/denominator
 
+    def get_term_probs_for_terms(self, terms):
+        """
+        Returns a NumPy array of the likelihood of each of the given terms (a list), identical to get_term_prob() for each.
+        """
+        numerators = term_counts(self.docLM, terms) + self.alpha
+        denominator = float(self.docLM.get_total_occurrences() + (self.colLM.get_num_terms() * self.alpha ))
+        return numerators/denominator
+
 
 class BayesLanguageModel(SmoothedLanguageModel):
 
@@ -77,3 +94,11 @@ class BayesLanguageModel(SmoothedLanguageModel):
         denominator = self.docLM.get_total_occurrences() + self.beta
         return float(numerator)/float(denominator)
 
+    def get_term_probs_for_terms(self, terms):
+        """
+        Returns a NumPy array of the likelihood of each of the given terms (a list), identical to get_term_prob() for each.
+        """
+        numerators = term_counts(self.docLM, terms) + (self.beta * term_probs(self.colLM, terms))
+        denominator = self.docLM.get_total_occurrences() + self.beta
+        return numerators/float(denominator)
+
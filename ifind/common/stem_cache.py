@@ -0,0 +1,57 @@
+"""
+A cache of the stems of terms.
+
+Query generators stem every candidate term they rank, many times over a session; get_stem_cache() returns a cache shared
+by the whole process, so that each distinct term is only stemmed once per process (with the Porter stemmer from Whoosh).
+
+Stems are never evicted: the shared cache holds every distinct term stemmed - bounded by the vocabulary of the text the
+process reads (the topics, and the snippets and documents of the collection) rather than by the length of the simulation.
+"""
+
+
+def porter_stem(term):
+    """
+    Returns the Porter stem of the given term (using the implementation from the Whoosh IR toolkit).
+    """
+    from whoosh.lang.porter import stem
+    return stem(term)
+
+
+class StemCache(object):
+    """
+    Stems terms with the given stemmer, remembering the stem of each term.
+    """
+    def __init__(self, stemmer=porter_stem):
+        self._stems = {}
+        self._stemmer = stemmer
+
+    def __len__(self):
+        return len(self._stems)
+
+    def __deepcopy__(self, memo):
+        """
+        The cache only ever holds the stems the stemmer gives, so it is shared (not copied) between components and copies of them.
+        """
+        return self
+
+    def stem(self, term):
+        """
+        Returns the stem of the given term. Each term is only stemmed once.
+        """
+        stemmed = self._stems.get(term)
+
+        if stemmed is None:
+            stemmed = self._stemmer(term)
+            self._stems[term] = stemmed
+
+        return stemmed
+
+
+_stem_cache = StemCache()
+
+
+def get_stem_cache():
+    """
+    Returns the stem cache shared by the whole process.
+    """
+    return _stem_cache
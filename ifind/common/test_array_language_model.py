@@ -0,0 +1,55 @@
+from language_model import LanguageModel
+from array_language_model import ArrayLanguageModel, term_probs
+from smoothed_language_model import SmoothedLanguageModel, LaPlaceLanguageModel, BayesLanguageModel
+import math
+import unittest
+import logging
+import sys
+
+class TestArrayLanguageModel(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestArrayLanguageModel")
+        self.doc = {'hello': 1, 'world': 2, 'help': 1}
+        self.col = {'hello': 20, 'world': 5, 'good': 5, 'bye': 15, 'free': 1, 'code': 1, 'source': 1, 'compile': 1, 'error': 1}
+        self.terms = ['hello', 'world', 'help', 'error', 'missing', 'hello']
+
+    def test_same_as_language_model(self):
+        self.logger.debug("Test the array language model gives the same values as LanguageModel")
+        model = ArrayLanguageModel(term_dict=self.col)
+        expected = LanguageModel(term_dict=self.col)
+        self.assertEqual(model.get_total_occurrences(), expected.get_total_occurrences())
+        self.assertEqual(model.get_num_terms(), expected.get_num_terms())
+
+        for term in self.terms:
+            self.assertEqual(model.get_num_occurrences(term), expected.get_num_occurrences(term))
+            self.assertEqual(model.get_term_prob(term), expected.get_term_prob(term))
+
+    def test_batch(self):
+        self.logger.debug("Test batch lookups by term ID")
+        model = ArrayLanguageModel(term_dict=self.col)
+        term_ids = model.get_term_ids(self.terms)
+        self.assertEqual(term_ids[4], -1)
+        self.assertEqual(list(model.get_term_probs(term_ids)), [model.get_term_prob(term) for term in self.terms])
+        self.assertEqual(list(model.get_counts(term_ids)), [model.get_num_occurrences(term) for term in self.terms])
+
+        log_probs = model.get_log_term_probs(term_ids)
+        self.assertEqual(log_probs[0], math.log(20.0/50.0, 2.0))
+        self.assertEqual(log_probs[4], float('-inf'))
+
+    def test_smoothed_batch(self):
+        self.logger.debug("Test batch lookups of smoothed language models")
+        for doc_lm, col_lm in [(ArrayLanguageModel(term_dict=self.doc), ArrayLanguageModel(term_dict=self.col)),
+                               (LanguageModel(term_dict=self.doc), LanguageModel(term_dict=self.col))]:
+            for model in [SmoothedLanguageModel(doc_lm, col_lm, lam=0.3),
+                          LaPlaceLanguageModel(doc_lm, col_lm, alpha=1.0),
+                          BayesLanguageModel(doc_lm, col_lm, beta=5.0)]:
+                expected = [model.get_term_prob(term) for term in self.terms]
+                self.assertEqual(list(model.get_term_probs_for_terms(self.terms)), expected)
+                self.assertEqual(list(term_probs(model, self.terms)), expected)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestArrayLanguageModel").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
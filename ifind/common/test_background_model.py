@@ -0,0 +1,54 @@
+from background_model import load_background, compile_background, read_compiled_background, BackgroundLanguageModel
+from language_model import LanguageModel
+import os
+import tempfile
+import unittest
+import logging
+import sys
+
+class TestBackgroundModel(unittest.TestCase):
+
+    def setUp(self):
+        self.expected = {'hello': 10, 'world': 20, 'goodbye': 10}
+        self.logger = logging.getLogger("TestBackgroundModel")
+        self.compiled_filename = os.path.join(tempfile.mkdtemp(), 'term_occurrences.bglm')
+        compile_background('term_occurrences.txt', self.compiled_filename, delimiter=None)
+
+    def tearDown(self):
+        os.remove(self.compiled_filename)
+        os.rmdir(os.path.dirname(self.compiled_filename))
+
+    def test_load_text(self):
+        self.logger.debug("Test load a text vocabulary file")
+        model = load_background('term_occurrences.txt', delimiter=None)
+        self.assertDictEqual(model.to_dict(), self.expected)
+        self.assertEqual(model.get_total(), 40)
+
+    def test_load_cached(self):
+        self.logger.debug("Test a vocabulary file is only loaded once")
+        model = load_background('term_occurrences.txt', delimiter=None)
+        self.assertIs(model, load_background('term_occurrences.txt', delimiter=None))
+
+    def test_compiled(self):
+        self.logger.debug("Test a compiled vocabulary file matches the text file")
+        model = read_compiled_background(self.compiled_filename)
+        self.assertDictEqual(model.to_dict(), self.expected)
+        self.assertEqual(model.get_total(), 40)
+        self.assertEqual(model.get_value('world'), 20)
+        self.assertEqual(model.get_value('garble'), 0)
+
+    def test_term_probabilities(self):
+        self.logger.debug("Test precomputed term probabilities match the LanguageModel")
+        expected_model = LanguageModel(term_dict=self.expected)
+        background_model = BackgroundLanguageModel(read_compiled_background(self.compiled_filename))
+
+        for term in ['hello', 'world', 'goodbye', 'garble']:
+            self.assertEqual(expected_model.get_term_prob(term), background_model.get_term_prob(term))
+
+        self.assertEqual(background_model.get_total_occurrences(), 40)
+        self.assertEqual(background_model.get_num_occurrences('hello'), 10)
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestBackgroundModel").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
@@ -0,0 +1,46 @@
+from markup import strip_tags, html_to_text, clear_cache
+from bs4 import BeautifulSoup
+import unittest
+import logging
+import re
+import sys
+
+
+class TestMarkup(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestMarkup")
+        self.documents = ['<HTML><b>Test</b> <h1>Extract</h2> Queries</HTML>',
+                          'Fish &amp; chips &quot;to go&quot; &bogus; &#65;&#x42;&#150; &#67x',
+                          '<p>text<script>var x = "<b>";</script> after</p><style>p {}</style><!-- comment -->',
+                          '<!DOCTYPE html><pre>  </pre> <p>\n </p><![CDATA[ data ]]><?pi?><br></br><br/>end',
+                          'unclosed <b',
+                          '',
+                          '  \n ',
+                          'plain text with no markup']
+
+    def test_strip_tags(self):
+        self.logger.debug("Test Strip Tags")
+        for document in self.documents:
+            self.assertEqual(strip_tags(document), re.sub('<.*?>', '', document))
+        self.assertEqual(strip_tags('<b>bytes</b>'.encode('utf-8')), 'bytes')
+
+    def test_html_to_text(self):
+        self.logger.debug("Test HTML to Text")
+        for document in self.documents:
+            self.assertEqual(html_to_text(document), BeautifulSoup(document, 'html.parser').get_text())
+
+    def test_memoised(self):
+        self.logger.debug("Test Memoised Text")
+        clear_cache()
+        text = html_to_text('<b>snippet</b> text', docid='DOC-1')
+        self.assertEqual(text, 'snippet text')
+        self.assertIs(html_to_text('<b>snippet</b> text', docid='DOC-1'), text)
+        self.assertEqual(html_to_text('<b>document</b> text', docid='DOC-1'), 'document text')
+        self.assertEqual(strip_tags('a <i>b</i> &amp; c', docid='DOC-1'), 'a b &amp; c')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestMarkup").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
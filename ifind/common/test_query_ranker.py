@@ -1,6 +1,8 @@
 __author__ = 'rose'
 
 from query_ranker import QueryRanker
+from language_model import LanguageModel
+from smoothed_language_model import SmoothedLanguageModel
 import unittest
 import logging
 import sys
@@ -57,6 +59,29 @@ class TestQueryRanker(unittest.TestCase):
         # self.assertAlmostEqual(result.items()[0],expected.values()[0])
 
 
+class TestBatchQueryRanker(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestQueryRanker")
+        doc_lm = LanguageModel(term_dict={'hello': 2, 'world': 4})
+        col_lm = LanguageModel(file='term_occurrences.txt')
+        self.ranker = QueryRanker(smoothed_language_model=SmoothedLanguageModel(doc_lm, col_lm, lam=0.5))
+        self.queries = ['hello world', 'hello', 'goodbye world', 'unknown', 'world  hello', 'hello world', 'world hello goodbye unknown', '']
+
+    def test_calculate_query_probabilities(self):
+        self.logger.debug("Test Calculate Query Probabilities in a batch")
+        expected = [self.ranker.calculate_query_probability(query) for query in self.queries]
+        self.assertEqual(self.ranker.calculate_query_probabilities(self.queries), expected)
+        self.assertEqual(self.ranker.calculate_query_probabilities([]), [])
+
+    def test_get_top_queries_ties(self):
+        self.logger.debug("Test Get Top Queries keeps tied queries in order")
+        self.ranker.calculate_query_list_probabilities(['world', 'hello', 'world hello', 'hello world', 'unknown'])
+        result = self.ranker.get_top_queries(4)
+        self.assertEqual([query for query, score in result], ['unknown', 'world', 'world hello', 'hello world'])
+        self.assertEqual(len(self.ranker.get_top_queries(10)), 5)
+
+
 if __name__ == '__main__':
     logging.basicConfig(stream=sys.stderr)
     logging.getLogger("TestQueryRanker").setLevel(logging.DEBUG)
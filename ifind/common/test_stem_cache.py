@@ -0,0 +1,36 @@
+from stem_cache import StemCache, get_stem_cache, porter_stem
+import copy
+import unittest
+import logging
+import sys
+
+class TestStemCache(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestStemCache")
+
+    def test_stem(self):
+        self.logger.debug("Test stemming")
+        stem_cache = StemCache()
+        self.assertEqual(stem_cache.stem('fundamentally'), 'fundament')
+        self.assertEqual(stem_cache.stem('caresses'), 'caress')
+        self.assertEqual(stem_cache.stem('caresses'), porter_stem('caresses'))
+
+    def test_cached(self):
+        self.logger.debug("Test each term is only stemmed once")
+        stemmed = []
+        stem_cache = StemCache(stemmer=lambda term: stemmed.append(term) or term[:4])
+        self.assertEqual([stem_cache.stem(term) for term in ['fishing', 'fished', 'fishing']], ['fish', 'fish', 'fish'])
+        self.assertEqual(stemmed, ['fishing', 'fished'])
+        self.assertEqual(len(stem_cache), 2)
+
+    def test_shared(self):
+        self.logger.debug("Test stem caches are shared")
+        self.assertIs(get_stem_cache(), get_stem_cache())
+        self.assertIs(copy.deepcopy(get_stem_cache()), get_stem_cache())
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestStemCache").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
@@ -0,0 +1,66 @@
+from tokenizer import TermCleaner, get_term_cleaner, load_stopwords
+from query_generation import QueryGeneration
+import unittest
+import logging
+import sys
+
+
+class PipelineQueryGeneration(QueryGeneration):
+    """
+    Overrides construct_pipeline(), so that clean_text() runs the text through the pipeline itself.
+    """
+    def construct_pipeline(self, pipeline):
+        return super(PipelineQueryGeneration, self).construct_pipeline(pipeline)
+
+
+class TestTermCleaner(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestTermCleaner")
+        self.texts = ['The quick brown fox jumped over the lazy dog',
+                      'Hello, world! Hello again... (and again)',
+                      'State-of-the-art results in 2013: 42 cats & 3-legged dogs',
+                      'R2D2 and C3PO; e-mail info@example.com for the 1st prize',
+                      u'Caf\xe9 na\xefve \xfcber ½ stra\xdfe – \xc9cole',
+                      'yourselves ourselves wouldn\'t isn\'t about   \t\n above',
+                      '',
+                      '--- ... !!!']
+
+    def test_clean_term(self):
+        self.logger.debug("Test cleaning single terms")
+        cleaner = TermCleaner(min_len=3, stopword_file='stopwords_test.txt')
+        self.assertEqual(cleaner.clean_term('fox,'), 'fox')
+        self.assertEqual(cleaner.clean_term('r2d2'), 'rd')
+        self.assertEqual(cleaner.clean_term('to'), None)
+        self.assertEqual(cleaner.clean_term('about'), None)
+        self.assertEqual(cleaner.clean_term('2013'), None)
+
+    def test_same_as_pipeline(self):
+        self.logger.debug("Test the cleaner gives the same terms as the pipeline")
+        for min_len in [0, 1, 3, 5]:
+            generator = PipelineQueryGeneration(stopwordfile='stopwords_test.txt', minlen=min_len)
+            cleaner = TermCleaner(min_len=min_len, stopword_file='stopwords_test.txt')
+
+            for text in self.texts:
+                self.assertEqual(cleaner.clean_text(text), generator.clean_text(text))
+
+    def test_query_generation(self):
+        self.logger.debug("Test QueryGeneration.clean_text() uses the cleaner")
+        generator = QueryGeneration(stopwordfile='stopwords_test.txt', minlen=3)
+        pipeline_generator = PipelineQueryGeneration(stopwordfile='stopwords_test.txt', minlen=3)
+        self.assertEqual(generator.clean_text(self.texts[0]), ['quick', 'brown', 'fox', 'jumped', 'lazy', 'dog'])
+
+        for text in self.texts:
+            self.assertEqual(generator.clean_text(text), pipeline_generator.clean_text(text))
+
+    def test_shared(self):
+        self.logger.debug("Test cleaners and stopwords are shared")
+        self.assertIs(get_term_cleaner(3, 'stopwords_test.txt'), get_term_cleaner(3, 'stopwords_test.txt'))
+        self.assertIs(load_stopwords('stopwords_test.txt'), load_stopwords('stopwords_test.txt'))
+        self.assertEqual(load_stopwords(None), frozenset())
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestTermCleaner").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
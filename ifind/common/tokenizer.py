@@ -0,0 +1,124 @@
+"""
+A compiled equivalent of the term cleaning pipeline used by QueryGeneration.clean_text().
+
+The default pipeline (see QueryGeneration.construct_pipeline()) runs every whitespace-separated term of the lower-cased
+text (with hyphens replaced by spaces) through the processors:
+    LengthTermProcessor -> SpecialCharProcessor -> PunctuationTermProcessor -> StopwordTermProcessor -> AlphaTermProcessor
+which, composed, reduce to:
+    - drop terms shorter than the minimum length;
+    - keep only the alphanumeric characters (after which PunctuationTermProcessor has nothing left to remove);
+    - drop the term if nothing is left, or if what is left is a stopword;
+    - keep only the alphabetic characters, dropping the term if nothing is left.
+TermCleaner performs these steps directly. ASCII terms - the vast majority - are cleaned with str.translate() tables;
+other terms fall back to per-character tests, so the output is identical to the pipeline for any text.
+"""
+
+import os
+import threading
+
+# Translation tables deleting the ASCII characters that are not alphanumeric/alphabetic.
+_ASCII_NON_ALNUM = dict.fromkeys(ord(c) for c in map(chr, range(128)) if not c.isalnum())
+_ASCII_NON_ALPHA = dict.fromkeys(ord(c) for c in map(chr, range(128)) if not c.isalpha())
+
+_stopwords = {}
+_stopwords_lock = threading.Lock()
+
+
+def load_stopwords(stopword_file):
+    """
+    Returns a frozenset of the stopwords in the given file (one per line), as read by StopwordTermProcessor.
+    Files are read once per process; a file is only read again if it is modified. If stopword_file is None, an empty set is returned.
+    """
+    if not stopword_file:
+        return frozenset()
+
+    status = os.stat(stopword_file)
+    key = (os.path.realpath(stopword_file), status.st_mtime, status.st_size)
+
+    with _stopwords_lock:
+        stopwords = _stopwords.get(key)
+
+        if stopwords is None:
+            with open(stopword_file) as f:
+                stopwords = frozenset(line.strip() for line in f)
+
+            _stopwords[key] = stopwords
+
+        return stopwords
+
+
+class TermCleaner(object):
+    """
+    Cleans text into a list of terms, exactly as QueryGeneration.clean_text() does with its default pipeline.
+    A cleaner holds no per-text state, so a single instance can be shared and reused.
+    """
+    def __init__(self, min_len=3, stopword_file=None, stoplist=None):
+        self.min_len = min_len if min_len > 0 else 3  # As LengthTermProcessor.set_min_length().
+        self.stopwords = load_stopwords(stopword_file)
+
+        if stoplist:
+            self.stopwords = self.stopwords | frozenset(stoplist)
+
+    def clean_term(self, term):
+        """
+        Cleans a single (lower-cased, whitespace-free) term. Returns the cleaned term, or None if the term is removed.
+        """
+        if len(term) < self.min_len:
+            return None
+
+        if term.isascii():
+            term = term.translate(_ASCII_NON_ALNUM)
+        elif not term.isalnum():
+            term = ''.join([c for c in term if c.isalnum()])
+
+        if not term or term in self.stopwords:
+            return None
+
+        if not term.isalpha():
+            if term.isascii():
+                term = term.translate(_ASCII_NON_ALPHA)
+            else:
+                term = ''.join([c for c in term if c.isalpha()])
+
+        return term or None
+
+    def clean_text(self, text):
+        """
+        Returns the list of cleaned terms in the given text. As with QueryGeneration.clean_text(), '' is returned for empty text.
+        """
+        if not text:
+            return ''
+
+        clean_term = self.clean_term
+        cleaned = []
+
+        for term in text.lower().replace('-', ' ').split():
+            term = clean_term(term)
+
+            if term:
+                cleaned.append(term)
+
+        return cleaned
+
+    def clean_texts(self, texts):
+        """
+        Cleans many texts at once, returning a list of the lists of cleaned terms (one for each text, in order).
+        """
+        return [self.clean_text(text) for text in texts]
+
+
+_cleaners = {}
+
+
+def get_term_cleaner(min_len=3, stopword_file=None):
+    """
+    Returns a (shared) TermCleaner for the given minimum term length and stopword file.
+    """
+    key = (min_len, load_stopwords(stopword_file))  # A modified stopword file gives a new set, and so a new cleaner.
+    cleaner = _cleaners.get(key)
+
+    if cleaner is None:
+        cleaner = TermCleaner(min_len=min_len, stopword_file=stopword_file)
+        _cleaners[key] = cleaner
+
+    return cleaner
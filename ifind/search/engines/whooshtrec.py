@@ -12,7 +12,9 @@ from whoosh.qparser import MultifieldParser
 from whoosh import scoring
 from whoosh import highlight
 
+import os
 import sys
+import time
 if sys.version_info[0] >= 3:
     unicode = str
 
@@ -22,6 +24,44 @@ import logging
 
 log = logging.getLogger('ifind.search.engines.whooshtrec')
 
+# In-memory (RamStorage) indexes, keyed by index directory.
+# Load an index here before forking worker processes, and the workers share the loaded files copy-on-write.
+_memory_indexes = {}
+
+
+def load_index_into_memory(whoosh_index_dir):
+    """
+    Copies every file of the Whoosh index at whoosh_index_dir into a RamStorage, and returns the opened in-memory index.
+    The index is loaded once per process (or once before forking); subsequent calls return the same index.
+    The load time (seconds) and footprint (bytes) are logged, and available as the index's load_time and memory_size attributes.
+    """
+    from whoosh.filedb.filestore import FileStorage, RamStorage
+
+    whoosh_index_dir = os.path.abspath(whoosh_index_dir)
+
+    if whoosh_index_dir in _memory_indexes:
+        return _memory_indexes[whoosh_index_dir]
+
+    start_time = time.time()
+    file_storage = FileStorage(whoosh_index_dir, readonly=True)
+    ram_storage = RamStorage()
+
+    for name in file_storage.list():
+        if name.endswith('LOCK'):
+            continue
+
+        with open(os.path.join(whoosh_index_dir, name), 'rb') as f:
+            ram_storage.files[name] = f.read()
+
+    index = ram_storage.open_index()
+    index.load_time = time.time() - start_time
+    index.memory_size = ram_storage.total_size()
+
+    log.info("Whoosh index loaded into memory: {0} ({1:.2f} MB in {2:.2f} seconds)".format(whoosh_index_dir, index.memory_size / 1048576.0, index.load_time))
+
+    _memory_indexes[whoosh_index_dir] = index
+    return index
+
 
 
 class Whooshtrec(Engine):
@@ -29,7 +69,7 @@ class Whooshtrec(Engine):
     Whoosh based search engine.
 
     """
-    def __init__(self, whoosh_index_dir='', stopwords_file='', model=1, implicit_or=False, **kwargs):
+    def __init__(self, whoosh_index_dir='', stopwords_file='', model=1, implicit_or=False, in_memory=False, **kwargs):
         """
         Whoosh engine constructor.
 
@@ -58,7 +98,10 @@ class Whooshtrec(Engine):
             # This creates a static docIndex for ALL instance of WhooshTrec.
             # This will not work if you want indexes from multiple sources.
             # As this currently is not the case, this is a suitable fix.
-            if not hasattr(Whooshtrec, 'docIndex'):
+            # If in_memory is set, the whole index is loaded into a RamStorage (see load_index_into_memory()).
+            if in_memory:
+                Whooshtrec.docIndex = load_index_into_memory(whoosh_index_dir)
+            elif not hasattr(Whooshtrec, 'docIndex'):
                 Whooshtrec.docIndex = open_dir(whoosh_index_dir)
 
             log.debug("Whoosh Document index open: {0}".format(whoosh_index_dir))
@@ -0,0 +1,105 @@
+import sys
+
+
+def intern_id(value):
+    """
+    Interns string identifiers (e.g. TREC docids), so that every object referring to the same document shares one string.
+    Other values are returned unchanged.
+    """
+    if type(value) is str:
+        return sys.intern(value)
+
+    return value
+
+
+class Extensible(object):
+    """
+    A base class for slot-based value types (e.g. search results and documents).
+
+    Subclasses declare their attributes in __slots__, so instances carry no per-instance dictionary.
+    Any other attribute is an extension - set it with set_extension(), after which it can be read as a normal attribute.
+    Extensions are kept in a dictionary which is only created when the first extension is set.
+    Subclasses must set self._extensions = None in their constructor.
+    """
+    __slots__ = ('_extensions',)
+
+    __field_names = {}  # class -> tuple of slot names (excluding _extensions), in declaration order.
+
+    def __getattr__(self, name):
+        """
+        Called only when an attribute is not found by normal lookup; returns the extension of the given name.
+        """
+        try:
+            extensions = object.__getattribute__(self, '_extensions')
+        except AttributeError:
+            extensions = None
+
+        if extensions is not None and name in extensions:
+            return extensions[name]
+
+        raise AttributeError("'{0}' object has no attribute '{1}'".format(type(self).__name__, name))
+
+    def set_extension(self, name, value):
+        """
+        Sets an attribute. Attributes declared in __slots__ are set directly; any other name is stored as an extension.
+        """
+        if name in self.get_field_names():
+            setattr(self, name, value)
+            return
+
+        if self._extensions is None:
+            self._extensions = {}
+
+        self._extensions[name] = value
+
+    def get_extension(self, name, default=None):
+        """
+        Returns the value of the given attribute or extension, or default if it has not been set.
+        """
+        return getattr(self, name, default)
+
+    @classmethod
+    def get_field_names(cls):
+        """
+        Returns a tuple of the attribute names declared in __slots__ by the class and its parents.
+        """
+        names = Extensible.__field_names.get(cls)
+
+        if names is None:
+            names = []
+
+            for klass in reversed(cls.__mro__):
+                for name in klass.__dict__.get('__slots__', ()):
+                    if name not in ('_extensions', '__dict__', '__weakref__') and name not in names:
+                        names.append(name)
+
+            names = tuple(names)
+            Extensible.__field_names[cls] = names
+
+        return names
+
+    def get_fields(self):
+        """
+        Returns a dictionary of every attribute that has been set - declared attributes first (in declaration order), then extensions.
+        """
+        fields = {}
+
+        for name in self.get_field_names():
+            try:
+                fields[name] = getattr(self, name)
+            except AttributeError:
+                pass  # Declared, but never set.
+
+        if self._extensions:
+            fields.update(self._extensions)
+
+        return fields
+
+    def __getstate__(self):
+        return self.get_fields()
+
+    def __setstate__(self, state):
+        self._extensions = None
+
+        for name, value in state.items():
+            self.set_extension(name, value)
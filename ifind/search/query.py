@@ -3,8 +3,12 @@ import string
 class Query(object):
     """
     Models a Query object for use with ifind's search interface.
+    The standard attributes are held in slots; keyword arguments and any other attributes set later (e.g. topic, response)
+    are kept in the instance dictionary.
 
     """
+    __slots__ = ('terms', 'parsed_terms', 'result_type', 'lang', 'top', 'skip', '__dict__')
+
     def __init__(self, terms, top=10, lang="", result_type="", strip_punctuation=True, **kwargs):
         """
         Query constructor.
@@ -38,11 +42,24 @@ class Query(object):
         for key, value in kwargs.items():
             setattr(self, key, value)
 
-        for key, value in self.__dict__.items():
-            self.__dict__[key] = value
-
+        for key, value in self.get_fields():
             if isinstance(value, str):
-                self.__dict__[key] = value.encode('utf-8').rstrip()
+                setattr(self, key, value.encode('utf-8').rstrip())
+
+    def get_fields(self):
+        """
+        Returns a list of (name, value) tuples for every attribute of the query - the slots first, then any additional attributes.
+        """
+        fields = []
+
+        for name in Query.__slots__[:-1]:
+            try:
+                fields.append((name, getattr(self, name)))
+            except AttributeError:
+                pass
+
+        fields.extend(self.__dict__.items())
+        return fields
 
     def set_skip(self, skip):
         self.skip = skip
@@ -64,7 +81,7 @@ class Query(object):
 
         """
         return '\n'.join(['{0}: {1}'.format(key.title(), value)
-                          for (key, value) in self.__dict__.items()])
+                          for (key, value) in self.get_fields()])
 
     def __eq__(self, other):
         """
@@ -93,7 +110,7 @@ class Query(object):
             print hash(query) --> 9160469348640922505
 
         """
-        return hash(tuple(self.__dict__.items()))
+        return hash(tuple(self.get_fields()))
 
     @staticmethod
     def check_input(input_string, strip_punctuation=True):
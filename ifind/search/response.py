@@ -1,6 +1,7 @@
 import json
 import jsonpickle
 import ifind.common.make_json_serializable
+from ifind.search.extensible import Extensible, intern_id
 
 
 class Response(object):
@@ -84,8 +85,9 @@ class Response(object):
         """
         response_dict = json.loads(jsonpickle.encode(self.__dict__))
 
-        for result in response_dict[u'results']:
+        for index, result in enumerate(response_dict[u'results']):
             del result[u'py/object']
+            response_dict[u'results'][index] = result.get(u'py/state', result)  # Results are slot-based, so are encoded by their state.
 
         return json.dumps(response_dict)
 
@@ -165,11 +167,14 @@ class Response(object):
             return False
 
 
-class Result(object):
+class Result(Extensible):
     """
     Models a Result object for use with ifind's Response class.
+    Results are slot-based; attributes other than those in __slots__ are stored as extensions (see Extensible).
 
     """
+    __slots__ = ('title', 'url', 'summary', 'rank', 'imageurl', 'docid', 'source', 'whooshid', 'score', 'content')
+
     def __init__(self, title='', url='', summary='', imageurl='', rank=0, docid='', **kwargs):
         """
         Result constructor.
@@ -186,18 +191,16 @@ class Result(object):
             result = Result(title="pam's shop", url="www.pam.com", summary="a nice place")
 
         """
+        self._extensions = None
         self.title = title
         self.url = url
         self.summary = summary
         self.rank = rank
         self.imageurl = imageurl
-        self.docid = docid
+        self.docid = intern_id(docid)
 
         for key, value in kwargs.items():
-            setattr(self, key, value)
-
-        for key, value in self.__dict__.items():
-            self.__dict__[key] = value
+            self.set_extension(key, value)
 
     def __str__(self):
         """
@@ -211,7 +214,7 @@ class Result(object):
 
         """
         result = "\n"
-        for key, value in self.__dict__.items():
+        for key, value in self.get_fields().items():
             result = result + "{0}: {1}\n".format(key, value)
 
         return result
@@ -226,10 +229,10 @@ class Result(object):
             print response == response2 --> False
 
         """
-        return tuple(self.__dict__.items()) == tuple(other.__dict__.items())
+        return tuple(self.get_fields().items()) == tuple(other.get_fields().items())
 
     def to_json(self):
         """
         Returns object instance as a JSON string.
         """
-        return vars(self)
\ No newline at end of file
+        return self.get_fields()
\ No newline at end of file
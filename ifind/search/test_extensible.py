@@ -0,0 +1,129 @@
+from ifind.search.extensible import Extensible, intern_id
+from ifind.search.response import Response, Result
+from ifind.search.query import Query
+import copy
+import json
+import pickle
+import unittest
+import logging
+import sys
+
+
+class Point(Extensible):
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x, y):
+        self._extensions = None
+        self.x = x
+        self.y = y
+
+
+class LabelledPoint(Point):
+    __slots__ = ('label', 'x')  # x is redeclared; it is still listed once, in its original position.
+
+    def __init__(self, x, y, label):
+        super(LabelledPoint, self).__init__(x, y)
+        self.label = label
+
+
+class TestExtensible(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestExtensible")
+
+    def test_slots(self):
+        self.logger.debug("Test declared attributes are slots, and there is no instance dictionary")
+        point = Point(1, 2)
+        self.assertFalse(hasattr(point, '__dict__'))
+        self.assertEqual(Point.get_field_names(), ('x', 'y'))
+        self.assertEqual(LabelledPoint.get_field_names(), ('x', 'y', 'label'))
+        self.assertRaises(AttributeError, setattr, point, 'z', 3)
+        self.assertRaises(AttributeError, getattr, point, 'z')
+
+    def test_extensions(self):
+        self.logger.debug("Test undeclared attributes are stored as extensions, created only when first needed")
+        point = Point(1, 2)
+        self.assertIs(point._extensions, None)
+        self.assertEqual(point.get_extension('z', 'missing'), 'missing')
+
+        point.set_extension('z', 3)
+        point.set_extension('x', 10)  # A declared attribute; set directly.
+        self.assertEqual((point.x, point.z), (10, 3))
+        self.assertEqual(point._extensions, {'z': 3})
+        self.assertEqual(point.get_extension('z'), 3)
+        self.assertEqual(point.get_fields(), {'x': 10, 'y': 2, 'z': 3})
+        self.assertEqual(list(point.get_fields()), ['x', 'y', 'z'])
+
+    def test_unset(self):
+        self.logger.debug("Test declared attributes that were never set are left out of the fields")
+        point = LabelledPoint.__new__(LabelledPoint)
+        point._extensions = None
+        point.y = 2
+        self.assertEqual(point.get_fields(), {'y': 2})
+        self.assertRaises(AttributeError, getattr, point, 'label')
+
+    def test_copy(self):
+        self.logger.debug("Test copies and pickles keep declared attributes and extensions")
+        point = LabelledPoint(1, [2], 'a')
+        point.set_extension('colour', 'red')
+
+        for duplicate in [copy.copy(point), copy.deepcopy(point), pickle.loads(pickle.dumps(point))]:
+            self.assertEqual(type(duplicate), LabelledPoint)
+            self.assertEqual(duplicate.get_fields(), {'x': 1, 'y': [2], 'label': 'a', 'colour': 'red'})
+
+        self.assertIsNot(copy.deepcopy(point).y, point.y)
+        self.assertIs(pickle.loads(pickle.dumps(Point(1, 2)))._extensions, None)
+
+    def test_intern_id(self):
+        self.logger.debug("Test string identifiers are interned, and other values are unchanged")
+        docid = ''.join(['AP880212', '-0001'])
+        self.assertIs(intern_id(docid), intern_id(''.join(['AP88', '0212-0001'])))
+        self.assertEqual(intern_id(42), 42)
+        self.assertEqual(intern_id(None), None)
+
+
+class TestResult(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestResult")
+
+    def test_result(self):
+        self.logger.debug("Test results keep engine-specific keyword arguments")
+        result = Result(title='Crows', url='www.crows.com', summary='Rearing crows', rank=1, docid='AP880212-0001',
+                        whooshid=7, score=1.5, timedate='1988-02-12')
+        self.assertFalse(hasattr(result, '__dict__'))
+        self.assertEqual((result.whooshid, result.score, result.timedate), (7, 1.5, '1988-02-12'))
+        self.assertEqual(result._extensions, {'timedate': '1988-02-12'})
+        self.assertIs(result.docid, Result(docid=''.join(['AP880212', '-0001'])).docid)
+        self.assertEqual(result, copy.deepcopy(result))
+        self.assertNotEqual(result, Result(title='Crows'))
+        self.assertTrue('timedate: 1988-02-12' in str(result))
+
+    def test_to_json(self):
+        self.logger.debug("Test responses are serialised with every result attribute, as when results had instance dictionaries")
+        response = Response('crows')
+        response.add_result(title='Crows', url='www.crows.com', summary='Rearing crows', rank=1, docid='D1', whooshid=7, timedate='1988')
+        response.add_result(title='Rooks', rank=2)
+
+        results = json.loads(response.to_json())['results']
+        self.assertEqual(results, [{'title': 'Crows', 'url': 'www.crows.com', 'summary': 'Rearing crows', 'rank': 1, 'imageurl': '',
+                                    'docid': 'D1', 'whooshid': 7, 'timedate': '1988'},
+                                   {'title': 'Rooks', 'url': '', 'summary': '', 'rank': 2, 'imageurl': '', 'docid': ''}])
+
+    def test_query(self):
+        self.logger.debug("Test queries keep an instance dictionary for attributes set by callers")
+        query = Query('wildlife extinction', top=20, custom='value')
+        query.topic = '401'
+        self.assertEqual(query.terms, b'wildlife extinction')
+        self.assertEqual(query.custom, b'value')
+        self.assertEqual([name for name, _ in query.get_fields()], ['terms', 'parsed_terms', 'result_type', 'lang', 'top', 'skip', 'custom', 'topic'])
+        self.assertEqual(Query('wildlife extinction', top=20, custom='value'), Query('wildlife extinction', top=20, custom='value'))
+        self.assertNotEqual(Query('wildlife extinction'), Query('wildlife extinction', top=20))
+        self.assertTrue(str(query).startswith('Terms: '))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestExtensible").setLevel(logging.DEBUG)
+    logging.getLogger("TestResult").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
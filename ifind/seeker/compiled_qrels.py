@@ -0,0 +1,409 @@
+"""
+A compiled, memory-mapped representation of TREC qrels.
+
+The text qrels are converted once (see compile_qrels(), or run this module as a script) into a binary file holding:
+    - a header;
+    - a topic table - sorted topic IDs, each with the range of entries belonging to that topic;
+    - the document IDs for every entry, sorted by topic and then document ID, as fixed-width NUL-padded byte strings;
+    - the judgment for every entry, as a signed 32-bit integer.
+Lookups binary search the memory-mapped file, so opening a compiled file is near-instant, and the pages are shared
+between every process using the same file through the operating system's page cache.
+
+Usage: python -m ifind.seeker.compiled_qrels <qrels_filename> [compiled_filename]
+"""
+
+import os
+import sys
+import mmap
+import stat
+import struct
+import hashlib
+import threading
+
+MAGIC = b'SIMQREL2'
+HEADER = struct.Struct('<8sIIII')  # magic, topic count, entry count, topic ID width, document ID width
+TOPIC_RANGE = struct.Struct('<II')  # first entry, last entry + 1
+JUDGEMENT = struct.Struct('<i')
+JUDGEMENT_RANGE = (-2 ** 31, 2 ** 31 - 1)
+COMPILED_EXTENSION = '.qrelsbin'
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'simiir', 'qrels')  # Per user; never a shared directory.
+
+
+def parse_qrels_line(line):
+    """
+    Parses a TREC qrels line (topic iteration document judgement) in the same manner as TrecQrelHandler.
+    Returns a (topic, document, judgement) tuple, or None if the line holds no judgement.
+    """
+    parts = line.partition(' ')
+    topic = parts[0]
+    parts = parts[2].partition(' ')
+    parts = parts[2].partition(' ')
+    doc = str(parts[0].strip())
+    judgement = '0' + parts[2].strip()
+
+    if topic and doc:
+        return topic, doc, int(judgement)
+
+    return None
+
+
+def compile_qrels(qrels_filename, compiled_filename=None):
+    """
+    Converts the given TREC qrels file to the compiled format, and returns the filename of the compiled file.
+    If compiled_filename is not specified, the compiled file is placed alongside the qrels file (with a .qrelsbin extension).
+    As with TrecQrelHandler, a later judgement for the same topic/document pair replaces an earlier one.
+    """
+    if compiled_filename is None:
+        compiled_filename = qrels_filename + COMPILED_EXTENSION
+
+    judgements = {}
+
+    with open(qrels_filename, 'r') as qrels_file:
+        for line_number, line in enumerate(qrels_file, 1):
+            parsed = parse_qrels_line(line)
+
+            if parsed is not None:
+                topic, doc, judgement = parsed
+
+                if not JUDGEMENT_RANGE[0] <= judgement <= JUDGEMENT_RANGE[1]:
+                    raise ValueError("The judgement {0} on line {1} of '{2}' cannot be compiled; judgements must lie within {3}..{4}.".format(
+                        judgement, line_number, qrels_filename, JUDGEMENT_RANGE[0], JUDGEMENT_RANGE[1]))
+
+                judgements[(topic.encode('utf-8'), doc.encode('utf-8'))] = judgement
+
+    write_compiled_qrels(judgements, compiled_filename)
+    return compiled_filename
+
+
+def write_compiled_qrels(judgements, compiled_filename):
+    """
+    Writes a compiled qrels file from a dictionary of (topic, document) -> judgement, where topic and document are byte strings.
+    The file is written to a temporary name and then renamed, so readers never see a partial file.
+    """
+    entries = sorted(judgements.items())
+    topics = []  # (topic, first entry, last entry + 1)
+
+    for position, ((topic, _), _) in enumerate(entries):
+        if not topics or topics[-1][0] != topic:
+            topics.append([topic, position, position])
+
+        topics[-1][2] = position + 1
+
+    topic_width = max([len(topic) for topic, _, _ in topics] or [1])
+    doc_width = max([len(doc) for (_, doc), _ in entries] or [1])
+
+    judgement_bytes = struct.pack('<{0}i'.format(len(entries)), *[judgement for _, judgement in entries])
+    temporary_filename = '{0}.{1}.tmp'.format(compiled_filename, os.getpid())
+
+    with open(temporary_filename, 'wb') as compiled_file:
+        compiled_file.write(HEADER.pack(MAGIC, len(topics), len(entries), topic_width, doc_width))
+
+        for topic, start, end in topics:
+            compiled_file.write(topic.ljust(topic_width, b'\0'))
+            compiled_file.write(TOPIC_RANGE.pack(start, end))
+
+        for (_, doc), _ in entries:
+            compiled_file.write(doc.ljust(doc_width, b'\0'))
+
+        compiled_file.write(judgement_bytes)
+
+    os.replace(temporary_filename, compiled_filename)
+
+
+def is_compiled_qrels(filename):
+    """
+    Returns True iif the given file is a compiled qrels file.
+    """
+    try:
+        with open(filename, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except IOError:
+        return False
+
+
+class CompiledQrelHandler(object):
+    """
+    Read-only access to a compiled qrels file, offering the lookup methods of TrecQrelHandler.
+    Use open_compiled_qrels() to share a single instance (and mapping) per file within a process.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+
+        with open(filename, 'rb') as compiled_file:
+            self._map = mmap.mmap(compiled_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, topic_count, entry_count, topic_width, doc_width = HEADER.unpack_from(self._map, 0)
+
+        if magic != MAGIC:
+            raise IOError("The file '{0}' is not a compiled qrels file.".format(filename))
+
+        self._entry_count = entry_count
+        self._doc_width = doc_width
+        self._topics = {}  # topic -> (first entry, last entry + 1); the topic table is small, so is read up front.
+
+        offset = HEADER.size
+
+        for _ in range(topic_count):
+            topic = self._map[offset:offset + topic_width].rstrip(b'\0').decode('utf-8')
+            self._topics[topic] = TOPIC_RANGE.unpack_from(self._map, offset + topic_width)
+            offset = offset + topic_width + TOPIC_RANGE.size
+
+        self._docs_offset = offset
+        self._judgements_offset = offset + (entry_count * doc_width)
+
+    def _find(self, topic, doc):
+        """
+        Returns the entry position of the given topic/document pair, or -1 if it is not present.
+        As with TrecQrelHandler, topics and documents are matched as strings.
+        """
+        bounds = self._topics.get(topic)
+
+        if bounds is None or not isinstance(doc, str):
+            return -1
+
+        key = doc.encode('utf-8')
+
+        if len(key) > self._doc_width:
+            return -1
+
+        key = key.ljust(self._doc_width, b'\0')
+        low, high = bounds
+        width = self._doc_width
+        base = self._docs_offset
+
+        while low < high:
+            middle = (low + high) // 2
+            start = base + (middle * width)
+            candidate = self._map[start:start + width]
+
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                return middle
+
+        return -1
+
+    def _judgement(self, position):
+        return JUDGEMENT.unpack_from(self._map, self._judgements_offset + (position * JUDGEMENT.size))[0]
+
+    def get_value(self, topic, doc):
+        """
+        Returns the judgement for the topic/document pair, or 0 if there is no judgement.
+        """
+        position = self._find(topic, doc)
+
+        if position < 0:
+            return 0
+
+        return self._judgement(position)
+
+    def get_value_if_exists(self, topic, doc):
+        """
+        Returns the judgement for the topic/document pair, or None if there is no judgement.
+        """
+        position = self._find(topic, doc)
+
+        if position < 0:
+            return None
+
+        return self._judgement(position)
+
+    def get_topic_list(self):
+        return list(self._topics.keys())
+
+    def get_doc_list(self, topic):
+        """
+        Returns a dictionary of document -> judgement for the given topic (or an empty list if there are no judgements).
+        """
+        bounds = self._topics.get(topic)
+
+        if bounds is None:
+            return []
+
+        docs = {}
+
+        for position in range(bounds[0], bounds[1]):
+            start = self._docs_offset + (position * self._doc_width)
+            doc = self._map[start:start + self._doc_width].rstrip(b'\0').decode('utf-8')
+            docs[doc] = self._judgement(position)
+
+        return docs
+
+    def get_topic_doc_dict(self):
+        """
+        Returns a dictionary of topic -> (document -> judgement) for every topic. This reads the entire file.
+        """
+        return dict((topic, self.get_doc_list(topic)) for topic in self._topics)
+
+    def __getstate__(self):
+        """
+        The mapping cannot be pickled; a pickled handler holds the filename only, and reopens the file when unpickled.
+        """
+        return {'filename': self.filename}
+
+    def __setstate__(self, state):
+        self.__init__(state['filename'])
+
+    def __len__(self):
+        return self._entry_count
+
+    def __str__(self):
+        return 'TOPICS READ IN: ' + str(len(self._topics))
+
+
+_open_handlers = {}
+_open_handlers_lock = threading.Lock()
+
+
+def open_compiled_qrels(filename):
+    """
+    Returns the CompiledQrelHandler for the given compiled qrels file, creating it if this process has not yet opened the file.
+    """
+    key = os.path.realpath(filename)
+
+    with _open_handlers_lock:
+        handler = _open_handlers.get(key)
+
+        if handler is None:
+            handler = CompiledQrelHandler(filename)
+            _open_handlers[key] = handler
+
+        return handler
+
+
+def load_qrels(filename, topics=None):
+    """
+    Returns a qrels handler for the given file, which may be either a TREC qrels text file or a compiled qrels file.
+    If a text file has an up-to-date compiled counterpart (the same filename with a .qrelsbin extension), the compiled file is used.
+    If topics (a list of topic IDs) is specified, only the judgements for those topics are parsed from a text file up front;
+    judgements for other topics are parsed on first access. A compiled file is never parsed, so topics is not needed.
+    """
+    compiled_filename = filename + COMPILED_EXTENSION
+
+    if is_compiled_qrels(filename):
+        return open_compiled_qrels(filename)
+
+    if os.path.exists(compiled_filename) and os.path.getmtime(compiled_filename) >= os.path.getmtime(filename) \
+            and is_compiled_qrels(compiled_filename):
+        return open_compiled_qrels(compiled_filename)
+
+    if topics is not None:
+        from ifind.seeker.trec_qrel_handler import TopicScopedQrelHandler
+        return TopicScopedQrelHandler(filename, topics)
+
+    from ifind.seeker.trec_qrel_handler import TrecQrelHandler
+    return TrecQrelHandler(filename)
+
+
+_file_hashes = {}  # (path, size, modification time) -> digest
+_file_hashes_lock = threading.Lock()
+
+
+def hash_file(filename):
+    """
+    Returns the SHA-1 hex digest of the contents of the given file.
+    Digests are remembered for the process, and only recomputed if the file's size or modification time changes.
+    """
+    status = os.stat(filename)
+    key = (os.path.realpath(filename), status.st_size, status.st_mtime_ns)
+
+    with _file_hashes_lock:
+        hexdigest = _file_hashes.get(key)
+
+    if hexdigest is not None:
+        return hexdigest
+
+    digest = hashlib.sha1()
+
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+
+    hexdigest = digest.hexdigest()
+
+    with _file_hashes_lock:
+        _file_hashes[key] = hexdigest
+
+    return hexdigest
+
+
+def is_private_dir(directory):
+    """
+    Returns True if the given directory is owned by the current user, and no other user can write to it.
+    Compiled files are mapped without being checked against the qrels, so they are only read from such a directory.
+    """
+    status = os.stat(directory)
+
+    if hasattr(os, 'getuid') and status.st_uid != os.getuid():
+        return False
+
+    return not status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def get_cached_qrels(filename, cache_dir=None, remote=None, remote_prefix='qrels', topics=None):
+    """
+    Returns a CompiledQrelHandler for the given qrels file, using a cache of compiled files keyed by the hash of the file contents.
+    The same contents are therefore compiled once, whatever the file is called; later processes map the cached file directly.
+
+    The compiled files are kept in cache_dir (DEFAULT_CACHE_DIR if not specified), which is created readable by the current user only.
+    A cache directory that another user owns or can write to is not used (see is_private_dir()).
+    Optionally, remote is a shared store with get(key) and set(key, value) methods (e.g. a redis.StrictRedis instance)
+    holding the compiled bytes under '<remote_prefix>::<hash>', so that compiled files can be shared between machines.
+    If the cache cannot be written, the qrels are loaded without it (see load_qrels(), to which topics is passed).
+    """
+    if is_compiled_qrels(filename):
+        return open_compiled_qrels(filename)
+
+    if cache_dir is None:
+        cache_dir = DEFAULT_CACHE_DIR
+
+    key = hash_file(filename)
+    compiled_filename = os.path.join(cache_dir, key + COMPILED_EXTENSION)
+    remote_key = '{0}::{1}'.format(remote_prefix, key)
+
+    try:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+
+        if not is_private_dir(cache_dir):
+            return load_qrels(filename, topics=topics)
+
+        if is_compiled_qrels(compiled_filename):
+            return open_compiled_qrels(compiled_filename)
+
+        compiled = remote.get(remote_key) if remote is not None else None
+
+        if compiled and compiled.startswith(MAGIC):
+            temporary_filename = '{0}.{1}.tmp'.format(compiled_filename, os.getpid())
+
+            with open(temporary_filename, 'wb') as compiled_file:
+                compiled_file.write(compiled)
+
+            os.replace(temporary_filename, compiled_filename)
+        else:
+            compile_qrels(filename, compiled_filename)
+
+            if remote is not None:
+                with open(compiled_filename, 'rb') as compiled_file:
+                    remote.set(remote_key, compiled_file.read())
+    except (IOError, OSError):
+        return load_qrels(filename, topics=topics)
+
+    return open_compiled_qrels(compiled_filename)
+
+
+def usage(script_name):
+    """
+    Prints the usage message to the output stream.
+    """
+    print("Usage: {0} <qrels_filename> [compiled_filename]".format(script_name))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or len(sys.argv) > 3:
+        usage(sys.argv[0])
+    else:
+        output_filename = compile_qrels(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+        print("Compiled qrels written to {0}".format(output_filename))
@@ -0,0 +1,144 @@
+from ifind.seeker.compiled_qrels import compile_qrels, write_compiled_qrels, is_compiled_qrels, open_compiled_qrels, load_qrels, get_cached_qrels, \
+    is_private_dir, CompiledQrelHandler, COMPILED_EXTENSION, JUDGEMENT_RANGE
+from ifind.seeker.trec_qrel_handler import TrecQrelHandler, TopicScopedQrelHandler
+from random import Random
+import os
+import time
+import pickle
+import shutil
+import tempfile
+import unittest
+import logging
+import sys
+
+
+class TestCompiledQrels(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestCompiledQrels")
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'qrels.txt')
+        random = Random(36)
+        lines = []
+
+        for topic in ['401', '402', '7', '1000']:
+            for _ in range(200):
+                doc = 'DOC-{0}'.format(random.randrange(10 ** random.randrange(1, 6)))  # Document IDs of varying widths, with repeats.
+                lines.append('{0} 0 {1} {2}\n'.format(topic, doc, random.choice([0, 0, 1, 2, 4, 1000, 70000])))
+
+        random.shuffle(lines)
+        lines.insert(10, '\n')
+        lines.append('401 0 DOC-WIDE {0}\n'.format(JUDGEMENT_RANGE[1]))
+        lines.append('7 0 DOC-UNJUDGED\n')
+
+        with open(self.filename, 'w') as f:
+            f.writelines(lines)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assertSameLookups(self, handler, expected):
+        self.assertEqual(sorted(handler.get_topic_list()), sorted(expected.get_topic_list()))
+
+        self.assertEqual(handler.get_doc_list('999'), [])
+
+        for topic in expected.get_topic_list():
+            docs = expected.get_doc_list(topic)
+            self.assertEqual(handler.get_doc_list(topic), docs)
+
+            for doc in list(docs) + ['DOC-MISSING', 'DOC', 'DOC-{0}'.format('9' * 20), '']:
+                self.assertEqual(handler.get_value('999', doc), 0)
+                self.assertEqual(handler.get_value_if_exists('999', doc), None)
+                self.assertEqual(handler.get_value(topic, doc), expected.get_value(topic, doc), (topic, doc))
+                self.assertEqual(handler.get_value_if_exists(topic, doc), expected.get_value_if_exists(topic, doc), (topic, doc))
+
+    def test_lookups(self):
+        self.logger.debug("Test a compiled file gives the same judgements as the text qrels")
+        expected = TrecQrelHandler(self.filename)
+        handler = CompiledQrelHandler(compile_qrels(self.filename))
+        self.assertTrue(is_compiled_qrels(self.filename + COMPILED_EXTENSION))
+        self.assertFalse(is_compiled_qrels(self.filename))
+
+        self.assertEqual(len(handler), sum(len(docs) for docs in expected.get_topic_doc_dict().values()))
+        self.assertEqual(handler.get_topic_doc_dict(), expected.get_topic_doc_dict())
+        self.assertSameLookups(handler, expected)
+
+        self.assertEqual(handler.get_value('401', 'DOC-WIDE'), JUDGEMENT_RANGE[1])
+        self.assertEqual(handler.get_value_if_exists('7', 'DOC-UNJUDGED'), 0)
+
+    def test_negative(self):
+        self.logger.debug("Test negative judgements are stored")
+        filename = os.path.join(self.directory, 'negative' + COMPILED_EXTENSION)
+        write_compiled_qrels({(b'401', b'DOC-1'): -1, (b'401', b'DOC-2'): JUDGEMENT_RANGE[0], (b'402', b'DOC-1'): 3}, filename)
+        handler = CompiledQrelHandler(filename)
+        self.assertEqual(handler.get_topic_doc_dict(), {'401': {'DOC-1': -1, 'DOC-2': JUDGEMENT_RANGE[0]}, '402': {'DOC-1': 3}})
+
+    def test_topic_scoped(self):
+        self.logger.debug("Test the topic-scoped handler gives the same judgements as the text qrels")
+        expected = TrecQrelHandler(self.filename)
+        self.assertSameLookups(TopicScopedQrelHandler(self.filename, ['402']), expected)
+        self.assertSameLookups(TopicScopedQrelHandler(self.filename, [7, 1000]), expected)
+        self.assertSameLookups(TopicScopedQrelHandler(self.filename), expected)
+
+    def test_out_of_range(self):
+        self.logger.debug("Test judgements that do not fit in 32 bits are rejected")
+        with open(self.filename, 'a') as f:
+            f.write('401 0 DOC-HUGE {0}\n'.format(JUDGEMENT_RANGE[1] + 1))
+
+        self.assertRaises(ValueError, compile_qrels, self.filename)
+        self.assertFalse(os.path.exists(self.filename + COMPILED_EXTENSION))
+
+    def test_load(self):
+        self.logger.debug("Test an up-to-date compiled file is used in place of the text qrels")
+        self.assertTrue(isinstance(load_qrels(self.filename), TrecQrelHandler))
+        self.assertTrue(isinstance(load_qrels(self.filename, topics=['401']), TopicScopedQrelHandler))
+
+        compiled_filename = compile_qrels(self.filename)
+        handler = load_qrels(self.filename)
+        self.assertTrue(isinstance(handler, CompiledQrelHandler))
+        self.assertIs(load_qrels(compiled_filename), handler)
+        self.assertIs(open_compiled_qrels(compiled_filename), handler)
+
+        modified = time.time() + 10  # The text qrels have changed since they were compiled.
+        os.utime(self.filename, (modified, modified))
+        self.assertTrue(isinstance(load_qrels(self.filename), TrecQrelHandler))
+
+    def test_cache(self):
+        self.logger.debug("Test compiled files are cached by the contents of the text qrels")
+        cache_dir = os.path.join(self.directory, 'cache')
+        copy_filename = os.path.join(self.directory, 'copy.txt')
+        shutil.copyfile(self.filename, copy_filename)
+
+        handler = get_cached_qrels(self.filename, cache_dir=cache_dir)
+        self.assertIs(get_cached_qrels(copy_filename, cache_dir=cache_dir), handler)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.assertSameLookups(handler, TrecQrelHandler(self.filename))
+
+        unpickled = pickle.loads(pickle.dumps(handler))
+        self.assertEqual(unpickled.filename, handler.filename)
+        self.assertEqual(unpickled.get_topic_doc_dict(), handler.get_topic_doc_dict())
+
+    def test_private_cache(self):
+        self.logger.debug("Test the cache directory is created private, and compiled files in a directory others can write to are not used")
+        cache_dir = os.path.join(self.directory, 'private', 'cache')
+        get_cached_qrels(self.filename, cache_dir=cache_dir)
+        self.assertEqual(os.stat(cache_dir).st_mode & 0o077, 0)
+        self.assertTrue(is_private_dir(cache_dir))
+
+        shared_dir = os.path.join(self.directory, 'shared')
+        os.mkdir(shared_dir)
+        os.chmod(shared_dir, 0o777)
+        self.assertFalse(is_private_dir(shared_dir))
+
+        planted = os.path.join(self.directory, 'planted' + COMPILED_EXTENSION)
+        write_compiled_qrels({(b'401', b'DOC-1'): 1}, planted)
+        shutil.copyfile(planted, os.path.join(shared_dir, os.listdir(cache_dir)[0]))
+        handler = get_cached_qrels(self.filename, cache_dir=shared_dir, topics=['401'])
+        self.assertTrue(isinstance(handler, TopicScopedQrelHandler))
+        self.assertSameLookups(handler, TrecQrelHandler(self.filename))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestCompiledQrels").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
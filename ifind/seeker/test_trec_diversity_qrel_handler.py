@@ -0,0 +1,108 @@
+from ifind.seeker.trec_diversity_qrel_handler import EntityQrelHandler, count_bits
+from random import Random
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+import sys
+
+
+class DictEntityQrelHandler(object):
+    """
+    The entity judgements held in nested dictionaries (topic -> document -> entity -> judgement), as EntityQrelHandler held them
+    before they were compiled into bitmasks. Judgements are compared as integers.
+    """
+    def __init__(self, entities_qrels_path):
+        self.ds = {}
+
+        with open(entities_qrels_path) as f:
+            for line in f:
+                topic, entity, docid, judgement = line.strip().split(' ')
+                entities = self.ds.setdefault(topic, {}).setdefault(docid, {})
+
+                if entity not in entities:
+                    entities[entity] = int(judgement)
+
+    def get_mentioned_entities_for_doc(self, topic, docid):
+        entities = self.ds.get(topic, {}).get(docid, {})
+        return [entity for entity in entities if entities[entity] > 0]
+
+
+class TestEntityQrelHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestEntityQrelHandler")
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'entities.qrels')
+        self.random = Random(40)
+        self.topics = ['401', '402', '7']
+        self.docids = ['DOC-{0}'.format(i) for i in range(40)]
+        lines = []
+
+        for topic in self.topics:
+            entities = ['{0}-E{1}'.format(topic, i) for i in range(self.random.choice([3, 20, 70]))]  # More entities than fit in 64 bits.
+
+            for _ in range(600):  # Repeated combinations, whose first judgement is used.
+                lines.append('{0} {1} {2} {3}\n'.format(topic, self.random.choice(entities), self.random.choice(self.docids), self.random.choice([0, 0, 1, 2])))
+
+        self.random.shuffle(lines)
+
+        with open(self.filename, 'w') as f:
+            f.writelines(lines)
+
+        self.expected = DictEntityQrelHandler(self.filename)
+        self.handler = EntityQrelHandler(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_mentioned_entities(self):
+        self.logger.debug("Test the mentioned entities are those of the dictionary-based handler")
+        mentioned = 0
+
+        for topic in self.topics + ['999']:
+            for docid in self.docids + ['DOC-MISSING']:
+                entities = self.expected.get_mentioned_entities_for_doc(topic, docid)
+                self.assertEqual(sorted(self.handler.get_mentioned_entities_for_doc(topic, docid)), sorted(entities), (topic, docid))
+                self.assertEqual(self.handler.get_mentioned_entity_count_for_doc(topic, docid), len(entities), (topic, docid))
+                mentioned = mentioned + len(entities)
+
+        self.assertTrue(mentioned > 0)
+        self.assertEqual(self.handler.get_entity_ids('999'), [])
+
+    def test_new_entities(self):
+        self.logger.debug("Test new entities are counted against the entities observed so far, as with lists of entities")
+        for topic in self.topics:
+            ranking = self.random.sample(self.docids, 20)
+            observed = set()
+            observed_mask = 0
+
+            for docid, count, mask in zip(ranking, self.handler.count_new_entities(topic, ranking), self.handler.get_entity_masks(topic, ranking)):
+                entities = set(self.expected.get_mentioned_entities_for_doc(topic, docid))
+                self.assertEqual(count, len(entities))
+                self.assertEqual(self.handler.count_new_entities(topic, [docid], observed_mask), [len(entities - observed)])
+                self.assertEqual(count_bits(mask & ~observed_mask), len(entities - observed))
+
+                observed = observed | entities
+                observed_mask = observed_mask | mask
+
+            entity_ids = self.handler.get_entity_ids(topic)
+            self.assertEqual(set(entity_ids[bit] for bit in range(observed_mask.bit_length()) if observed_mask & (1 << bit)), observed)
+
+    def test_entity_matrix(self):
+        self.logger.debug("Test the entity matrix marks the entities mentioned in each document")
+        for topic in self.topics:
+            entity_ids = self.handler.get_entity_ids(topic)
+            matrix = self.handler.get_entity_matrix(topic, self.docids)
+            self.assertEqual(matrix.shape, (len(self.docids), len(entity_ids)))
+
+            for row, docid in enumerate(self.docids):
+                self.assertEqual(set(entity_ids[column] for column in range(len(entity_ids)) if matrix[row, column]),
+                                 set(self.expected.get_mentioned_entities_for_doc(topic, docid)))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestEntityQrelHandler").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
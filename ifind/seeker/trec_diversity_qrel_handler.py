@@ -1,21 +1,39 @@
 # TODO: refactor this to extend from the base topic/document handler.
 # This requires some major refactoring of the base class, so has been left for now.
 
+def count_bits(mask):
+    """
+    Returns the number of bits set in the given (non-negative) integer.
+    """
+    if hasattr(mask, 'bit_count'):
+        return mask.bit_count()
+    
+    return bin(mask).count('1')
+
+
 class EntityQrelHandler(object):
     """
     Creates a data structure for the diversity QRELs.
     Should probably be handed by an ifind document/topic thing, but for now...
+    
+    Judgements are compiled when loaded. Each topic has a vocabulary of entity IDs, numbered in the order in which they
+    first appear in the file; each topic/document combination is represented by an integer bitmask, with the bit for an
+    entity set if the entity is mentioned in the document (i.e. the judgement for the document/topic/entity is >= 1).
     """
     def __init__(self, entities_qrels_path):
-        self.__ds = {}
+        self.__entities = {}  # topic -> {entity: bit}
+        self.__entity_lists = {}  # topic -> [entity], indexed by bit
+        self.__masks = {}  # topic -> {docid: bitmask of mentioned entities}
         self.path = entities_qrels_path
         self.__load(entities_qrels_path)
     
     def __load(self, entities_qrels_path):
         """
         Loads the data structure from the file.
+        Where a topic/document/entity combination appears more than once, the first judgement is used.
         """
         f = open(entities_qrels_path)
+        judged = {}  # (topic, docid) -> bitmask of the entities judged so far; only needed while loading.
         
         for line in f:
             line = line.strip().split(' ')
@@ -24,48 +42,100 @@ class EntityQrelHandler(object):
             docid = line[2]
             judgement = line[3]
             
-            if topic not in self.__ds:
-                self.__ds[topic] = {}
+            if topic not in self.__entities:
+                self.__entities[topic] = {}
+                self.__entity_lists[topic] = []
+                self.__masks[topic] = {}
+            
+            entities = self.__entities[topic]
+            
+            if entity not in entities:
+                entities[entity] = len(entities)
+                self.__entity_lists[topic].append(entity)
             
-            if docid not in self.__ds[topic]:
-                self.__ds[topic][docid] = {}
+            masks = self.__masks[topic]
+            bit = 1 << entities[entity]
             
-            if entity not in self.__ds[topic][docid]:
-                self.__ds[topic][docid][entity] = judgement
+            if docid not in masks:
+                masks[docid] = 0
+            
+            if judged.get((topic, docid), 0) & bit:
+                continue
+            
+            judged[(topic, docid)] = judged.get((topic, docid), 0) | bit
+            
+            if int(judgement) > 0:
+                masks[docid] = masks[docid] | bit
+        
+        f.close()
     
-    def get_mentioned_entity_count_for_doc(self, topic, docid):
+    def get_entity_ids(self, topic):
         """
-        Given a topic and document combination, returns the number of entities that are mentioned in that
-        document. By mentioned, we mean that the judgement for the document/topic/entity is >= 1.
+        Returns a list of the entity IDs for the given topic, in bit order (i.e. the entity for bit i is at index i).
+        """
+        return list(self.__entity_lists.get(topic, []))
+    
+    def get_entity_mask(self, topic, docid):
         """
-        if topic not in self.__ds or docid not in self.__ds[topic]:
+        Returns the bitmask of the entities mentioned in the given topic/document combination (0 if there are none).
+        """
+        if topic not in self.__masks:
             return 0
         
-        count = 0
-        entity_ds = self.__ds[topic][docid]
+        return self.__masks[topic].get(docid, 0)
+    
+    def get_entity_masks(self, topic, docids):
+        """
+        Returns a list of the bitmasks of the entities mentioned in each of the given documents, for the given topic.
+        """
+        masks = self.__masks.get(topic, {})
+        return [masks.get(docid, 0) for docid in docids]
+    
+    def count_new_entities(self, topic, docids, observed_mask=0):
+        """
+        Returns a list of the number of entities mentioned in each of the given documents that are not in observed_mask
+        (a bitmask of the entities that have already been seen, e.g. the bitwise OR of the masks of the documents seen).
+        """
+        return [count_bits(mask & ~observed_mask) for mask in self.get_entity_masks(topic, docids)]
+    
+    def get_entity_matrix(self, topic, docids):
+        """
+        Returns a NumPy boolean array of shape (len(docids), number of entities for the topic), with a row for each of the given
+        documents, and True where the document mentions the entity. Columns follow the order of get_entity_ids().
+        Useful for computing diversity measures (e.g. coverage at each rank) over a ranking in a vectorised manner.
+        """
+        import numpy
+        
+        entity_count = len(self.__entity_lists.get(topic, []))
+        matrix = numpy.zeros((len(docids), entity_count), dtype=bool)
         
-        for entity in entity_ds:
-            if entity_ds[entity] > 0:
-                count = count + 1
+        for row, mask in enumerate(self.get_entity_masks(topic, docids)):
+            while mask:
+                lowest = mask & -mask
+                matrix[row, lowest.bit_length() - 1] = True
+                mask = mask ^ lowest
         
-        return count
+        return matrix
+    
+    def get_mentioned_entity_count_for_doc(self, topic, docid):
+        """
+        Given a topic and document combination, returns the number of entities that are mentioned in that
+        document. By mentioned, we mean that the judgement for the document/topic/entity is >= 1.
+        """
+        return count_bits(self.get_entity_mask(topic, docid))
     
     
     def get_mentioned_entities_for_doc(self, topic, docid):
         """
         Returns a list of the entity IDs for the given topic/document combination.
         """
-        if topic not in self.__ds or docid not in self.__ds[topic]:
-            return []
+        mask = self.get_entity_mask(topic, docid)
         
-        entities = []
-        entity_ds = self.__ds[topic][docid]
-        
-        for entity in entity_ds:
-            if entity_ds[entity] > 0:
-                entities.append(entity)
+        if not mask:
+            return []
         
-        return entities
+        entity_list = self.__entity_lists[topic]
+        return [entity_list[bit] for bit in range(mask.bit_length()) if mask & (1 << bit)]
 
 
 class EntityNameHandler(object):
@@ -32,3 +32,84 @@ class TrecQrelHandler(TopicDocumentFileHandler):
     
     
 
+
+
+class TopicScopedQrelHandler(TrecQrelHandler):
+    '''
+    A TrecQrelHandler that only parses the judgements for the given topics when the file is read.
+    The file is still scanned in full, but for other topics only the byte ranges of their lines are kept;
+    a topic's judgements are parsed from those ranges on first access.
+    '''
+
+    def __init__(self, filename=None, topics=None):
+        self._filename = filename
+        self._topics = set([str(topic) for topic in topics]) if topics is not None else None
+        self._unloaded = {}  # topic -> list of [start, end) byte ranges in the file that have not yet been parsed.
+        super(TopicScopedQrelHandler, self).__init__(filename)
+
+    def read_file(self, filename):
+        if self._topics is None:
+            super(TopicScopedQrelHandler, self).read_file(filename)
+            return
+
+        if not file_exists(filename):
+            raise IOError("The topic/document judgement file '" + filename + "' was not found.")
+
+        scoped = set([topic.encode('utf-8') for topic in self._topics])
+        offset = 0
+
+        with open(filename, 'rb') as infile:
+            for line in infile:
+                topic = line.partition(b' ')[0]
+
+                if topic in scoped:
+                    self._put_in_line(line.decode('utf-8'))
+                elif topic:
+                    ranges = self._unloaded.setdefault(topic.decode('utf-8'), [])
+
+                    if ranges and ranges[-1][1] == offset:  # Lines for a topic are usually contiguous; merge the ranges.
+                        ranges[-1][1] = offset + len(line)
+                    else:
+                        ranges.append([offset, offset + len(line)])
+
+                offset = offset + len(line)
+
+    def _load_topic(self, topic):
+        '''
+        Parses the judgements for the given topic, if they have not already been parsed.
+        '''
+        ranges = self._unloaded.pop(topic, None)
+
+        if not ranges:
+            return
+
+        with open(self._filename, 'rb') as infile:
+            for start, end in ranges:
+                infile.seek(start)
+
+                for line in infile.read(end - start).splitlines(True):
+                    self._put_in_line(line.decode('utf-8'))
+
+    def _load_all(self):
+        for topic in list(self._unloaded.keys()):
+            self._load_topic(topic)
+
+    def get_value(self, topic, doc):
+        self._load_topic(topic)
+        return super(TopicScopedQrelHandler, self).get_value(topic, doc)
+
+    def get_value_if_exists(self, topic, doc):
+        self._load_topic(topic)
+        return super(TopicScopedQrelHandler, self).get_value_if_exists(topic, doc)
+
+    def get_doc_list(self, topic):
+        self._load_topic(topic)
+        return super(TopicScopedQrelHandler, self).get_doc_list(topic)
+
+    def get_topic_list(self):
+        self._load_all()
+        return super(TopicScopedQrelHandler, self).get_topic_list()
+
+    def get_topic_doc_dict(self):
+        self._load_all()
+        return super(TopicScopedQrelHandler, self).get_topic_doc_dict()
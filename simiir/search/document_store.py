@@ -0,0 +1,439 @@
+#
+# Memory-mapped document store.
+# Exports the stored fields of an index (title, content, docid, date, source) into a single file,
+# so that fetching a document is a single read from the (shared) page cache.
+#
+# Build a store (from the repository root):
+#   python -m simiir.search.document_store whoosh <whoosh_index_dir> <store_filename> [none|zlib|zstd]
+#   python -m simiir.search.document_store terrier <terrier_index_dir> <store_filename> [none|zlib|zstd]
+#
+# File layout (all integers little-endian):
+#   header      - magic, version, compression, block size, document slots, and section offsets.
+#   blocks      - one record (uncompressed) or block_size records compressed together.
+#   doc table   - per internal id: block offset (Q), stored block length (I), record offset within the block (I).
+#   docno table - per internal id: docno offset (Q) and length (I) into the docno blob.
+#   docno blob  - the utf-8 encoded docnos.
+#   docno hash  - open addressing table of internal id + 1 (I), probed from crc32(docno).
+#
+
+import os
+import sys
+import mmap
+import zlib
+import struct
+import logging
+from array import array
+from simiir.search.interfaces import Document
+
+log = logging.getLogger('simuser.search.document_store')
+
+MAGIC = b'SIMDOCS1'
+VERSION = 1
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+COMPRESSION_CODES = {None: COMPRESSION_NONE, 'none': COMPRESSION_NONE, 'zlib': COMPRESSION_ZLIB, 'zstd': COMPRESSION_ZSTD}
+
+FIELDS = ('title', 'content', 'docid', 'date', 'source')
+
+HEADER = struct.Struct('<8sIIIQQQQQQ')  # magic, version, compression, block size, slots, doc table, docno table, docno blob, hash table, hash capacity
+DOC_ENTRY = struct.Struct('<QII')
+DOCNO_ENTRY = struct.Struct('<QI')
+FIELD_LENGTHS = struct.Struct('<{0}I'.format(len(FIELDS)))
+
+NONE_LENGTH = 0xFFFFFFFF
+
+
+class DocumentStoreError(Exception):
+    """
+    Raised when a document store cannot be built or read.
+    """
+    pass
+
+
+def _get_codec(compression):
+    """
+    Returns a (compress, decompress) function pair for the given compression code.
+    zstd support requires the optional zstandard package.
+    """
+    if compression == COMPRESSION_NONE:
+        return None, None
+
+    if compression == COMPRESSION_ZLIB:
+        return (lambda data: zlib.compress(data, 6)), zlib.decompress
+
+    if compression == COMPRESSION_ZSTD:
+        try:
+            import zstandard
+        except ImportError:
+            raise DocumentStoreError("zstd compression requires the zstandard package (pip install zstandard).")
+
+        return zstandard.ZstdCompressor(level=3).compress, zstandard.ZstdDecompressor().decompress
+
+    raise DocumentStoreError("Unknown compression code: {0}".format(compression))
+
+
+def _encode_record(fields):
+    """
+    Serialises a dictionary of stored fields into a record: the field lengths, followed by the utf-8 encoded field values.
+    Values which are not strings are stored as their string representation.
+    """
+    lengths = []
+    values = []
+
+    for field in FIELDS:
+        value = fields.get(field)
+
+        if value is None:
+            lengths.append(NONE_LENGTH)
+            continue
+
+        if not isinstance(value, str):
+            value = str(value)
+
+        value = value.encode('utf-8')
+        lengths.append(len(value))
+        values.append(value)
+
+    return FIELD_LENGTHS.pack(*lengths) + b''.join(values)
+
+
+def _decode_record(buffer, offset):
+    """
+    The inverse of _encode_record(); returns a dictionary of stored fields for the record starting at offset.
+    """
+    lengths = FIELD_LENGTHS.unpack_from(buffer, offset)
+    position = offset + FIELD_LENGTHS.size
+    fields = {}
+
+    for field, length in zip(FIELDS, lengths):
+        if length == NONE_LENGTH:
+            fields[field] = None
+            continue
+
+        fields[field] = bytes(buffer[position:position + length]).decode('utf-8')
+        position = position + length
+
+    return fields
+
+
+def _hash_capacity(slots):
+    """
+    Returns the size of the docno hash table for the given number of documents (a power of two, at most half full).
+    """
+    capacity = 1
+
+    while capacity < slots * 2:
+        capacity = capacity * 2
+
+    return capacity
+
+
+class DocumentStoreWriter(object):
+    """
+    Builds a document store file. Add documents with add(), keyed by the index's internal ID, then call close().
+    With compression ('zlib' or 'zstd'), block_size consecutive documents are compressed together.
+    """
+    def __init__(self, filename, compression=None, block_size=16):
+        if compression not in COMPRESSION_CODES:
+            raise DocumentStoreError("Unknown compression type: {0}".format(compression))
+
+        self._filename = filename
+        self._compression = COMPRESSION_CODES[compression]
+        self._compress, _ = _get_codec(self._compression)
+        self._block_size = block_size if self._compression != COMPRESSION_NONE else 1
+
+        self._file = open(filename, 'wb')
+        self._file.write(b'\0' * HEADER.size)
+
+        self._entries = {}   # internal id -> (block offset, block length, record offset)
+        self._docnos = {}    # internal id -> docno
+        self._pending = []   # (internal id, record) pairs for the block under construction
+
+    def add(self, internal_id, title=None, content=None, docid=None, date=None, source=None):
+        """
+        Adds the stored fields for the document with the given internal ID.
+        """
+        internal_id = int(internal_id)
+        record = _encode_record({'title': title, 'content': content, 'docid': docid, 'date': date, 'source': source})
+
+        if docid is not None:
+            self._docnos[internal_id] = str(docid).strip()
+
+        self._pending.append((internal_id, record))
+
+        if len(self._pending) >= self._block_size:
+            self._flush_block()
+
+    def _flush_block(self):
+        """
+        Writes the pending records to the file as a single block.
+        """
+        if not self._pending:
+            return
+
+        block = bytearray()
+        offsets = []
+
+        for internal_id, record in self._pending:
+            offsets.append((internal_id, len(block)))
+            block.extend(record)
+
+        if self._compress is not None:
+            block = self._compress(bytes(block))
+
+        block_offset = self._file.tell()
+        self._file.write(block)
+
+        for internal_id, record_offset in offsets:
+            self._entries[internal_id] = (block_offset, len(block), record_offset)
+
+        self._pending = []
+
+    def close(self):
+        """
+        Writes the lookup tables and header, and closes the file.
+        """
+        self._flush_block()
+        slots = (max(self._entries) + 1) if self._entries else 0
+
+        doc_table_offset = self._file.tell()
+
+        for internal_id in range(slots):
+            self._file.write(DOC_ENTRY.pack(*self._entries.get(internal_id, (0, 0, 0))))
+
+        docno_blob = bytearray()
+        docno_entries = []
+
+        for internal_id in range(slots):
+            docno = self._docnos.get(internal_id, '').encode('utf-8')
+            docno_entries.append(DOCNO_ENTRY.pack(len(docno_blob), len(docno)))
+            docno_blob.extend(docno)
+
+        docno_table_offset = self._file.tell()
+        self._file.write(b''.join(docno_entries))
+
+        docno_blob_offset = self._file.tell()
+        self._file.write(docno_blob)
+
+        capacity = _hash_capacity(slots)
+        table = array('I', bytes(4 * capacity))
+        mask = capacity - 1
+
+        for internal_id, docno in self._docnos.items():
+            position = zlib.crc32(docno.encode('utf-8')) & mask
+
+            while table[position]:
+                position = (position + 1) & mask
+
+            table[position] = internal_id + 1
+
+        if sys.byteorder != 'little':
+            table.byteswap()
+
+        hash_table_offset = self._file.tell()
+        self._file.write(table.tobytes())
+
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, self._compression, self._block_size, slots,
+                                     doc_table_offset, docno_table_offset, docno_blob_offset, hash_table_offset, capacity))
+        self._file.close()
+
+        log.info("Document store written to {0}: {1} documents".format(self._filename, len(self._entries)))
+
+
+class DocumentStore(object):
+    """
+    Read-only access to a document store file, through a memory map.
+    As the file is mapped rather than read, all processes using the same store share a single copy in the page cache.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self._compression, self._block_size, self._slots, self._doc_table,
+         self._docno_table, self._docno_blob, self._hash_table, self._hash_capacity) = HEADER.unpack_from(self._map, 0)
+
+        if magic != MAGIC or version != VERSION:
+            raise DocumentStoreError("{0} is not a document store (or was built by an incompatible version).".format(filename))
+
+        _, self._decompress = _get_codec(self._compression)
+        self._last_block = (None, None)  # The most recently decompressed block (offset, data).
+
+    def __deepcopy__(self, memo):
+        """
+        The store is read-only, so it is shared (not copied) when a simulated user is snapshotted or forked.
+        """
+        return self
+
+    def __len__(self):
+        return self._slots
+
+    def __contains__(self, internal_id):
+        return self._get_entry(internal_id) is not None
+
+    def _get_entry(self, internal_id):
+        """
+        Returns the (block offset, block length, record offset) triple for the given internal ID, or None if no such document exists.
+        """
+        internal_id = int(internal_id)
+
+        if internal_id < 0 or internal_id >= self._slots:
+            return None
+
+        entry = DOC_ENTRY.unpack_from(self._map, self._doc_table + internal_id * DOC_ENTRY.size)
+
+        if entry[1] == 0:
+            return None
+
+        return entry
+
+    def get_docno(self, internal_id):
+        """
+        Returns the docno (collection ID) for the given internal ID.
+        """
+        offset, length = DOCNO_ENTRY.unpack_from(self._map, self._docno_table + int(internal_id) * DOCNO_ENTRY.size)
+        start = self._docno_blob + offset
+        return self._map[start:start + length].decode('utf-8')
+
+    def get_internal_id(self, docno):
+        """
+        Returns the internal ID for the given docno, or None if the docno is not present in the store.
+        """
+        key = str(docno).strip().encode('utf-8')
+        mask = self._hash_capacity - 1
+        position = zlib.crc32(key) & mask
+
+        while True:
+            (value,) = struct.unpack_from('<I', self._map, self._hash_table + position * 4)
+
+            if value == 0:
+                return None
+
+            offset, length = DOCNO_ENTRY.unpack_from(self._map, self._docno_table + (value - 1) * DOCNO_ENTRY.size)
+            start = self._docno_blob + offset
+
+            if self._map[start:start + length] == key:
+                return value - 1
+
+            position = (position + 1) & mask
+
+    def get_fields(self, internal_id):
+        """
+        Returns a dictionary of the stored fields (title, content, docid, date, source) for the given internal ID.
+        Returns None if no such document exists.
+        """
+        entry = self._get_entry(internal_id)
+
+        if entry is None:
+            return None
+
+        block_offset, block_length, record_offset = entry
+
+        if self._decompress is None:
+            return _decode_record(self._map, block_offset + record_offset)
+
+        cached_offset, block = self._last_block
+
+        if cached_offset != block_offset:
+            block = self._decompress(self._map[block_offset:block_offset + block_length])
+            self._last_block = (block_offset, block)
+
+        return _decode_record(block, record_offset)
+
+    def get_document(self, internal_id):
+        """
+        Returns a Document object for the given internal ID (e.g. a Whoosh document number), or None if it does not exist.
+        """
+        fields = self.get_fields(internal_id)
+
+        if fields is None:
+            return None
+
+        document = Document(id=internal_id, title=fields['title'], content=fields['content'])
+        document.date = fields['date']
+        document.doc_id = fields['docid']
+        document.source = fields['source']
+
+        return document
+
+    def get_document_by_docno(self, docno):
+        """
+        Returns a Document object for the given docno, or None if it does not exist.
+        The Document's id is the docno, mirroring interfaces that identify documents by docno.
+        """
+        internal_id = self.get_internal_id(docno)
+
+        if internal_id is None:
+            return None
+
+        document = self.get_document(internal_id)
+        document.id = docno
+        return document
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def build_from_whoosh(whoosh_index_dir, filename, compression=None, block_size=16):
+    """
+    Exports the stored fields of a Whoosh index to a document store. Internal IDs are Whoosh document numbers.
+    """
+    from whoosh.index import open_dir
+
+    index = open_dir(whoosh_index_dir)
+    writer = DocumentStoreWriter(filename, compression=compression, block_size=block_size)
+
+    with index.reader() as reader:
+        for docnum, fields in reader.iter_docs():
+            writer.add(docnum,
+                       title=fields.get('title'),
+                       content=fields.get('content'),
+                       docid=fields.get('docid'),
+                       date=fields.get('timedate'),
+                       source=fields.get('source'))
+
+    writer.close()
+
+
+def build_from_terrier(index_ref, filename, compression=None, block_size=16, text_field='text', title_field='title'):
+    """
+    Exports the meta index of a (Py)Terrier index to a document store. Internal IDs are Terrier document IDs.
+    """
+    import pyterrier as pt
+    if not pt.started():
+        pt.init()
+
+    index = pt.IndexFactory.of(index_ref) if isinstance(index_ref, str) else index_ref
+    meta = index.getMetaIndex()
+    keys = set(meta.getKeys())
+    writer = DocumentStoreWriter(filename, compression=compression, block_size=block_size)
+
+    for docid in range(index.getCollectionStatistics().getNumberOfDocuments()):
+        writer.add(docid,
+                   title=meta.getItem(title_field, docid) if title_field in keys else "NA",
+                   content=meta.getItem(text_field, docid),
+                   docid=meta.getItem('docno', docid),
+                   source=meta.getItem('source', docid) if 'source' in keys else None)
+
+    writer.close()
+
+
+def usage(script_name):
+    """
+    Prints the usage message to the output stream.
+    """
+    print("Usage: {0} [whoosh|terrier] [index_dir] [store_filename] [none|zlib|zstd]".format(script_name))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 4 or len(sys.argv) > 5 or sys.argv[1] not in ('whoosh', 'terrier'):
+        usage(sys.argv[0])
+    else:
+        compression = sys.argv[4] if len(sys.argv) > 4 else None
+        builders = {'whoosh': build_from_whoosh, 'terrier': build_from_terrier}
+        builders[sys.argv[1]](sys.argv[2], sys.argv[3], compression=compression)
@@ -0,0 +1,415 @@
+#
+# Memory-mapped forward index.
+# Stores the tokenised title and content of every document in a collection (as term IDs over a shared vocabulary),
+# so that components judging documents can look their terms up by docno rather than re-parsing the HTML each time.
+# Terms are those produced by simiir.utils.tidy.clean_html(), as used by the language model and LLM classifiers.
+#
+# Build a forward index (from the repository root):
+#   python -m simiir.search.forward_index whoosh <whoosh_index_dir> <index_filename>
+#   python -m simiir.search.forward_index store <document_store_filename> <index_filename>
+#
+# File layout (all integers little-endian):
+#   header      - magic, version, document count, vocabulary size, and section offsets.
+#   term table  - per term ID: offset (Q) into the term blob; a final entry marks the end of the blob.
+#   term blob   - the utf-8 encoded terms, sorted (by their encoding), so that term IDs follow the same order.
+#   doc table   - per document, sorted by docno: docno offset (Q) and length (I) into the docno blob, then for each field
+#                 the offset (Q) and count (I) of its term IDs, and the length (I) and crc32 (I) of the text it was built from.
+#   docno blob  - the utf-8 encoded docnos.
+#   term IDs    - the term IDs (I) of every field of every document.
+#
+
+import os
+import sys
+import mmap
+import zlib
+import struct
+import logging
+import threading
+from array import array
+from simiir.utils.tidy import clean_html
+
+log = logging.getLogger('simuser.search.forward_index')
+
+MAGIC = b'SIMFWDX1'
+VERSION = 1
+
+FIELDS = ('title', 'content')
+
+HEADER = struct.Struct('<8sIIIIQQQQQ')  # magic, version, documents, vocabulary size, padding, term table, term blob, doc table, docno blob, term IDs
+TERM_ENTRY = struct.Struct('<Q')
+FIELD_ENTRY = '<QIII'
+DOC_ENTRY = struct.Struct('<QI' + FIELD_ENTRY[1:] * len(FIELDS))
+
+MISSING_COUNT = 0xFFFFFFFF  # The term count recorded for a field with no text (None).
+
+
+class ForwardIndexError(Exception):
+    """
+    Raised when a forward index cannot be built or read.
+    """
+    pass
+
+
+def analyse(text):
+    """
+    Returns the list of terms stored for the given text - that is, clean_html(text).
+    """
+    return clean_html(text)
+
+
+def _checksum(text):
+    """
+    Returns the (length, crc32) pair identifying the text a field was built from.
+    """
+    return len(text), zlib.crc32(text.encode('utf-8', errors='surrogatepass'))
+
+
+class ForwardIndexWriter(object):
+    """
+    Builds a forward index file. Add documents with add(), keyed by docno, then call close().
+    Term IDs are only final once every document has been seen (the vocabulary is sorted), so the term IDs of the
+    documents added are held in memory (four bytes per term) until the index is written.
+    """
+    def __init__(self, filename):
+        self._filename = filename
+        self._term_ids = {}  # term -> provisional ID, in order of first occurrence
+        self._ids = array('I')
+        self._documents = {}  # docno -> [(start, count, text length, crc32) for each field]
+
+    def add(self, docno, title=None, content=None):
+        """
+        Adds the title and content of the document with the given docno. A document added twice replaces the first.
+        """
+        docno = str(docno).strip()
+        entries = []
+
+        for text in (title, content):
+            if text is None:
+                entries.append((0, MISSING_COUNT, 0, 0))
+                continue
+
+            if not isinstance(text, str):
+                text = text.decode('utf-8')
+
+            start = len(self._ids)
+
+            for term in analyse(text):
+                term_id = self._term_ids.get(term)
+
+                if term_id is None:
+                    term_id = len(self._term_ids)
+                    self._term_ids[term] = term_id
+
+                self._ids.append(term_id)
+
+            entries.append((start, len(self._ids) - start) + _checksum(text))
+
+        self._documents[docno] = entries
+
+    def close(self):
+        """
+        Assigns the final term IDs, writes the index, and closes it.
+        """
+        terms = sorted(self._term_ids, key=lambda term: term.encode('utf-8', errors='surrogatepass'))
+        remap = array('I', bytes(4 * len(terms)))
+
+        for term_id, term in enumerate(terms):
+            remap[self._term_ids[term]] = term_id
+
+        with open(self._filename, 'wb') as f:
+            f.write(b'\0' * HEADER.size)
+
+            term_table_offset = f.tell()
+            term_blob = bytearray()
+            entries = []
+
+            for term in terms:
+                entries.append(TERM_ENTRY.pack(len(term_blob)))
+                term_blob.extend(term.encode('utf-8', errors='surrogatepass'))
+
+            entries.append(TERM_ENTRY.pack(len(term_blob)))
+            f.write(b''.join(entries))
+
+            term_blob_offset = f.tell()
+            f.write(term_blob)
+
+            docnos = sorted(self._documents, key=lambda docno: docno.encode('utf-8'))
+            docno_blob = bytearray()
+            ids = array('I')
+            entries = []
+
+            for docno in docnos:
+                values = [len(docno_blob), len(docno.encode('utf-8'))]
+                docno_blob.extend(docno.encode('utf-8'))
+
+                for start, count, length, crc in self._documents[docno]:
+                    if count == MISSING_COUNT:
+                        values.extend((0, MISSING_COUNT, 0, 0))
+                        continue
+
+                    values.extend((len(ids), count, length, crc))
+                    ids.extend(remap[term_id] for term_id in self._ids[start:start + count])
+
+                entries.append(DOC_ENTRY.pack(*values))
+
+            doc_table_offset = f.tell()
+            f.write(b''.join(entries))
+
+            docno_blob_offset = f.tell()
+            f.write(docno_blob)
+            f.write(b'\0' * (-f.tell() % 8))  # Aligns the term IDs, so that they can be viewed in place.
+
+            if sys.byteorder != 'little':
+                ids.byteswap()
+
+            term_ids_offset = f.tell()
+            f.write(ids.tobytes())
+
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, len(docnos), len(terms), 0,
+                                term_table_offset, term_blob_offset, doc_table_offset, docno_blob_offset, term_ids_offset))
+
+        log.info("Forward index written to {0}: {1} documents, {2} terms".format(self._filename, len(docnos), len(terms)))
+
+
+class ForwardIndex(object):
+    """
+    Read-only access to a forward index file, through a memory map.
+    As the file is mapped rather than read, all processes using the same index share a single copy in the page cache.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self._documents, self._vocabulary_size, _, self._term_table, self._term_blob,
+         self._doc_table, self._docno_blob, term_ids_offset) = HEADER.unpack_from(self._map, 0)
+
+        if magic != MAGIC or version != VERSION:
+            raise ForwardIndexError("{0} is not a forward index (or was built by an incompatible version).".format(filename))
+
+        if sys.byteorder == 'little':
+            self._ids = memoryview(self._map)[term_ids_offset:].cast('I')
+        else:
+            self._ids = array('I', self._map[term_ids_offset:])
+            self._ids.byteswap()
+
+        self._terms = [None] * self._vocabulary_size  # Terms are decoded as they are first needed.
+
+    def __deepcopy__(self, memo):
+        """
+        The index is read-only, so it is shared (not copied) when a simulated user is snapshotted or forked.
+        """
+        return self
+
+    def __len__(self):
+        return self._documents
+
+    def __contains__(self, docno):
+        return self._find(docno) is not None
+
+    @property
+    def vocabulary_size(self):
+        return self._vocabulary_size
+
+    def _get_docno(self, index):
+        """
+        Returns the utf-8 encoded docno of the document at the given position in the doc table.
+        """
+        offset, length = struct.unpack_from('<QI', self._map, self._doc_table + index * DOC_ENTRY.size)
+        start = self._docno_blob + offset
+        return self._map[start:start + length]
+
+    def _find(self, docno):
+        """
+        Returns the doc table entry for the given docno, or None if the docno is not present in the index.
+        """
+        if docno is None:
+            return None
+
+        key = str(docno).strip().encode('utf-8')
+        low = 0
+        high = self._documents
+
+        while low < high:
+            middle = (low + high) // 2
+
+            if self._get_docno(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < self._documents and self._get_docno(low) == key:
+            return DOC_ENTRY.unpack_from(self._map, self._doc_table + low * DOC_ENTRY.size)
+
+        return None
+
+    def _get_field(self, docno, field):
+        """
+        Returns the (offset, count, text length, crc32) entry for the given field of the given document, or None.
+        """
+        entry = self._find(docno)
+
+        if entry is None:
+            return None
+
+        position = 2 + 4 * FIELDS.index(field)
+        field_entry = entry[position:position + 4]
+
+        if field_entry[1] == MISSING_COUNT:
+            return None
+
+        return field_entry
+
+    def get_term(self, term_id):
+        """
+        Returns the term with the given ID.
+        """
+        term = self._terms[term_id]
+
+        if term is None:
+            start, end = struct.unpack_from('<QQ', self._map, self._term_table + term_id * TERM_ENTRY.size)
+            term = self._map[self._term_blob + start:self._term_blob + end].decode('utf-8', errors='surrogatepass')
+            self._terms[term_id] = term
+
+        return term
+
+    def get_term_id(self, term):
+        """
+        Returns the ID of the given term, or None if the term does not appear in the collection.
+        """
+        key = term.encode('utf-8', errors='surrogatepass')
+        low = 0
+        high = self._vocabulary_size
+
+        while low < high:
+            middle = (low + high) // 2
+            start, end = struct.unpack_from('<QQ', self._map, self._term_table + middle * TERM_ENTRY.size)
+
+            if self._map[self._term_blob + start:self._term_blob + end] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low < self._vocabulary_size and self.get_term(low) == term:
+            return low
+
+        return None
+
+    def get_term_ids(self, docno, field='content', text=None):
+        """
+        Returns the term IDs of the given field ('title' or 'content') of the document with the given docno, as a
+        sequence of integers (viewing the index in place where possible) - or None if the document (or field) is not present.
+        If text is supplied, None is also returned unless the field was built from that text - e.g. when given a
+        snippet, rather than the document itself.
+        """
+        field_entry = self._get_field(docno, field)
+
+        if field_entry is None:
+            return None
+
+        offset, count, length, crc = field_entry
+
+        if text is not None:
+            if not isinstance(text, str):
+                text = text.decode('utf-8')
+
+            if len(text) != length or _checksum(text)[1] != crc:
+                return None
+
+        return self._ids[offset:offset + count]
+
+    def get_terms(self, docno, field='content', text=None):
+        """
+        Returns the list of terms of the given field of the document with the given docno - identical to
+        clean_html() of the field's text. Returns None in the same circumstances as get_term_ids().
+        """
+        term_ids = self.get_term_ids(docno, field, text=text)
+
+        if term_ids is None:
+            return None
+
+        get_term = self.get_term
+        return [get_term(term_id) for term_id in term_ids]
+
+    def close(self):
+        if isinstance(self._ids, memoryview):
+            self._ids.release()
+
+        self._map.close()
+        self._file.close()
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def open_forward_index(filename):
+    """
+    Returns a ForwardIndex for the given file. Each file is only opened once per process; the index is shared.
+    """
+    key = os.path.realpath(filename)
+
+    with _indexes_lock:
+        index = _indexes.get(key)
+
+        if index is None:
+            index = ForwardIndex(filename)
+            _indexes[key] = index
+
+        return index
+
+
+def build_from_document_store(store_filename, filename):
+    """
+    Builds a forward index of the documents in a document store (see simiir.search.document_store).
+    """
+    from simiir.search.document_store import DocumentStore
+
+    store = DocumentStore(store_filename)
+    writer = ForwardIndexWriter(filename)
+
+    for internal_id in range(len(store)):
+        fields = store.get_fields(internal_id)
+
+        if fields is None or fields['docid'] is None:
+            continue
+
+        writer.add(fields['docid'], title=fields['title'], content=fields['content'])
+
+    writer.close()
+    store.close()
+
+
+def build_from_whoosh(whoosh_index_dir, filename):
+    """
+    Builds a forward index of the stored fields of a Whoosh index.
+    """
+    from whoosh.index import open_dir
+
+    index = open_dir(whoosh_index_dir)
+    writer = ForwardIndexWriter(filename)
+
+    with index.reader() as reader:
+        for docnum, fields in reader.iter_docs():
+            if fields.get('docid') is None:
+                continue
+
+            writer.add(fields['docid'], title=fields.get('title'), content=fields.get('content'))
+
+    writer.close()
+
+
+def usage(script_name):
+    """
+    Prints the usage message to the output stream.
+    """
+    print("Usage: {0} [whoosh|store] [index_dir|store_filename] [index_filename]".format(script_name))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4 or sys.argv[1] not in ('whoosh', 'store'):
+        usage(sys.argv[0])
+    else:
+        builders = {'whoosh': build_from_whoosh, 'store': build_from_document_store}
+        builders[sys.argv[1]](sys.argv[2], sys.argv[3])
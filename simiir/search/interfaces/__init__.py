@@ -1,14 +1,20 @@
 import string
+from ifind.search.extensible import Extensible, intern_id
+from ifind.common.background_model import load_background
 
-class Document(object):
+class Document(Extensible):
     """
     Basic representation of a document - including a unique identifier (index ID), a title, document content (body), and an additional identifier (e.g. collection ID).
     Parameters title, content and the additional identifier are optional.
+    Documents are slot-based (one is created for every snippet examined); attributes not listed in __slots__ must be set with set_extension().
     """
+    __slots__ = ('id', 'title', 'content', 'doc_id', 'judgment', 'date', 'source')
+    
     def __init__(self, id, title=None, content=None, doc_id=None):
         """
         Instantiates an instance of the Document.
         """
+        self._extensions = None
         self.id = id
         self.title = title
         self.content = content
@@ -16,7 +22,7 @@ class Document(object):
         self.judgment = -1
         
         if self.doc_id:
-            self.doc_id = doc_id
+            self.doc_id = intern_id(doc_id)
     
     def __str__(self):
         """
@@ -28,6 +34,8 @@ class Topic(Document):
     """
     Extending from Document, provides the ability to read a topic title and description from a given input file.
     """
+    __slots__ = ('qrels_filename', 'background_terms')
+    
     def __init__(self, id, title=None, content=None, doc_id=None, qrels_filename=None, background_filename=None):
         super(Topic, self).__init__(id=id, title=title, content=content, doc_id=doc_id)
         self.qrels_filename = qrels_filename
@@ -41,17 +49,7 @@ class Topic(Document):
         Populates the background_terms attribute.
         Returns a dictionary of <term, value> pairs.
         """
-        f = open(background_filename, 'r')
-        
-        for line in f:
-            line = line.strip().split(',')
-            
-            term = line[0]
-            score = float(line[1])
-            
-            self.background_terms[term] = score
-        
-        f.close()
+        self.background_terms.update(load_background(background_filename, value_type=float).to_dict(value_type=float))
         
     
     def read_topic_from_file(self, topic_filename):
@@ -77,7 +75,7 @@ class Topic(Document):
         """
         Returns a string representing the topic's title and content (description).
         """
-        return '{title} {content}'.format(**self.__dict__)
+        return '{0} {1}'.format(self.title, self.content)
     
     def get_topic_text_nopunctuation(self):
         """
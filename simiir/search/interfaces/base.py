@@ -4,10 +4,57 @@ class BaseSearchInterface(object):
     """
     An abstract implementation of a search interface that the search context will communicate with.
     Inherit from this abstract class to create a custom search interface.
+    
+    default_top is the number of results returned by issue_query() when no top value is given.
+    Interfaces supporting top-k retrieval accept a smaller top value, which the user context uses when a depth hint is available.
     """
+    default_top = 100
+    
     def __init__(self):
         self._last_response = None
         self._last_query = None
+        self._document_store = None
+    
+    def __deepcopy__(self, memo):
+        """
+        Search interfaces (and the indexes behind them) are shared, not copied, when a simulated user is snapshotted or forked.
+        """
+        return self
+    
+    @property
+    def document_store(self):
+        """
+        The (optional) memory-mapped DocumentStore from which documents are retrieved.
+        """
+        return getattr(self, '_document_store', None)
+    
+    @document_store.setter
+    def document_store(self, value):
+        """
+        Sets the document store; value may be a DocumentStore, or the filename of one (e.g. from a configuration attribute).
+        An empty value disables the store.
+        """
+        if isinstance(value, str):
+            from simiir.search.document_store import DocumentStore
+            value = DocumentStore(value) if value else None
+        
+        self._document_store = value
+    
+    def _get_stored_document(self, document_id, by_docno=False):
+        """
+        Returns the Document for document_id from the document store, if one is set and it holds the document.
+        If by_docno is True, document_id is a docno (collection ID); otherwise it is the engine's internal ID.
+        Returns None otherwise, so that the caller can fall back to the engine.
+        """
+        store = self.document_store
+        
+        if store is None:
+            return None
+        
+        if by_docno:
+            return store.get_document_by_docno(document_id)
+        
+        return store.get_document(int(document_id))
     
     @abc.abstractmethod
     def issue_query(self, query):
@@ -66,6 +66,11 @@ class PyTerrierSearchInterface(BaseSearchInterface):
         return response
 
     def get_document(self, document_id):
+        document = self._get_stored_document(document_id, by_docno=True)
+        
+        if document is not None:
+            return document
+        
         return self.__engine.get_document(document_id)
 
 class PyTerrierDenseInterface(PyTerrierSearchInterface):
@@ -0,0 +1,148 @@
+import os
+import queue
+import threading
+from multiprocessing.connection import Client
+from simiir.search.interfaces.base import BaseSearchInterface
+import logging
+
+log = logging.getLogger('simuser.search.interfaces.remote')
+
+
+class RemoteSearchError(Exception):
+    """
+    Raised when the search server fails to answer a request.
+    """
+    pass
+
+
+class ConnectionPool(object):
+    """
+    A small pool of connections to a search server.
+    Connections are created lazily (up to pool_size), and are discarded if the process is forked - each process builds its own pool.
+    """
+    def __init__(self, address, family, authkey=None, pool_size=4):
+        self._address = address
+        self._family = family
+        self._authkey = authkey
+        self._pool_size = pool_size
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def request(self, operation, payload):
+        """
+        Sends a single request over a pooled connection, and returns the server's reply value.
+        """
+        if self._pid != os.getpid():
+            self._reset()  # Never share sockets with a parent process.
+
+        connection = self._acquire()
+
+        try:
+            connection.send((operation, payload))
+            status, value = connection.recv()
+        except (EOFError, OSError):
+            connection.close()
+
+            with self._lock:
+                self._created = self._created - 1
+
+            raise
+
+        self._idle.put(connection)
+
+        if status != 'ok':
+            raise RemoteSearchError(value)
+
+        return value
+
+    def close(self):
+        """
+        Closes all idle connections.
+        """
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+            with self._lock:
+                self._created = self._created - 1
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self._pool_size:
+                self._created = self._created + 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return Client(self._address, family=self._family, authkey=self._authkey)
+            except Exception:
+                with self._lock:
+                    self._created = self._created - 1
+                raise
+
+        return self._idle.get()
+
+
+class RemoteSearchInterface(BaseSearchInterface):
+    """
+    A search interface which forwards queries and document requests to a shared local search server (see search/server.py).
+    Running several simulation processes against one server keeps a single copy of the index (and its caches) in memory.
+
+    Set address to the path of the server's Unix domain socket, or to host:port for a localhost TCP server.
+    """
+    def __init__(self, address=None, authkey=None, pool_size=4):
+        super(RemoteSearchInterface, self).__init__()
+        from simiir.search.server import parse_address
+
+        address, family = parse_address(address)
+
+        if isinstance(authkey, str):
+            authkey = authkey.encode('utf-8')
+
+        log.debug("Remote search interface using server at: {0}".format(address))
+        self._pool = ConnectionPool(address, family, authkey=authkey, pool_size=pool_size)
+
+    def issue_query(self, query, top=100):
+        """
+        Allows one to issue a query to the search server. Takes an ifind Query object.
+        """
+        query.top = top
+        terms = query.terms
+
+        if isinstance(terms, bytes):
+            terms = terms.decode('utf-8')
+
+        topic = getattr(query, 'topic', None)
+        topic_id = topic.id if topic is not None else None
+
+        response = self._pool.request('search', (terms, top, query.skip, topic_id))
+
+        self._last_query = query
+        self._last_response = response
+        return response
+
+    def get_document(self, document_id):
+        """
+        Retrieves a Document object for the given document specified by parameter document_id from the search server.
+        """
+        return self._pool.request('document', document_id)
+
+    def get_server_stats(self):
+        """
+        Returns the dictionary of counters reported by the search server (requests, batches, cache hits...).
+        """
+        return self._pool.request('stats', None)
@@ -16,18 +16,27 @@ class WhooshSearchInterface(BaseSearchInterface):
     Set model = 0 for TFIDIF
     Set model = 1 for BM25 (defaults to b=0.75), set pval to change b.
     Set model = 2 for PL2 (defaults to c=10.), set pval to change c.
+    
+    Set in_memory = True to load the whole index into memory (a Whoosh RamStorage) at startup.
+    The load time and memory footprint are logged; an index loaded before forking is shared by the worker processes.
     """
-    def __init__(self, whoosh_index_dir, model=2, implicit_or=True, pval=None, frag_type=2, frag_size=2, frag_surround=40, host=None, port=0):
+    def __init__(self, whoosh_index_dir, model=2, implicit_or=True, pval=None, frag_type=2, frag_size=2, frag_surround=40, host=None, port=0, in_memory=False):
         super(WhooshSearchInterface, self).__init__()
         log.debug("Whoosh Index to open: {0}".format(whoosh_index_dir))
-        self.__index = open_dir(whoosh_index_dir)
-        self.__reader = self.__index.reader()
         self.__redis_conn = None
         
         if host is None:
-            self._engine = Whooshtrec(whoosh_index_dir=whoosh_index_dir, model=model, implicit_or=implicit_or)
+            self._engine = Whooshtrec(whoosh_index_dir=whoosh_index_dir, model=model, implicit_or=implicit_or, in_memory=in_memory)
+        else:
+            self._engine = Whooshtrec(whoosh_index_dir=whoosh_index_dir, model=model, implicit_or=implicit_or, in_memory=in_memory, cache='engine', host=host, port=port)
+        
+        if in_memory:
+            self.__index = Whooshtrec.docIndex
+            log.info("Whoosh index held in memory: {0} bytes, loaded in {1:.2f} seconds".format(self.__index.memory_size, self.__index.load_time))
         else:
-            self._engine = Whooshtrec(whoosh_index_dir=whoosh_index_dir, model=model, implicit_or=implicit_or, cache='engine', host=host, port=port)
+            self.__index = open_dir(whoosh_index_dir)
+        
+        self.__reader = self.__index.reader()
         
         # Update (2017-05-02) for snippet fragment tweaking.
         # SIGIR Study (2017) uses frag_type==1 (2 doesn't give sensible results), surround==40, snippet_sizes==2,0,1,4
@@ -51,7 +60,14 @@ class WhooshSearchInterface(BaseSearchInterface):
     def get_document(self, document_id):
         """
         Retrieves a Document object for the given document specified by parameter document_id.
+        If a document store has been set, the document is read from there instead of the Whoosh reader.
         """
+        document = self._get_stored_document(document_id)
+        
+        if document is not None:
+            document.id = document_id
+            return document
+        
         fields = self.__reader.stored_fields(int(document_id))
         
         title = fields['title']
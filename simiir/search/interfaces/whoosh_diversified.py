@@ -8,12 +8,12 @@
 
 import copy
 from simiir.search.interfaces.whoosh import WhooshSearchInterface
-from ifind.seeker.trec_diversity_qrel_handler import EntityQrelHandler
+from ifind.seeker.trec_diversity_qrel_handler import EntityQrelHandler, count_bits
 
 class WhooshDiversifiedInterface(WhooshSearchInterface):
     
-    def __init__(self, whoosh_index_dir, qrels_diversity_file, to_rank=30, lam=1.0, model=2, implicit_or=True, pval=None, frag_type=2, frag_size=2, frag_surround=40, host=None, port=0):
-        super(WhooshDiversifiedInterface, self).__init__(whoosh_index_dir, model, implicit_or, pval, frag_type, frag_size, frag_surround, host, port)
+    def __init__(self, whoosh_index_dir, qrels_diversity_file, to_rank=30, lam=1.0, model=2, implicit_or=True, pval=None, frag_type=2, frag_size=2, frag_surround=40, host=None, port=0, in_memory=False):
+        super(WhooshDiversifiedInterface, self).__init__(whoosh_index_dir, model, implicit_or, pval, frag_type, frag_size, frag_surround, host, port, in_memory)
         self._diversity_qrels = EntityQrelHandler(qrels_diversity_file)
         self._to_rank = to_rank
         self._lam = lam
@@ -24,8 +24,9 @@ class WhooshDiversifiedInterface(WhooshSearchInterface):
         Also applies diversification to the results before returning them.
         Doesn't cache the diversified results; a limitation of the ifind caching library means that
         a diversified/non-diversified set of results cannot be cached.
+        At least to_rank results are always retrieved, so that the diversified ranking does not depend on top.
         """
-        query.top = top
+        query.top = max(top, self._to_rank)
         response = self._engine.search(query)
         
         # Diversify the results.
@@ -95,17 +96,13 @@ class WhooshDiversifiedInterface(WhooshSearchInterface):
         """
         Given a list of Whoosh Hit objects, returns a list of the different entities that are mentioned in them.
         """
-        observed_entities = []
+        observed_mask = 0
     
-        for hit in rankings_list:
-            docid = hit.docid
-        
-            entities = self._diversity_qrels.get_mentioned_entities_for_doc(topic, docid)
-            new_entities = WhooshDiversifiedInterface.get_new_entities(observed_entities, entities)
-        
-            observed_entities = observed_entities + new_entities
+        for mask in self._diversity_qrels.get_entity_masks(topic, [hit.docid for hit in rankings_list]):
+            observed_mask = observed_mask | mask
     
-        return observed_entities
+        entity_ids = self._diversity_qrels.get_entity_ids(topic)
+        return [entity_ids[bit] for bit in range(observed_mask.bit_length()) if observed_mask & (1 << bit)]
 
 
     def diversify_results(self, results, topic, to_rank=30, lam=1.0):
@@ -138,30 +135,30 @@ class WhooshDiversifiedInterface(WhooshSearchInterface):
         ############################
         ### Main algorithm below ###
         ############################
-        observed_entities = []  # What entities have been previously seen? This list holds them.
+        observed_mask = 0  # What entities have been previously seen? This bitmask holds them (see EntityQrelHandler).
     
         # As the list of results is probably larger than the depth we re-rank to, take a slice.
         # This is our original list of results that we'll be modifiying and popping from.
+        # Each result is paired with the bitmask of the entities it mentions, so that it can be looked up once.
         old_rankings = results.results[:to_rank]
+        old_rankings = list(zip(old_rankings, self._diversity_qrels.get_entity_masks(topic, [hit.docid for hit in old_rankings])))
     
         # For our new rankings, start with the first document -- this won't change.
         # This list will be populated as we iterate through the other rankings list.
-        new_rankings = [old_rankings.pop(0)]
+        first, first_mask = old_rankings.pop(0)
+        new_rankings = [first]
+        observed_mask = observed_mask | first_mask
     
         for i in range(1, to_rank):
-            observed_entities = self.get_observed_entities_for_list(topic, new_rankings)
-        
-            for j in range(0, len(old_rankings)):
-                docid = old_rankings[j].docid
-                entities = self._diversity_qrels.get_mentioned_entities_for_doc(topic, docid)
-                new_entities = WhooshDiversifiedInterface.get_new_entities(observed_entities, entities)
-                #seen_entities = get_existing_entities(self._diversity_qrels, observed_entities, entities)
-            
-                old_rankings[j].score = old_rankings[j].score + (lam * len(new_entities))
+            for hit, mask in old_rankings:
+                new_entity_count = count_bits(mask & ~observed_mask)
+                hit.score = hit.score + (lam * new_entity_count)
             
             # Sort the list in reverse order, so the highest score is first. Then pop from old, push to new.
-            old_rankings.sort(key=lambda x: x.score, reverse=True)
-            new_rankings.append(old_rankings.pop(0))
+            old_rankings.sort(key=lambda x: x[0].score, reverse=True)
+            hit, mask = old_rankings.pop(0)
+            new_rankings.append(hit)
+            observed_mask = observed_mask | mask
     
         results.results = new_rankings + results.results[to_rank:]
         return results
\ No newline at end of file
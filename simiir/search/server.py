@@ -0,0 +1,410 @@
+#
+# Local search server.
+# Hosts a single search interface (and therefore a single index) for all simulation workers on a machine.
+# Workers connect through the RemoteSearchInterface (search/interfaces/remote.py).
+#
+# Usage (from the simiir directory, as with run_simiir.py, with the repository root on the PYTHONPATH):
+#   python -m simiir.search.server <simulation_config_file> [address] [searchers]
+#   address is either a filesystem path (Unix domain socket) or host:port (localhost TCP).
+#
+
+import os
+import sys
+import time
+import queue
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from multiprocessing.connection import Listener
+from ifind.search.query import Query
+from simiir.search.interfaces import Topic
+
+log = logging.getLogger('simuser.search.server')
+
+DEFAULT_ADDRESS = os.path.join(tempfile.gettempdir(), 'simiir-search.sock')
+
+
+def parse_address(address):
+    """
+    Given an address string, returns a (address, family) tuple suitable for multiprocessing.connection.
+    Strings of the form host:port are treated as TCP addresses; anything else is a Unix domain socket path.
+    """
+    if address is None:
+        address = DEFAULT_ADDRESS
+
+    if isinstance(address, tuple):
+        return address, 'AF_INET'
+
+    if os.sep not in address and ':' in address:
+        host, port = address.rsplit(':', 1)
+        return (host, int(port)), 'AF_INET'
+
+    return address, 'AF_UNIX'
+
+
+class LRUCache(object):
+    """
+    A thread-safe, size-bounded least recently used cache.
+    Keeps simple hit/miss counters so the effectiveness of the cache can be reported.
+    """
+    def __init__(self, size=10000):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key, record=True):
+        """
+        Returns the value stored for key, or None if no such value exists.
+        If record is False, the lookup is not counted as a hit or miss.
+        """
+        with self.__lock:
+            if key in self.__entries:
+                self.__entries.move_to_end(key)
+
+                if record:
+                    self.hits = self.hits + 1
+
+                return self.__entries[key]
+
+            if record:
+                self.misses = self.misses + 1
+
+            return None
+
+    def put(self, key, value):
+        """
+        Stores the value for the given key, evicting the least recently used entry if the cache is full.
+        """
+        if self.size <= 0:
+            return
+
+        with self.__lock:
+            self.__entries[key] = value
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.size:
+                self.__entries.popitem(last=False)
+
+    def get_counts(self, prefix):
+        """
+        Returns a dictionary of the hit and miss counters, named <prefix>_hits and <prefix>_misses.
+        """
+        with self.__lock:
+            return {'{0}_hits'.format(prefix): self.hits, '{0}_misses'.format(prefix): self.misses}
+
+    def __len__(self):
+        return len(self.__entries)
+
+
+class _PendingRequest(object):
+    """
+    A request waiting to be answered by one of the searchers in the pool.
+    """
+    def __init__(self, operation, key):
+        self.operation = operation
+        self.key = key
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class SearchServer(object):
+    """
+    Serves search requests for many simulation processes from a single search interface.
+
+    The server holds one index - a single instance of the configured search interface, created by interface_factory when the
+    server starts - with a result cache and document cache shared between every connected client.
+    Concurrent requests are batched - a searcher drains up to batch_size waiting requests (waiting at most batch_wait seconds),
+    and identical requests within a batch are answered by a single search.
+
+    The searchers in the pool share the one search interface. Search interfaces are not thread-safe (they keep the last query and
+    response, and neither Whoosh nor PyTerrier searchers are documented as safe to share), so calls into the interface are made
+    one at a time; additional searchers overlap the batching, caching and replying around each search, not the searches themselves.
+    """
+    def __init__(self, interface_factory, address=None, authkey=None, searchers=1, batch_size=32, batch_wait=0.002, cache_size=10000, document_cache_size=50000):
+        self._interface_factory = interface_factory
+        self._address, self._family = parse_address(address)
+        self._authkey = authkey.encode('utf-8') if isinstance(authkey, str) else authkey
+        self._searchers = max(1, int(searchers))
+        self._batch_size = max(1, int(batch_size))
+        self._batch_wait = batch_wait
+
+        self.result_cache = LRUCache(cache_size)
+        self.document_cache = LRUCache(document_cache_size)
+
+        self._requests = queue.Queue()
+        self._listener = None
+        self._running = False
+        self._threads = []
+        self._search_interface = None
+        self._search_lock = threading.Lock()  # Serialises calls into the shared search interface.
+        self._stats_lock = threading.Lock()
+
+        self.requests_received = 0
+        self.batches_processed = 0
+        self.requests_deduplicated = 0
+
+    def start(self):
+        """
+        Creates the search interface and the searcher pool, and starts listening for connections.
+        Returns immediately; use serve_forever() to block.
+        """
+        if self._family == 'AF_UNIX' and os.path.exists(self._address):
+            os.unlink(self._address)  # A stale socket from a previous run.
+
+        if self._search_interface is None:
+            self._search_interface = self._interface_factory()
+
+        self._listener = Listener(self._address, family=self._family, authkey=self._authkey)
+        self._running = True
+
+        for i in range(self._searchers):
+            thread = threading.Thread(target=self._searcher_loop, name='searcher-{0}'.format(i), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        thread = threading.Thread(target=self._accept_loop, name='acceptor', daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+        log.info("Search server listening on {0} with {1} searcher(s)".format(self._address, self._searchers))
+
+    def serve_forever(self):
+        """
+        Starts the server (if required), and blocks until interrupted.
+        """
+        if not self._running:
+            self.start()
+
+        try:
+            while self._running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        """
+        Stops accepting connections, and releases the listening socket.
+        """
+        if not self._running:
+            return
+
+        self._running = False
+
+        for _ in range(self._searchers):
+            self._requests.put(None)  # Wake up each searcher so that it can exit.
+
+        self._listener.close()
+        log.info("Search server stopped: {0}".format(self.get_stats()))
+
+    def get_stats(self):
+        """
+        Returns a dictionary of counters describing the work done by the server so far.
+        """
+        with self._stats_lock:
+            stats = {'requests': self.requests_received,
+                     'batches': self.batches_processed,
+                     'deduplicated': self.requests_deduplicated}
+
+        stats.update(self.result_cache.get_counts('result_cache'))
+        stats.update(self.document_cache.get_counts('document_cache'))
+        return stats
+
+    def submit(self, operation, key):
+        """
+        Queues a request for the searcher pool, and blocks until it has been answered.
+        operation is either 'search' (key is a (terms, top, skip, topic_id) tuple) or 'document' (key is the document ID).
+        """
+        cache = self.result_cache if operation == 'search' else self.document_cache
+        cached = cache.get(key)
+
+        if cached is not None:
+            return cached
+
+        request = _PendingRequest(operation, key)
+        self._requests.put(request)
+        request.done.wait()
+
+        if request.error is not None:
+            raise request.error
+
+        return request.result
+
+    def _accept_loop(self):
+        """
+        Accepts incoming client connections, handing each off to its own thread.
+        """
+        while self._running:
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError):
+                if self._running:
+                    log.exception("Failed to accept a connection")
+                continue
+
+            thread = threading.Thread(target=self._connection_loop, args=(connection,), daemon=True)
+            thread.start()
+
+    def _connection_loop(self, connection):
+        """
+        Reads requests from a single client connection, and replies to each in turn.
+        Each message is an (operation, payload) tuple; each reply is a ('ok', value) or ('error', message) tuple.
+        """
+        with connection:
+            while self._running:
+                try:
+                    operation, payload = connection.recv()
+                except (EOFError, OSError):
+                    break
+
+                with self._stats_lock:
+                    self.requests_received = self.requests_received + 1
+
+                try:
+                    if operation == 'stats':
+                        reply = ('ok', self.get_stats())
+                    elif operation in ('search', 'document'):
+                        reply = ('ok', self.submit(operation, payload))
+                    else:
+                        reply = ('error', "Unknown operation '{0}'".format(operation))
+                except Exception as e:
+                    reply = ('error', "{0}: {1}".format(type(e).__name__, e))
+
+                try:
+                    connection.send(reply)
+                except (EOFError, OSError):
+                    break
+
+    def _next_batch(self):
+        """
+        Blocks until at least one request is available, then drains the queue up to the batch size, waiting no longer than batch_wait.
+        Returns None when the server is stopping.
+        """
+        first = self._requests.get()
+
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self._batch_wait
+
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+
+            try:
+                request = self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait()
+            except queue.Empty:
+                break
+
+            if request is None:
+                self._requests.put(None)  # Let the outer loop see the stop signal.
+                break
+
+            batch.append(request)
+
+        return batch
+
+    def _searcher_loop(self):
+        """
+        The body of a searcher thread. Answers batches of requests using the shared search interface.
+        """
+        while True:
+            batch = self._next_batch()
+
+            if batch is None:
+                break
+
+            grouped = OrderedDict()
+
+            for request in batch:
+                grouped.setdefault((request.operation, request.key), []).append(request)
+
+            with self._stats_lock:
+                self.batches_processed = self.batches_processed + 1
+                self.requests_deduplicated = self.requests_deduplicated + len(batch) - len(grouped)
+
+            for (operation, key), requests in grouped.items():
+                result = None
+                error = None
+
+                try:
+                    result = self._execute(operation, key)
+                except Exception as e:
+                    log.exception("Search server failed to answer {0} request for {1}".format(operation, key))
+                    error = e
+
+                for request in requests:
+                    request.result = result
+                    request.error = error
+                    request.done.set()
+
+    def _execute(self, operation, key):
+        """
+        Answers a single (deduplicated) request, consulting and populating the shared caches.
+        The caches are checked again once the search interface is free, as another searcher may have just answered the same request.
+        """
+        with self._search_lock:
+            if operation == 'search':
+                cached = self.result_cache.get(key, record=False)
+
+                if cached is None:
+                    terms, top, skip, topic_id = key
+                    query = Query(terms)
+                    query.skip = skip
+
+                    if topic_id is not None:
+                        query.topic = Topic(topic_id)
+
+                    cached = self._search_interface.issue_query(query, top=top)
+                    self.result_cache.put(key, cached)
+
+                return cached
+
+            cached = self.document_cache.get(key, record=False)
+
+            if cached is None:
+                cached = self._search_interface.get_document(key)
+                self.document_cache.put(key, cached)
+
+            return cached
+
+
+def main(config_filename, address=None, searchers=1):
+    """
+    Starts a search server for the search interface specified in the given simulation configuration file.
+    """
+    from simiir.utils.config_readers.simulation_config_reader import SimulationConfigReader
+    from simiir.utils.config_readers.component_generators.base_generator import BaseComponentGenerator
+
+    logging.basicConfig(filename='search_server.log', level=logging.INFO)
+    config_reader = SimulationConfigReader(config_filename)
+    interface_config = config_reader.get_search_interface_config()
+    generator = BaseComponentGenerator(interface_config)
+
+    def interface_factory():
+        return generator._get_object_reference(config_details=interface_config, package='search.interfaces')
+
+    server = SearchServer(interface_factory, address=address, searchers=searchers)
+    print("Search server listening on {0}".format(server._address))
+    server.serve_forever()
+
+
+def usage(script_name):
+    """
+    Prints the usage message to the output stream.
+    """
+    print("Usage: {0} [configuration_filename] [address] [searchers]".format(script_name))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or len(sys.argv) > 4:
+        usage(sys.argv[0])
+    else:
+        main(sys.argv[1],
+             address=sys.argv[2] if len(sys.argv) > 2 else None,
+             searchers=int(sys.argv[3]) if len(sys.argv) > 3 else 1)
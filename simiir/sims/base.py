@@ -1,7 +1,10 @@
 import os
+import copy
 import pickle
+import random
 from user.loggers import Actions
 from ifind.search.query import Query
+from utils.snapshot import Snapshot
 import abc
 
 class SimulatedBaseUser(object):
@@ -9,6 +12,7 @@ class SimulatedBaseUser(object):
     The simulated user. Stores references to all the required components, and contains the logical workflow for the simulation.
     """
     def __init__(self, configuration):
+        self._configuration = configuration
         self._user_context = configuration.user.user_context
         self._output_controller = configuration.output
         self._logger = configuration.user.logger
@@ -58,6 +62,49 @@ class SimulatedBaseUser(object):
         last_action = self._user_context.get_last_action()
         self.last_to_next_action_mapping[last_action]()
     
+    def is_finished(self):
+        """
+        Returns True iif the simulated search session has ended (as determined by the logger).
+        """
+        return self._logger.is_finished()
+    
+    def get_configuration(self):
+        """
+        Returns the simulation configuration (component generator) for this user.
+        After restore(), or for a user returned by fork(), this refers to the copied components; use it (not the original) for output.
+        """
+        return self._configuration
+    
+    def snapshot(self):
+        """
+        Returns a Snapshot of the current state of the simulation - the user context, logger, output and every other component
+        (including random number generators and updated language models), along with the global random state.
+        Read-only resources such as the search interface and qrels are shared rather than copied.
+        """
+        return Snapshot(self.__get_state())
+    
+    def restore(self, snapshot):
+        """
+        Returns the simulation to the state saved in the given Snapshot. A snapshot can be restored any number of times.
+        """
+        self.__dict__.update(snapshot.get_state())
+        random.setstate(snapshot.random_state)
+    
+    def fork(self):
+        """
+        Returns an independent copy of this simulated user, with its own copy of every component.
+        The copy can be run (and modified, e.g. with a different stopping strategy) without affecting this user;
+        the global random state is shared between the two.
+        """
+        return copy.deepcopy(self)
+    
+    def __get_state(self):
+        """
+        Returns the instance variables making up the state of the user. The action mappings are excluded, as they are bound to this instance.
+        """
+        return dict((name, value) for name, value in self.__dict__.items()
+                    if name not in ('last_to_next_action_mapping', 'action_mapping'))
+    
     def _do_action(self, action):
         # Update the search context to reflect the most recent action.
         # Logging takes place within each method called (e.g. __do_query()) to reflect different values being passed.
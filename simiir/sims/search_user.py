@@ -17,6 +17,8 @@ class SimulatedUser(SimulatedBaseUser):
         self._snippet_classifier = configuration.user.snippet_classifier
         self._document_classifier = configuration.user.document_classifier
         self._result_stopping_decision_maker = configuration.user.decision_maker
+        
+        self.__set_depth_hint_providers()
         """
         The workflow implemented below is as follows. Steps with asterisks are DECISION POINTS.
         
@@ -35,6 +37,22 @@ class SimulatedUser(SimulatedBaseUser):
         """
        
     
+    def __set_depth_hint_providers(self):
+        """
+        Allows the user context to retrieve only as many results as the user could examine.
+        """
+        self._user_context.set_depth_hint_providers(limiters=[self._result_stopping_decision_maker, self._logger],
+                                                    requirements=[self._serp_impression])
+    
+    def set_decision_maker(self, decision_maker):
+        """
+        Replaces the result stopping decision maker, e.g. for a user returned by fork().
+        The decision maker should be constructed with this user's context and logger (see get_configuration()).
+        """
+        self._result_stopping_decision_maker = decision_maker
+        self._configuration.user.decision_maker = decision_maker
+        self.__set_depth_hint_providers()
+    
     def _do_query(self):
         """
         Called when the simulated user wishes to issue another query.
@@ -51,6 +69,7 @@ class SimulatedUser(SimulatedBaseUser):
             self._user_context.add_issued_query(query_text)  # Can also supply page number and page lengths here.
             self._logger.log_action(Actions.QUERY, query=query_text)
             self._output_controller.log_query(query_text)
+            self._prefetch_next_query()
             
             return True
         
@@ -59,6 +78,19 @@ class SimulatedUser(SimulatedBaseUser):
         self._logger.queries_exhausted()
         return False
     
+    def _prefetch_next_query(self):
+        """
+        If the user context supports prefetching, predicts the next query (the first unissued candidate from the query generator),
+        and asks the user context to issue it in the background while the current SERP is examined.
+        """
+        if not getattr(self._user_context, 'prefetch_queries', False):
+            return
+        
+        predicted_query_text = self._query_generator.get_next_query(self._user_context)
+        
+        if predicted_query_text:
+            self._user_context.prefetch_query(predicted_query_text)
+    
     def _do_serp(self):
         """
         Called when the simulated user wishes to examine a SERP - the "initial glance" - after issuing a query.
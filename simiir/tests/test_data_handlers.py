@@ -0,0 +1,45 @@
+from simiir.utils.data_handlers import get_data_handler, get_qrels_cache_dir, set_qrels_cache_dir, FileDataHandler, CachedDataHandler
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+import sys
+
+
+class TestDataHandlers(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestDataHandlers")
+        self.directory = tempfile.mkdtemp()
+        self.qrels_cache_dir = get_qrels_cache_dir()
+        self.filename = os.path.join(self.directory, 'qrels.txt')
+
+        with open(self.filename, 'w') as f:
+            f.write('401 0 DOC-1 1\n401 0 DOC-2 0\n0 0 DOC-3 2\n')
+
+    def tearDown(self):
+        set_qrels_cache_dir(self.qrels_cache_dir)
+        shutil.rmtree(self.directory)
+
+    def test_default(self):
+        self.logger.debug("Test qrels files are read directly, without a cache on disk, unless a cache directory is set")
+        set_qrels_cache_dir(None)
+        handler = get_data_handler(filename=self.filename)
+        self.assertEqual(type(handler), FileDataHandler)
+        self.assertEqual([handler.get_value_fallback('401', doc) for doc in ['DOC-1', 'DOC-2', 'DOC-3', 'DOC-4']], [1, 0, 2, 0])
+
+    def test_cache_dir(self):
+        self.logger.debug("Test qrels files are read through the compiled cache in the cache directory set")
+        cache_dir = os.path.join(self.directory, 'cache')
+        set_qrels_cache_dir(cache_dir)
+        handler = get_data_handler(filename=self.filename)
+        self.assertEqual(type(handler), CachedDataHandler)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.assertEqual([handler.get_value_fallback('401', doc) for doc in ['DOC-1', 'DOC-2', 'DOC-3', 'DOC-4']], [1, 0, 2, 0])
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestDataHandlers").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
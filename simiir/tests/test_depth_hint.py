@@ -0,0 +1,139 @@
+from simiir.user.contexts.memory import Memory
+from simiir.user.loggers import Actions
+from simiir.user.loggers.base import BaseLogger
+from simiir.user.loggers.fixed_cost import FixedCostLogger
+from simiir.user.result_stopping_decider.base import BaseDecisionMaker
+from simiir.user.result_stopping_decider.fixed_depth import FixedDepthDecisionMaker
+from simiir.search.interfaces import Topic
+from simiir.search.interfaces.base import BaseSearchInterface
+import unittest
+import logging
+import sys
+
+
+class Result(object):
+    def __init__(self, rank):
+        self.whooshid = rank
+        self.title = 'Result {0}'.format(rank)
+        self.summary = self.title
+        self.docid = 'DOC-{0}'.format(rank)
+
+
+class Response(object):
+    def __init__(self, top):
+        self.results = [Result(rank) for rank in range(top)]
+
+
+class RecordingSearchInterface(BaseSearchInterface):
+    """
+    A search interface that records the top value of every query issued to it.
+    """
+    def __init__(self):
+        super(RecordingSearchInterface, self).__init__()
+        self.tops = []
+
+    def issue_query(self, query, top=100):
+        self.tops.append(top)
+        return Response(top)
+
+    def get_document(self, document_id):
+        return None
+
+
+class Limit(object):
+    def __init__(self, depth):
+        self.depth = depth
+
+    def get_max_depth(self):
+        return self.depth
+
+
+class Requirement(object):
+    def __init__(self, depth):
+        self.depth = depth
+
+    def get_required_depth(self):
+        return self.depth
+
+
+class TestDepthHint(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestDepthHint")
+        self.interface = RecordingSearchInterface()
+        self.memory = Memory(self.interface, None, Topic('401'))
+
+    def test_no_providers(self):
+        self.logger.debug("Test queries retrieve the default number of results when nothing limits the depth")
+        self.assertEqual(self.memory.get_depth_hint(), None)
+        self.memory.add_issued_query('wildlife extinction')
+        self.assertEqual(self.interface.tops, [100])
+
+    def test_smallest_limit(self):
+        self.logger.debug("Test the smallest limit is used, and unbounded limiters are ignored")
+        self.memory.set_depth_hint_providers(limiters=[Limit(None), Limit(40), Limit(12), object()])
+        self.assertEqual(self.memory.get_depth_hint(), 12)
+
+        self.memory.set_depth_hint_providers(limiters=[Limit(None)])
+        self.assertEqual(self.memory.get_depth_hint(), None)
+
+    def test_requirements(self):
+        self.logger.debug("Test the depth is raised to what the SERP impression requires")
+        self.memory.set_depth_hint_providers(limiters=[Limit(4)], requirements=[Requirement(10), Requirement(None), object()])
+        self.assertEqual(self.memory.get_depth_hint(), 10)
+
+        self.memory.set_depth_hint_providers(limiters=[Limit(20)], requirements=[Requirement(10)])
+        self.assertEqual(self.memory.get_depth_hint(), 20)
+
+        self.memory.set_depth_hint_providers(limiters=[], requirements=[Requirement(10)])
+        self.assertEqual(self.memory.get_depth_hint(), None)
+
+    def test_top(self):
+        self.logger.debug("Test the depth hint is passed as top only when it is below the interface's default")
+        self.memory.set_depth_hint_providers(limiters=[Limit(11)])
+        self.memory.add_issued_query('wildlife extinction')
+        self.assertEqual(len(self.memory.get_last_query().response.results), 11)
+
+        self.memory.set_depth_hint_providers(limiters=[Limit(100)])
+        self.memory.add_issued_query('oil spill')
+
+        self.memory.set_depth_hint_providers(limiters=[Limit(500)])
+        self.memory.add_issued_query('court ruling')
+        self.assertEqual(self.interface.tops, [11, 100, 100])
+
+    def test_decision_makers(self):
+        self.logger.debug("Test a fixed depth decision maker needs one result beyond its depth")
+        decision_maker = FixedDepthDecisionMaker(self.memory, None, depth=5)
+        self.assertEqual(decision_maker.get_max_depth(), 6)
+
+        self.memory.set_depth_hint_providers(limiters=[decision_maker])
+        self.memory.add_issued_query('wildlife extinction')
+        self.assertEqual(self.interface.tops, [6])
+
+        for position in range(5):
+            self.assertEqual(decision_maker.decide(), Actions.SNIPPET)
+            self.memory.increment_serp_position()
+
+        self.assertEqual(decision_maker.decide(), Actions.QUERY)
+        self.assertEqual(BaseDecisionMaker.get_max_depth(decision_maker), None)
+
+    def test_loggers(self):
+        self.logger.debug("Test a fixed cost logger limits the depth to the snippets that fit into the remaining time")
+        logger = FixedCostLogger(None, self.memory, time_limit=100, snippet_cost=3)
+        self.assertEqual(logger.get_max_depth(), 35)  # ceil(100 / 3) + 1
+
+        logger._total_time = 91
+        self.assertEqual(logger.get_max_depth(), 4)  # ceil(9 / 3) + 1
+
+        logger._total_time = 120
+        self.assertEqual(logger.get_max_depth(), 1)
+
+        logger = FixedCostLogger(None, self.memory, time_limit=100, snippet_cost=0)
+        self.assertEqual(logger.get_max_depth(), None)
+        self.assertEqual(BaseLogger.get_max_depth(logger), None)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestDepthHint").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
@@ -0,0 +1,112 @@
+from simiir.search.document_store import DocumentStore, DocumentStoreWriter, DocumentStoreError
+from simiir.search.interfaces.base import BaseSearchInterface
+from simiir.search.interfaces.whoosh import WhooshSearchInterface
+import os
+import copy
+import shutil
+import tempfile
+import unittest
+import logging
+import sys
+
+
+class TestDocumentStore(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestDocumentStore")
+        self.directory = tempfile.mkdtemp()
+        self.documents = {}
+
+        for internal_id in range(0, 40, 3):  # Internal IDs with gaps, as left by deleted documents.
+            self.documents[internal_id] = {'title': 'Title {0}'.format(internal_id),
+                                           'content': 'Content of document {0} – caf\xe9'.format(internal_id) * (internal_id + 1),
+                                           'docid': 'DOC-{0:04d}'.format(internal_id),
+                                           'date': '1998-06-{0:02d}'.format(internal_id % 28 + 1) if internal_id % 2 else None,
+                                           'source': 'APW'}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self, compression=None, block_size=16):
+        filename = os.path.join(self.directory, 'documents.{0}.store'.format(compression))
+        writer = DocumentStoreWriter(filename, compression=compression, block_size=block_size)
+
+        for internal_id in sorted(self.documents):
+            writer.add(internal_id, **self.documents[internal_id])
+
+        writer.close()
+        return DocumentStore(filename)
+
+    def test_round_trip(self):
+        self.logger.debug("Test stored fields are read back unchanged")
+        for compression, block_size in [(None, 16), ('zlib', 1), ('zlib', 4)]:
+            store = self.build(compression, block_size)
+            self.assertEqual(len(store), 40)
+
+            for internal_id, fields in self.documents.items():
+                self.assertEqual(store.get_fields(internal_id), fields)
+                self.assertEqual(store.get_docno(internal_id), fields['docid'])
+                self.assertEqual(store.get_internal_id(fields['docid']), internal_id)
+
+                document = store.get_document(internal_id)
+                self.assertEqual((document.id, document.title, document.content, document.doc_id, document.date),
+                                 (internal_id, fields['title'], fields['content'], fields['docid'], fields['date']))
+
+                document = store.get_document_by_docno(fields['docid'])
+                self.assertEqual((document.id, document.content), (fields['docid'], fields['content']))
+
+            store.close()
+
+    def test_missing(self):
+        self.logger.debug("Test missing documents are not found")
+        store = self.build()
+        self.assertTrue(3 in store)
+        self.assertFalse(4 in store)
+        self.assertEqual(store.get_document(4), None)
+        self.assertEqual(store.get_document(-1), None)
+        self.assertEqual(store.get_document(1000), None)
+        self.assertEqual(store.get_internal_id('DOC-9999'), None)
+        self.assertEqual(store.get_document_by_docno('DOC-9999'), None)
+        store.close()
+
+    def test_invalid(self):
+        self.logger.debug("Test files that are not document stores are rejected")
+        filename = os.path.join(self.directory, 'invalid.store')
+
+        with open(filename, 'wb') as f:
+            f.write(b'\0' * 1024)
+
+        self.assertRaises(DocumentStoreError, DocumentStore, filename)
+        self.assertRaises(DocumentStoreError, DocumentStoreWriter, filename, compression='lzma')
+
+    def test_shared(self):
+        self.logger.debug("Test a store is shared, not copied")
+        store = self.build()
+        self.assertIs(copy.deepcopy(store), store)
+        store.close()
+
+    def test_store_first(self):
+        self.logger.debug("Test search interfaces read documents from the store first")
+        store = self.build()
+
+        interface = WhooshSearchInterface.__new__(WhooshSearchInterface)  # No index; every document must come from the store.
+        BaseSearchInterface.__init__(interface)
+        interface.document_store = store
+        document = interface.get_document('6')
+        self.assertEqual((document.id, document.doc_id, document.content), ('6', 'DOC-0006', self.documents[6]['content']))
+
+        self.assertEqual(interface._get_stored_document('DOC-0009', by_docno=True).title, 'Title 9')
+        self.assertEqual(interface._get_stored_document('4'), None)
+        interface.document_store = ''
+        self.assertEqual(interface._get_stored_document('6'), None)
+
+        interface.document_store = store.filename
+        self.assertEqual(interface.document_store.get_docno(6), 'DOC-0006')
+        interface.document_store.close()
+        store.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestDocumentStore").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
@@ -0,0 +1,39 @@
+from ifind.search.extensible import intern_id
+from simiir.search.interfaces import Document, Topic
+import copy
+import pickle
+import unittest
+import logging
+import sys
+
+
+class TestDocuments(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestDocuments")
+
+    def test_document(self):
+        self.logger.debug("Test documents are slot-based, with extensions for anything else")
+        document = Document('7', 'Crows', 'Rearing crows', ''.join(['AP880212', '-0001']))
+        self.assertFalse(hasattr(document, '__dict__'))
+        self.assertIs(document.doc_id, intern_id('AP880212-0001'))
+        self.assertEqual(document.judgment, -1)
+        self.assertRaises(AttributeError, setattr, document, 'rank', 1)
+
+        document.set_extension('rank', 1)
+        self.assertEqual(document.rank, 1)
+        self.assertEqual(copy.deepcopy(document).get_fields(), document.get_fields())
+
+    def test_topic(self):
+        self.logger.debug("Test topics extend the fields of a document")
+        topic = Topic('401', title='Foreign minorities', content='Germany')
+        self.assertFalse(hasattr(topic, '__dict__'))
+        self.assertEqual(Topic.get_field_names(), Document.get_field_names() + ('qrels_filename', 'background_terms'))
+        self.assertEqual((topic.qrels_filename, topic.background_terms), (None, {}))
+        self.assertEqual(pickle.loads(pickle.dumps(topic)).get_fields(), topic.get_fields())
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestDocuments").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
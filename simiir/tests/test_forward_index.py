@@ -0,0 +1,121 @@
+from simiir.search.forward_index import ForwardIndex, ForwardIndexWriter, ForwardIndexError, open_forward_index, build_from_document_store
+from simiir.search.document_store import DocumentStoreWriter
+from simiir.user.result_classifiers.base import BaseTextClassifier
+from simiir.search.interfaces import Document, Topic
+from simiir.utils.tidy import clean_html
+import os
+import copy
+import shutil
+import tempfile
+import unittest
+import logging
+import sys
+
+
+class TermClassifier(BaseTextClassifier):
+    """
+    Judges documents whose title mentions 'relevant' as relevant.
+    """
+    def is_relevant(self, document):
+        return 'relevant' in self._get_terms(document, 'title')
+
+
+class TestForwardIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestForwardIndex")
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'documents.fwd')
+        self.documents = {}
+
+        for i in range(0, 40, 3):
+            self.documents['DOC-{0:04d}'.format(i)] = {
+                'title': 'A <b>Relevant</b> Title {0}'.format(i) if i % 2 else 'Title {0} &amp; caf\xe9'.format(i),
+                'content': '<p>Content of  document {0} – caf\xe9.</p>\n<br/>Rooks &lt;and&gt; crows, '.format(i) * (i + 1)}
+
+        self.documents['DOC-EMPTY'] = {'title': '', 'content': None}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self):
+        writer = ForwardIndexWriter(self.filename)
+        writer.add('DOC-0000', title='Replaced', content='Replaced')  # A document added twice replaces the first.
+
+        for docno, fields in self.documents.items():
+            writer.add(docno, **fields)
+
+        writer.close()
+        return ForwardIndex(self.filename)
+
+    def test_round_trip(self):
+        self.logger.debug("Test the terms read back are those of clean_html()")
+        index = self.build()
+        self.assertEqual(len(index), len(self.documents))
+
+        for docno, fields in self.documents.items():
+            self.assertIn(docno, index)
+
+            for field, text in fields.items():
+                if text is None:
+                    continue
+
+                self.assertEqual(index.get_terms(docno, field), clean_html(text), (docno, field))
+                self.assertEqual(index.get_terms(docno, field, text=text), clean_html(text), (docno, field))
+                self.assertEqual(index.get_terms(' {0}\n'.format(docno), field), clean_html(text))
+
+        for term in clean_html(self.documents['DOC-0003']['content']):
+            self.assertEqual(index.get_term(index.get_term_id(term)), term)
+
+        self.assertEqual(index.get_term_id('absent'), None)
+        index.close()
+
+    def test_missing(self):
+        self.logger.debug("Test a missing docno or field, or a field built from other text, gives None")
+        index = self.build()
+        text = self.documents['DOC-0003']['content']
+
+        self.assertNotIn('DOC-9999', index)
+        self.assertEqual(index.get_terms('DOC-9999'), None)
+        self.assertEqual(index.get_terms(None), None)
+        self.assertEqual(index.get_terms('DOC-EMPTY', 'content'), None)
+        self.assertEqual(index.get_terms('DOC-EMPTY', 'title'), [''])
+
+        self.assertEqual(index.get_terms('DOC-0003', 'content', text=text[:-1] + 'X'), None)  # Same length, different text.
+        self.assertEqual(index.get_terms('DOC-0003', 'content', text=text[:50]), None)  # A snippet of the text.
+        self.assertEqual(index.get_term_ids('DOC-0003', 'content', text=text.encode('utf-8')), index.get_term_ids('DOC-0003', 'content'))
+        index.close()
+
+    def test_document_store(self):
+        self.logger.debug("Test a forward index built from a document store holds its documents")
+        store_filename = os.path.join(self.directory, 'documents.store')
+        writer = DocumentStoreWriter(store_filename)
+
+        for internal_id, (docno, fields) in enumerate(sorted(self.documents.items())):
+            writer.add(internal_id, docid=docno, **fields)
+
+        writer.close()
+        build_from_document_store(store_filename, self.filename)
+        index = open_forward_index(self.filename)
+        self.assertIs(open_forward_index(self.filename), index)
+        self.assertEqual(index.get_terms('DOC-0006', 'title'), clean_html(self.documents['DOC-0006']['title']))
+
+        self.assertRaises(ForwardIndexError, ForwardIndex, store_filename)
+
+    def test_deepcopy(self):
+        self.logger.debug("Test a classifier using a forward index can be deep-copied, sharing the index")
+        index = self.build()
+        classifier = TermClassifier(Topic('401'), None)
+        classifier.forward_index = index
+        copied = copy.deepcopy(classifier)
+
+        self.assertIs(copy.deepcopy(index), index)
+        self.assertIs(copied.forward_index, index)
+        self.assertTrue(copied.is_relevant(Document('DOC-0003', **dict(self.documents['DOC-0003'], doc_id='DOC-0003'))))
+        self.assertFalse(copied.is_relevant(Document('DOC-0006', **dict(self.documents['DOC-0006'], doc_id='DOC-0006'))))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestForwardIndex").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
@@ -0,0 +1,196 @@
+from simiir.utils.judgment_cache import JudgmentStore, get_judgment_cache, make_key, make_key_prefix
+from simiir.utils.data_handlers import get_qrels_cache_dir, set_qrels_cache_dir
+from simiir.user.result_classifiers.base import BaseTextClassifier
+from simiir.user.result_classifiers.perfect import PerfectTrecTextClassifier
+from simiir.user.result_classifiers.informed_trec import InformedTrecTextClassifier
+from simiir.search.interfaces import Document, Topic
+import os
+import copy
+import shutil
+import tempfile
+import unittest
+import logging
+import sys
+
+
+class CountingClassifier(BaseTextClassifier):
+    """
+    Judges documents whose content contains the word 'relevant' as relevant, counting the judgments it makes.
+    """
+    cacheable = True
+    judgment_state = BaseTextClassifier.judgment_state + ('judgments',)
+
+    def __init__(self, topic, user_context, threshold=1):
+        super(CountingClassifier, self).__init__(topic, user_context)
+        self.threshold = threshold
+        self.judgments = 0
+
+    def is_relevant(self, document):
+        self.judgments = self.judgments + 1
+        self.doc_score = float(document.content.count('relevant'))
+        return self.doc_score >= self.threshold
+
+
+class InheritingClassifier(CountingClassifier):
+    """
+    Judges documents as its parent does, through an overridden is_relevant().
+    """
+    def is_relevant(self, document):
+        return super(InheritingClassifier, self).is_relevant(document)
+
+
+class TestJudgmentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestJudgmentCache")
+        self.directory = tempfile.mkdtemp()
+        self.qrels_cache_dir = get_qrels_cache_dir()
+        set_qrels_cache_dir(os.path.join(self.directory, 'qrels'))
+        get_judgment_cache().clear()
+        self.topic = Topic('401')
+        self.relevant = Document('DOC-1', title='Title', content='a relevant document', doc_id='DOC-1')
+        self.non_relevant = Document('DOC-2', title='Title', content='another document', doc_id='DOC-2')
+
+    def tearDown(self):
+        get_judgment_cache().clear()
+        set_qrels_cache_dir(self.qrels_cache_dir)
+        shutil.rmtree(self.directory)
+
+    def write_file(self, filename, text):
+        filename = os.path.join(self.directory, filename)
+
+        with open(filename, 'w') as f:
+            f.write(text)
+
+        return filename
+
+    def test_round_trip(self):
+        self.logger.debug("Test judgments are made once, and restored with their scores")
+        classifier = CountingClassifier(self.topic, None)
+        self.assertTrue(classifier.is_relevant(self.relevant))
+        classifier.doc_score = 0.0
+        self.assertTrue(classifier.is_relevant(self.relevant))
+        self.assertEqual(classifier.doc_score, 1.0)
+        self.assertEqual(classifier.judgments, 1)
+        self.assertFalse(classifier.is_relevant(self.non_relevant))
+        self.assertEqual(classifier.judgments, 2)
+        self.assertTrue(CountingClassifier(self.topic, None).is_relevant(self.relevant))
+        self.assertEqual(classifier.judgments, 2)
+
+    def test_state_excluded(self):
+        self.logger.debug("Test judgment state is not part of the key, and parameters are")
+        classifier = CountingClassifier(self.topic, None)
+        key = make_key(classifier, '401', self.relevant, exclude=classifier.judgment_state)
+        classifier.doc_score = 5.0
+        classifier.judgments = 10
+        classifier.cache_judgments = False
+        self.assertEqual(make_key(classifier, '401', self.relevant, exclude=classifier.judgment_state), key)
+        classifier.threshold = 2
+        self.assertNotEqual(make_key(classifier, '401', self.relevant, exclude=classifier.judgment_state), key)
+        self.assertEqual(make_key(classifier, '401', self.relevant, prefix=make_key_prefix(classifier, exclude=classifier.judgment_state)),
+                         make_key(classifier, '401', self.relevant, exclude=classifier.judgment_state))
+        self.assertNotEqual(make_key(classifier, '402', self.relevant, exclude=classifier.judgment_state), key)
+
+    def test_updating(self):
+        self.logger.debug("Test an updating classifier is not cached")
+        classifier = CountingClassifier(self.topic, None)
+        classifier.updating = True
+        classifier.is_relevant(self.relevant)
+        classifier.is_relevant(self.relevant)
+        self.assertEqual(classifier.judgments, 2)
+        classifier.updating = False
+        classifier.cache_judgments = False
+        classifier.is_relevant(self.relevant)
+        self.assertEqual(classifier.judgments, 3)
+
+    def test_inherited(self):
+        self.logger.debug("Test an overridden is_relevant() is only cached once")
+        store = JudgmentStore(os.path.join(self.directory, 'judgments.db'))
+        classifier = InheritingClassifier(self.topic, None)
+        classifier.judgment_store = store
+        self.assertTrue(classifier.is_relevant(self.relevant))
+        self.assertTrue(classifier.is_relevant(self.relevant))
+        self.assertEqual(classifier.judgments, 1)
+        store.flush()
+        self.assertEqual(store._connection.execute('SELECT COUNT(*) FROM judgments').fetchone()[0], 1)
+        store.close()
+
+    def test_prefix(self):
+        self.logger.debug("Test a classifier's key prefix is kept until one of its parameters is set")
+        classifier = CountingClassifier(self.topic, None)
+        classifier.is_relevant(self.relevant)
+        prefix = classifier._key_prefix
+        classifier.doc_score = 5.0
+        classifier.judgments = 10
+        self.assertIs(classifier._key_prefix, prefix)
+
+        classifier.threshold = 2
+        self.assertFalse(hasattr(classifier, '_key_prefix'))
+        self.assertFalse(classifier.is_relevant(self.relevant))
+        self.assertEqual(classifier.judgments, 11)
+        self.assertNotEqual(classifier._key_prefix, prefix)
+
+    def test_files(self):
+        self.logger.debug("Test judgments are keyed by the contents of the files named by parameters")
+        classifier = CountingClassifier(self.topic, None)
+        classifier.term_file = self.write_file('terms.txt', 'relevant\n')
+        key = make_key(classifier, '401', self.relevant, exclude=classifier.judgment_state)
+        classifier.is_relevant(self.relevant)
+
+        self.write_file('terms.txt', 'other\n')
+        os.utime(classifier.term_file, (0, 0))
+        self.assertNotEqual(make_key(classifier, '401', self.relevant, exclude=classifier.judgment_state), key)
+        classifier.is_relevant(self.relevant)  # The file was read when the classifier was built; its key is unchanged.
+        self.assertEqual(classifier.judgments, 1)
+
+        classifier = CountingClassifier(self.topic, None)
+        classifier.term_file = os.path.join(self.directory, 'terms.txt')
+        classifier.is_relevant(self.relevant)
+        self.assertEqual(classifier.judgments, 1)
+
+    def test_qrels(self):
+        self.logger.debug("Test classifiers that look judgments up in the qrels are not cached")
+        qrels_filename = self.write_file('qrels.txt', '401 0 DOC-1 1\n401 0 DOC-2 0\n')
+
+        for classifier in [PerfectTrecTextClassifier(self.topic, None, qrels_filename), InformedTrecTextClassifier(self.topic, None, qrels_filename)]:
+            self.assertFalse(classifier.is_cacheable())
+            self.assertTrue(classifier.is_relevant(self.relevant))
+            self.assertFalse(classifier.is_relevant(self.non_relevant))
+            self.assertFalse(hasattr(classifier, '_key_prefix'))
+
+    def test_deepcopy(self):
+        self.logger.debug("Test a classifier with a store can be deep-copied, sharing the store")
+        store = JudgmentStore(os.path.join(self.directory, 'judgments.db'))
+        classifier = CountingClassifier(self.topic, None)
+        classifier.judgment_store = store
+        self.assertTrue(classifier.is_relevant(self.relevant))
+
+        copied = copy.deepcopy(classifier)
+        self.assertIs(copied.judgment_store, store)
+        self.assertTrue(copied.is_relevant(self.relevant))
+        self.assertEqual(copied.judgments, 1)
+        store.close()
+
+    def test_store_reopened(self):
+        self.logger.debug("Test judgments persist when a store is reopened")
+        filename = os.path.join(self.directory, 'judgments.db')
+        store = JudgmentStore(filename)
+        classifier = CountingClassifier(self.topic, None)
+        classifier.judgment_store = store
+        self.assertTrue(classifier.is_relevant(self.relevant))
+        store.close()
+        get_judgment_cache().clear()
+
+        store = JudgmentStore(filename)
+        classifier = CountingClassifier(self.topic, None)
+        classifier.judgment_store = store
+        self.assertTrue(classifier.is_relevant(self.relevant))
+        self.assertEqual(classifier.doc_score, 1.0)
+        self.assertEqual(classifier.judgments, 0)
+        store.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestJudgmentCache").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
@@ -0,0 +1,86 @@
+from simiir.utils.lm_methods import extract_term_dict_from_text, RelevantTermCounts
+from simiir.search.interfaces import Document
+from random import Random
+import os
+import shutil
+import tempfile
+import unittest
+import logging
+import sys
+
+
+class TestRelevantTermCounts(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestRelevantTermCounts")
+        self.directory = tempfile.mkdtemp()
+        self.stopword_file = os.path.join(self.directory, 'stopwords.txt')
+        self.random = Random(42)
+        self.words = ['wildlife', 'extinction', 'the', 'and', 'of', 'oil', 'spill', 'coastal', 'fisheries', 'court', 'ruling', 'an',
+                      'species', 'decline', 'habitat', 'loss', 'Habitat', 'LOSS,', 'loss.', "habitat's", 'x1', '1988', 'it']
+
+        with open(self.stopword_file, 'w') as f:
+            f.write('the\nand\nof\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_document(self, judgment):
+        document = Document('DOC', ' '.join(self.random.choice(self.words) for _ in range(self.random.randrange(6))),
+                            ' '.join(self.random.choice(self.words) for _ in range(self.random.randrange(30))), 'DOC')
+        document.judgment = judgment
+        return document
+
+    def get_expected_counts(self, items):
+        """
+        The counts over the text of all relevant items joined, as the language model classifiers computed them before updating incrementally.
+        """
+        text = ' '.join('{0} {1}'.format(item.title, item.content) for item in items if item.judgment > 0)
+        return extract_term_dict_from_text(text, self.stopword_file)
+
+    def test_incremental(self):
+        self.logger.debug("Test counts updated as a list grows equal the counts over the joined relevant text")
+        counts = RelevantTermCounts(self.stopword_file)
+        items = []
+        self.assertFalse(counts.update(items))
+
+        for _ in range(60):
+            for _ in range(self.random.randrange(4)):
+                items.append(self.make_document(self.random.choice([-1, 0, 1, 2])))
+
+            previous_relevant_count = counts.get_relevant_count()
+            changed = counts.update(items)
+
+            self.assertEqual(counts.get_counts(), self.get_expected_counts(items))
+            self.assertEqual(counts.get_relevant_count(), len([item for item in items if item.judgment > 0]))
+            self.assertEqual(changed, counts.get_relevant_count() > previous_relevant_count)
+
+        self.assertTrue(counts.get_relevant_count() > 10)
+
+    def test_reset(self):
+        self.logger.debug("Test passing a different list recounts from the start of that list")
+        counts = RelevantTermCounts(self.stopword_file)
+        snippets = [self.make_document(1) for _ in range(5)]
+        documents = [self.make_document(self.random.choice([0, 1])) for _ in range(5)]
+
+        counts.update(snippets)
+        self.assertEqual(counts.get_counts(), self.get_expected_counts(snippets))
+
+        counts.update(documents)
+        self.assertEqual(counts.get_counts(), self.get_expected_counts(documents))
+        self.assertEqual(counts.get_relevant_count(), len([item for item in documents if item.judgment > 0]))
+
+        counts.update(snippets)
+        del snippets[2:]  # A list that has shrunk since it was last counted is also recounted.
+        counts.update(snippets)
+        self.assertEqual(counts.get_counts(), self.get_expected_counts(snippets))
+
+        returned = counts.get_counts()
+        returned['extra'] = 1
+        self.assertNotIn('extra', counts.get_counts())
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestRelevantTermCounts").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
@@ -0,0 +1,113 @@
+from simiir.user.contexts.memory import Memory
+from simiir.user.loggers import Actions
+from simiir.search.interfaces import Topic, Document
+from simiir.search.interfaces.base import BaseSearchInterface
+import time
+import threading
+import unittest
+import logging
+import sys
+
+
+class Result(object):
+    def __init__(self, rank, terms):
+        self.whooshid = rank
+        self.title = 'Result {0} for {1}'.format(rank, terms)
+        self.summary = self.title
+        self.docid = 'DOC-{0}'.format(rank)
+
+
+class Response(object):
+    def __init__(self, terms):
+        self.results = [Result(rank, terms) for rank in range(10)]
+
+
+class SlowSearchInterface(BaseSearchInterface):
+    """
+    A search interface that takes a little while to answer, and records any call made while another is in progress.
+    """
+    def __init__(self, delay=0.05):
+        super(SlowSearchInterface, self).__init__()
+        self.delay = delay
+        self.queries = []
+        self.overlapping_calls = 0
+        self.__busy = threading.Lock()
+
+    def __call(self, function):
+        if not self.__busy.acquire(blocking=False):
+            self.overlapping_calls = self.overlapping_calls + 1
+            self.__busy.acquire()
+
+        try:
+            time.sleep(self.delay)
+            return function()
+        finally:
+            self.__busy.release()
+
+    def issue_query(self, query, top=100):
+        self.queries.append(query.terms)
+        return self.__call(lambda: Response(query.terms.decode('utf-8')))
+
+    def get_document(self, document_id):
+        return self.__call(lambda: Document(document_id, 'Title', 'Content', 'DOC-{0}'.format(document_id)))
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestPrefetch")
+        self.interface = SlowSearchInterface()
+        self.memory = Memory(self.interface, None, Topic('401'))
+        self.memory.prefetch_queries = True
+
+    def test_hit(self):
+        self.logger.debug("Test a prefetched query is used when it is issued")
+        self.memory.prefetch_query('wildlife extinction')
+        self.memory.add_issued_query('wildlife extinction')
+        self.assertEqual(self.interface.queries, [b'wildlife extinction'])
+        self.assertEqual(self.memory.get_last_query().response.results[0].title, 'Result 0 for wildlife extinction')
+        self.assertEqual((self.memory._prefetch_issued, self.memory._prefetch_hits, self.memory._prefetch_wasted), (1, 1, 0))
+        self.assertEqual(self.memory._prefetch_wasted_time, 0.0)
+
+    def test_miss(self):
+        self.logger.debug("Test a prefetched query that is not issued is counted as wasted")
+        self.memory.prefetch_query('wildlife extinction')
+        self.memory.add_issued_query('oil spill')
+        self.assertEqual(self.interface.queries, [b'wildlife extinction', b'oil spill'])
+        self.assertEqual(self.memory.get_last_query().terms, b'oil spill')
+        self.assertEqual((self.memory._prefetch_issued, self.memory._prefetch_hits, self.memory._prefetch_wasted), (1, 0, 1))
+        self.assertTrue(self.memory._prefetch_wasted_time >= self.interface.delay)
+
+        self.memory.prefetch_query('coastal fisheries')
+        self.memory.prefetch_query('coastal fisheries')  # Already outstanding; not issued again.
+        self.memory.prefetch_query('court ruling')  # Replaces the outstanding prefetch, which is wasted.
+        self.memory.add_issued_query('court ruling')
+        self.assertEqual((self.memory._prefetch_issued, self.memory._prefetch_hits, self.memory._prefetch_wasted), (3, 1, 2))
+
+    def test_disabled(self):
+        self.logger.debug("Test nothing is prefetched unless prefetching is switched on")
+        self.memory.prefetch_queries = False
+        self.memory.prefetch_query('wildlife extinction')
+        self.memory.add_issued_query('wildlife extinction')
+        self.assertEqual(self.interface.queries, [b'wildlife extinction'])
+        self.assertEqual(self.memory._prefetch_issued, 0)
+
+    def test_serialised(self):
+        self.logger.debug("Test the search interface is never called from two threads at once")
+        self.memory.add_issued_query('wildlife extinction')
+
+        for _ in range(3):
+            self.memory.prefetch_query('oil spill')
+            self.memory.set_action(Actions.SNIPPET)  # Fetches the snippet's document while the prefetch runs.
+            self.memory.increment_serp_position()
+            self.memory.add_issued_query('oil spill')
+
+        self.assertEqual(self.memory.get_current_document().doc_id, 'DOC-2')
+        self.assertEqual(self.interface.overlapping_calls, 0)
+        self.assertEqual(self.memory._prefetch_hits, 3)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestPrefetch").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
@@ -0,0 +1,208 @@
+from simiir.utils.random_streams import RandomStream, draw
+from simiir.user.loggers import Actions
+from simiir.user.contexts.memory import RunningAggregates
+from simiir.user.result_classifiers.stochastic_informed_trec import StochasticInformedTrecTextClassifier
+from simiir.user.result_stopping_decider.inst import INSTDecisionMaker
+from simiir.user.serp_impressions.stochastic import StochasticSERPImpression
+from simiir.search.interfaces import Document, Topic
+from random import Random
+import os
+import shutil
+import tempfile
+import subprocess
+import unittest
+import logging
+import sys
+
+
+class Result(object):
+    def __init__(self, rank, docid):
+        self.whooshid = docid
+        self.title = 'Result {0}'.format(rank)
+        self.summary = self.title
+        self.docid = docid
+
+
+class UserContext(object):
+    """
+    The parts of a user's memory that the stochastic components read, set directly for each event.
+    """
+    def __init__(self, topic):
+        self.topic = topic
+        self.user_id = None
+        self.action = None
+        self.queries = []
+        self.snippets = []
+        self.results = []
+
+    def get_last_action(self):
+        return self.action
+
+    def get_issued_queries(self):
+        return self.queries
+
+    def get_last_query(self):
+        return self.queries[-1]
+
+    def get_examined_snippets(self):
+        return self.snippets
+
+    def get_all_examined_snippets(self):
+        return self.snippets
+
+    def get_snippet_aggregates(self):
+        aggregates = RunningAggregates()
+
+        for snippet in self.snippets:
+            aggregates.add(snippet)
+
+        return aggregates
+
+    def get_current_results(self):
+        return self.results
+
+    def get_current_results_length(self):
+        return len(self.results)
+
+
+class Query(object):
+    pass
+
+
+class TestRandomStreams(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestRandomStreams")
+        self.directory = tempfile.mkdtemp()
+        self.qrel_file = os.path.join(self.directory, 'qrels.txt')
+        self.random = Random(50)
+        self.topic = Topic('401')
+        self.user_context = UserContext(self.topic)
+        self.docids = ['DOC-{0}'.format(i) for i in range(30)]
+
+        with open(self.qrel_file, 'w') as f:
+            for docid in self.docids[::3]:
+                f.write('401 0 {0} 1\n'.format(docid))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get_outcomes(self, events, decide):
+        """
+        Returns a dictionary of the outcome of each event, deciding the events in a random order.
+        """
+        events = list(events)
+        self.random.shuffle(events)
+        return dict((event, decide(*event)) for event in events)
+
+    def test_draw(self):
+        self.logger.debug("Test draws are the same in every process, and depend upon the seed and every part of the key")
+        keys = [(seed, '401', user, 'INSTDecisionMaker', query, rank) for seed in [0, 42] for user in ['u1', 'u2'] for query in [1, 2] for rank in [1, 2]]
+        draws = [draw(*key) for key in keys]
+        self.assertEqual(len(set(draws)), len(keys))
+        self.assertTrue(all(0.0 <= value < 1.0 for value in draws))
+
+        # String hashes are salted per process; draws are not.
+        self.assertEqual(draw(0, '401', 'user', 'INSTDecisionMaker', 1, 1), 0.6301754297777291)
+        self.assertEqual(draw(42, '401', 'user', 'StochasticInformedTrecTextClassifier', 'SNIPPET', 'DOC-1'), 0.5502768831237363)
+
+        for hash_seed in ['1', '2']:
+            output = subprocess.check_output([sys.executable, '-c', 'from simiir.utils.random_streams import draw; '
+                                              'print([repr(draw(*key)) for key in {0!r}])'.format(keys)],
+                                             env=dict(os.environ, PYTHONHASHSEED=hash_seed),
+                                             cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+            self.assertEqual(output.decode('utf-8').strip(), repr([repr(value) for value in draws]))
+
+    def test_stream(self):
+        self.logger.debug("Test streams draw by topic, user, component and event, whatever order events are drawn in")
+        stream = RandomStream(7, 'Component')
+        events = [(user, query, rank) for user in ['u1', 'u2'] for query in range(5) for rank in range(5)]
+
+        def random(user, query, rank):
+            self.user_context.user_id = user
+            return stream.random(self.user_context, query, rank)
+
+        outcomes = self.get_outcomes(events, random)
+        self.assertEqual(self.get_outcomes(events, random), outcomes)
+        self.assertEqual(outcomes[('u1', 2, 3)], draw(7, '401', 'u1', 'Component', 2, 3))
+        self.assertNotEqual(RandomStream(7, 'Other').random(self.user_context, 2, 3), random('u2', 2, 3))
+        self.assertEqual(stream.choice('abc', self.user_context, 2, 3), 'abc'[int(outcomes[('u2', 2, 3)] * 3)])
+
+    def test_classifier(self):
+        self.logger.debug("Test stochastic judgments depend only upon the seed, topic, user, action and docid")
+        events = [(seed, user, action, docid) for seed in [0, 1] for user in ['u1', 'u2'] for action in [Actions.SNIPPET, Actions.DOC] for docid in self.docids]
+
+        def judge(classifiers):
+            def is_relevant(seed, user, action, docid):
+                self.user_context.user_id = user
+                self.user_context.action = action
+                return classifiers[seed].is_relevant(Document(docid, 'Title', 'Content', docid))
+
+            return is_relevant
+
+        def make_classifiers():
+            return dict((seed, StochasticInformedTrecTextClassifier(self.topic, self.user_context, self.qrel_file, rprob=0.7, nprob=0.4, base_seed=seed))
+                        for seed in [0, 1])
+
+        outcomes = self.get_outcomes(events, judge(make_classifiers()))
+        self.assertEqual(self.get_outcomes(events, judge(make_classifiers())), outcomes)
+
+        for seed, user, action, docid in events:
+            threshold = 0.7 if docid in self.docids[::3] else 0.4
+            dp = draw(seed, '401', user, 'StochasticInformedTrecTextClassifier', action, docid)
+            self.assertEqual(outcomes[(seed, user, action, docid)], dp <= threshold)
+
+        self.assertEqual(len(set(outcomes.values())), 2)
+
+    def test_inst(self):
+        self.logger.debug("Test INST stopping decisions depend only upon the seed, topic, user, query number and rank, given the snippets seen")
+        events = [(seed, user, query, rank) for seed in [0, 1] for user in ['u1', 'u2'] for query in range(1, 6) for rank in range(1, 11)]
+
+        def decide(decision_makers):
+            def make_decision(seed, user, query, rank):
+                self.user_context.user_id = user
+                self.user_context.queries = [Query() for _ in range(query)]
+                self.user_context.snippets = []
+
+                for position in range(rank):
+                    snippet = Document(self.docids[position], 'Title', 'Content', self.docids[position])
+                    snippet.judgment = (query + position) % 2
+                    self.user_context.snippets.append(snippet)
+
+                return decision_makers[seed].decide()
+
+            return make_decision
+
+        def make_decision_makers():
+            return dict((seed, INSTDecisionMaker(self.user_context, None, t=3, base_seed=seed)) for seed in [0, 1])
+
+        outcomes = self.get_outcomes(events, decide(make_decision_makers()))
+        self.assertEqual(self.get_outcomes(events, decide(make_decision_makers())), outcomes)
+        self.assertEqual(set(outcomes.values()), set([Actions.QUERY, Actions.SNIPPET]))
+
+    def test_serp_impression(self):
+        self.logger.debug("Test SERP impressions depend only upon the seed, topic, user and query number, given the SERP")
+        events = [(seed, user, query) for seed in [0, 1] for user in ['u1', 'u2'] for query in range(1, 21)]
+
+        def judge(serp_impressions):
+            def is_serp_attractive(seed, user, query):
+                self.user_context.user_id = user
+                self.user_context.queries = [Query() for _ in range(query)]
+                self.user_context.results = [Result(rank, self.docids[(query * 7 + rank) % len(self.docids)]) for rank in range(10)]
+                return serp_impressions[seed].is_serp_attractive()
+
+            return is_serp_attractive
+
+        def make_serp_impressions():
+            return dict((seed, StochasticSERPImpression(self.user_context, self.qrel_file, good_abandon_probability=0.3,
+                                                        bad_abandon_probability=0.7, base_seed=seed)) for seed in [0, 1])
+
+        outcomes = self.get_outcomes(events, judge(make_serp_impressions()))
+        self.assertEqual(self.get_outcomes(events, judge(make_serp_impressions())), outcomes)
+        self.assertEqual(set(outcomes.values()), set([True, False]))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestRandomStreams").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
@@ -0,0 +1,242 @@
+from simiir.user.contexts.memory import Memory, RunningAggregates
+from simiir.user.loggers import Actions
+from simiir.user.result_stopping_decider.satisfaction import SatisfactionDecisionMaker
+from simiir.user.result_stopping_decider.total_nonrelevant import TotalNonrelDecisionMaker
+from simiir.user.result_stopping_decider.total_nonrelevant_skip import TotalNonrelDecisionMakerSkip
+from simiir.user.result_stopping_decider.sequential_nonrelevant import SequentialNonrelDecisionMaker
+from simiir.user.result_stopping_decider.sequential_nonrelevant_skip import SequentialNonrelDecisionMakerSkip
+from simiir.user.result_stopping_decider.limited_satisfaction import LimitedSatisfactionDecisionMaker
+from simiir.user.result_stopping_decider.ift_based import IftBasedDecisionMaker
+from simiir.search.interfaces import Topic, Document
+from simiir.search.interfaces.base import BaseSearchInterface
+from random import Random
+import unittest
+import logging
+import sys
+
+
+class Result(object):
+    def __init__(self, rank, docid):
+        self.whooshid = docid
+        self.title = 'Result {0}'.format(rank)
+        self.summary = self.title
+        self.docid = docid
+
+
+class Response(object):
+    def __init__(self, docids):
+        self.results = [Result(rank, docid) for rank, docid in enumerate(docids)]
+
+
+class RandomSearchInterface(BaseSearchInterface):
+    """
+    A search interface returning SERPs drawn from a small pool of documents, so that documents recur within and across queries.
+    """
+    def __init__(self, random, pool_size=15, serp_size=20):
+        super(RandomSearchInterface, self).__init__()
+        self.random = random
+        self.pool_size = pool_size
+        self.serp_size = serp_size
+
+    def issue_query(self, query, top=100):
+        return Response(['DOC-{0}'.format(self.random.randrange(self.pool_size)) for _ in range(self.serp_size)])
+
+    def get_document(self, document_id):
+        return Document(document_id, 'Title', 'Content', document_id)
+
+
+def get_previous_judgment(previously_seen, item):
+    """
+    The judgment of the first item in previously_seen with the same doc_id as the given item, or -1.
+    """
+    for previous_item in previously_seen:
+        if previous_item.doc_id == item.doc_id:
+            return previous_item.judgment
+
+    return -1
+
+
+def scan(items, serp_order, discount=0.5):
+    """
+    Computes the statistics kept by RunningAggregates by scanning the list of examined items, as the decision makers used to.
+    """
+    stats = {'count': len(items), 'relevant': 0, 'nonrelevant': 0, 'gain': 0, 'seen_before': 0,
+             'max_nonrelevant_run': 0, 'new_nonrelevant': 0, 'max_new_nonrelevant_run': 0, 'last_relevant_rank': 0}
+    run = 0
+    new_run = 0
+    discounted_gain = 0.0
+    previous = []
+
+    for position, item in enumerate(items, 1):
+        if item.doc_id in [previous_item.doc_id for previous_item in previous]:
+            stats['seen_before'] = stats['seen_before'] + 1
+
+        if item.judgment > 0:
+            stats['relevant'] = stats['relevant'] + 1
+            stats['gain'] = stats['gain'] + item.judgment
+
+            for rank, result in enumerate(serp_order, 1):
+                if result.docid == item.doc_id:
+                    stats['last_relevant_rank'] = rank
+
+        if item.judgment == 0:
+            stats['nonrelevant'] = stats['nonrelevant'] + 1
+            run = run + 1
+
+            if get_previous_judgment(previous, item) != 0:
+                stats['new_nonrelevant'] = stats['new_nonrelevant'] + 1
+                new_run = new_run + 1
+        else:
+            run = 0
+            new_run = 0
+
+        stats['max_nonrelevant_run'] = max(stats['max_nonrelevant_run'], run)
+        stats['max_new_nonrelevant_run'] = max(stats['max_new_nonrelevant_run'], new_run)
+
+        j = float(item.judgment)
+        if j < 0:
+            j = 0
+        discounted_gain += (j)*(1.0/(float(position)**discount))
+
+        previous.append(item)
+
+    stats['discounted_gain'] = discounted_gain
+    return stats
+
+
+def get_statistics(aggregates, discount=0.5):
+    """
+    Returns the statistics held by the given RunningAggregates object, in the form returned by scan().
+    """
+    stats = dict((name, getattr(aggregates, name)) for name in ['count', 'relevant', 'nonrelevant', 'gain', 'seen_before', 'max_nonrelevant_run',
+                                                                'new_nonrelevant', 'max_new_nonrelevant_run', 'last_relevant_rank'])
+    stats['discounted_gain'] = aggregates.get_discounted_gain(discount)
+    return stats
+
+
+def decide_by_scan(name, memory, threshold, serp_size=4, nonrelevant_threshold=3):
+    """
+    The decision the given (list-scanning) decision maker would have made, before the running aggregates were introduced.
+    """
+    snippets = memory.get_examined_snippets()
+    stats = scan(snippets, memory.get_current_results())
+
+    if name == 'satisfaction':
+        return Actions.QUERY if stats['relevant'] >= threshold else Actions.SNIPPET
+    if name == 'total':
+        return Actions.QUERY if stats['nonrelevant'] >= threshold else Actions.SNIPPET
+    if name == 'total_skip':
+        return Actions.QUERY if stats['new_nonrelevant'] >= threshold else Actions.SNIPPET
+    if name == 'sequential':
+        return Actions.QUERY if stats['max_nonrelevant_run'] >= threshold else Actions.SNIPPET
+    if name == 'sequential_skip':
+        return Actions.QUERY if stats['max_new_nonrelevant_run'] >= threshold else Actions.SNIPPET
+    if name == 'limited':
+        satisfaction_decision = decide_by_scan('satisfaction', memory, threshold)
+        documents = scan(memory.get_examined_documents(), memory.get_current_results())
+        serp_position = memory.get_current_serp_position()
+
+        if serp_position < serp_size:
+            return satisfaction_decision
+        if serp_position == serp_size and documents['relevant'] == 0:
+            return Actions.QUERY
+        elif serp_position - documents['last_relevant_rank'] == nonrelevant_threshold:
+            return Actions.QUERY
+
+        return satisfaction_decision
+    if name == 'ift':
+        if memory.get_current_serp_position() < 1:
+            return Actions.SNIPPET
+
+        total_time = 15.0 + (20.0*float(stats['count']))
+        return Actions.SNIPPET if stats['discounted_gain'] / total_time >= threshold else Actions.QUERY
+
+
+class TestRunningAggregates(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestRunningAggregates")
+        self.random = Random(1234)
+        self.memory = Memory(RandomSearchInterface(self.random), None, Topic('401'))
+
+    def get_decision_makers(self):
+        decision_makers = []
+
+        for threshold in [1, 2, 3]:
+            decision_makers.append(('satisfaction', threshold, SatisfactionDecisionMaker(self.memory, None, relevant_threshold=threshold)))
+            decision_makers.append(('total', threshold, TotalNonrelDecisionMaker(self.memory, None, nonrelevant_threshold=threshold)))
+            decision_makers.append(('total_skip', threshold, TotalNonrelDecisionMakerSkip(self.memory, None, nonrelevant_threshold=threshold)))
+            decision_makers.append(('sequential', threshold, SequentialNonrelDecisionMaker(self.memory, None, nonrelevant_threshold=threshold)))
+            decision_makers.append(('sequential_skip', threshold, SequentialNonrelDecisionMakerSkip(self.memory, None, nonrelevant_threshold=threshold)))
+            decision_makers.append(('limited', threshold, LimitedSatisfactionDecisionMaker(self.memory, None, relevant_threshold=threshold,
+                                                                                            serp_size=4, nonrelevant_threshold=3)))
+
+        for gain_threshold in [0.005, 0.015, 0.03]:
+            decision_makers.append(('ift', gain_threshold, IftBasedDecisionMaker(self.memory, None, gain_threshold=gain_threshold)))
+
+        return decision_makers
+
+    def examine(self):
+        """
+        Examines the next snippet (and sometimes its document), judging each at random as the simulated user would.
+        Judgments are set after the action is recorded, and grades above 1 and unjudged (-1) items are included.
+        """
+        self.memory.set_action(Actions.SNIPPET)
+        self.memory.get_current_snippet().judgment = self.random.choice([-1, 0, 0, 1, 2])
+        self.memory.increment_serp_position()
+
+        if self.random.random() < 0.4:
+            self.memory.set_action(Actions.DOC)
+            self.memory.get_current_document().judgment = self.random.choice([0, 1, 2])
+
+    def test_session(self):
+        self.logger.debug("Test the running aggregates and decisions match scans over the examined lists throughout a session")
+        decision_makers = self.get_decision_makers()
+        decisions = 0
+
+        for query in range(30):
+            self.memory.add_issued_query('query {0}'.format(query))
+            self.memory.set_action(Actions.QUERY)
+
+            for _ in range(self.random.randrange(1, 16)):
+                self.examine()
+                serp_order = self.memory.get_current_results()
+
+                self.assertEqual(get_statistics(self.memory.get_snippet_aggregates()), scan(self.memory.get_examined_snippets(), serp_order))
+                self.assertEqual(get_statistics(self.memory.get_document_aggregates()), scan(self.memory.get_examined_documents(), serp_order))
+
+                for name, threshold, decision_maker in decision_makers:
+                    self.assertEqual(decision_maker.decide(), decide_by_scan(name, self.memory, threshold), (name, threshold))
+                    decisions = decisions + 1
+
+            session_snippets = get_statistics(self.memory.get_snippet_aggregates(session=True), discount=1.0)
+            session_documents = get_statistics(self.memory.get_document_aggregates(session=True), discount=1.0)
+            del session_snippets['last_relevant_rank'], session_documents['last_relevant_rank']  # Not tracked over a session.
+
+            expected_snippets = scan(self.memory.get_all_examined_snippets(), [], discount=1.0)
+            expected_documents = scan(self.memory.get_all_examined_documents(), [], discount=1.0)
+            del expected_snippets['last_relevant_rank'], expected_documents['last_relevant_rank']
+
+            self.assertEqual(session_snippets, expected_snippets)
+            self.assertEqual(session_documents, expected_documents)
+
+        self.assertEqual(decisions, len(decision_makers) * len(self.memory.get_all_examined_snippets()))
+
+    def test_first_judgments(self):
+        self.logger.debug("Test the first judgment for each doc_id is remembered")
+        aggregates = RunningAggregates()
+
+        for doc_id, judgment in [('A', 0), ('B', 1), ('A', 1), ('C', -1), ('B', 0)]:
+            document = Document(doc_id, 'Title', 'Content', doc_id)
+            document.judgment = judgment
+            aggregates.add(document)
+
+        self.assertEqual([aggregates.get_first_judgment(doc_id) for doc_id in 'ABCD'], [0, 1, -1, -1])
+        self.assertEqual([aggregates.was_seen(doc_id) for doc_id in 'ABCD'], [True, True, True, False])
+        self.assertEqual((aggregates.count, aggregates.seen_before, aggregates.new_nonrelevant, aggregates.nonrelevant), (5, 2, 2, 2))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestRunningAggregates").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
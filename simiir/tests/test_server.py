@@ -0,0 +1,121 @@
+from simiir.search.server import SearchServer, LRUCache, parse_address
+from simiir.search.interfaces.remote import RemoteSearchInterface, RemoteSearchError
+from simiir.search.interfaces.base import BaseSearchInterface
+from ifind.search.query import Query
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import logging
+import sys
+
+
+class CountingSearchInterface(BaseSearchInterface):
+    """
+    A search interface answering every query with its terms and top value, counting the calls made to it.
+    """
+    created = 0
+
+    def __init__(self):
+        super(CountingSearchInterface, self).__init__()
+        CountingSearchInterface.created = CountingSearchInterface.created + 1
+        self.queries = 0
+        self.documents = 0
+        self.lock = threading.Lock()
+
+    def issue_query(self, query, top=100):
+        if not self.lock.acquire(blocking=False):
+            raise RuntimeError("The search interface was called concurrently.")
+
+        try:
+            self.queries = self.queries + 1
+            return ('results', query.terms, top, query.skip, query.topic.id if hasattr(query, 'topic') else None)
+        finally:
+            self.lock.release()
+
+    def get_document(self, document_id):
+        if document_id == 'missing':
+            raise KeyError(document_id)
+
+        self.documents = self.documents + 1
+        return ('document', document_id)
+
+
+class TestSearchServer(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestSearchServer")
+        self.directory = tempfile.mkdtemp()
+        CountingSearchInterface.created = 0
+        self.server = SearchServer(CountingSearchInterface, address=os.path.join(self.directory, 'search.sock'), searchers=3)
+        self.server.start()
+        self.interface = RemoteSearchInterface(address=self.server._address)
+
+    def tearDown(self):
+        self.interface._pool.close()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def test_parse_address(self):
+        self.logger.debug("Test addresses are parsed as sockets or host:port pairs")
+        self.assertEqual(parse_address('localhost:5000'), (('localhost', 5000), 'AF_INET'))
+        self.assertEqual(parse_address('/tmp/search.sock'), ('/tmp/search.sock', 'AF_UNIX'))
+
+    def test_lru_cache(self):
+        self.logger.debug("Test the least recently used entry is evicted")
+        cache = LRUCache(size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get_counts('cache'), {'cache_hits': 1, 'cache_misses': 1})
+
+    def test_round_trip(self):
+        self.logger.debug("Test queries and documents are answered by the server")
+        query = Query('wildlife extinction')
+        self.assertEqual(self.interface.issue_query(query, top=10), ('results', b'wildlife extinction', 10, 0, None))
+        self.assertIs(self.interface._last_query, query)
+        self.assertEqual(self.server._search_interface.queries, 1)
+        self.assertEqual(self.interface.issue_query(Query('wildlife extinction'), top=10), ('results', b'wildlife extinction', 10, 0, None))
+        self.assertEqual(self.server._search_interface.queries, 1)
+        self.assertEqual(self.interface.get_document('42'), ('document', '42'))
+        self.assertRaises(RemoteSearchError, self.interface.get_document, 'missing')
+
+    def test_shared_interface(self):
+        self.logger.debug("Test the searchers share one search interface, and results are cached")
+        threads = [threading.Thread(target=self.interface.issue_query, args=(Query('query {0}'.format(i % 4)),)) for i in range(40)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        search_interface = self.server._search_interface
+        self.assertEqual(CountingSearchInterface.created, 1)
+        self.assertEqual(search_interface.queries, 4)
+
+        stats = self.interface.get_server_stats()
+        self.assertEqual(stats['requests'], 41)  # Including the request for the stats.
+        self.assertEqual(stats['result_cache_hits'] + stats['result_cache_misses'], 40)
+        self.assertTrue(stats['result_cache_misses'] >= 4)
+
+    def test_fork(self):
+        self.logger.debug("Test connections are not shared with a forked process")
+        pool = self.interface._pool
+        self.interface.get_document('1')
+        parent_connection = pool._idle.queue[0]
+        pool._pid = -1  # As though the pool had been created by a parent process.
+        self.interface.get_document('2')
+        self.assertEqual(pool._pid, os.getpid())
+        self.assertEqual(pool._created, 1)
+        self.assertIsNot(pool._idle.queue[0], parent_connection)
+        parent_connection.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestSearchServer").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
@@ -0,0 +1,180 @@
+import os
+import sys
+import random
+import shutil
+import tempfile
+import unittest
+import logging
+
+# The simulated users import their modules relative to the simiir directory (as when run from run_simiir.py).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sims.search_user import SimulatedUser
+from simiir.user.contexts.memory import Memory
+from simiir.user.loggers.fixed_cost import FixedCostLogger
+from simiir.user.query_generators.predetermined_query import PredeterminedQueryGenerator
+from simiir.user.serp_impressions.simple import SimpleSERPImpression
+from simiir.user.result_classifiers.stochastic_informed_trec import StochasticInformedTrecTextClassifier
+from simiir.user.result_stopping_decider.random import RandomDecisionMaker
+from simiir.user.result_stopping_decider.inst import INSTDecisionMaker
+from simiir.user.result_stopping_decider.fixed_depth import FixedDepthDecisionMaker
+from simiir.search.interfaces import Topic, Document
+from simiir.search.interfaces.base import BaseSearchInterface
+
+
+class Result(object):
+    def __init__(self, rank, docid):
+        self.whooshid = docid
+        self.title = 'Result {0}'.format(rank)
+        self.summary = self.title
+        self.docid = docid
+
+
+class Response(object):
+    def __init__(self, docids):
+        self.results = [Result(rank, docid) for rank, docid in enumerate(docids)]
+
+
+class FixedSearchInterface(BaseSearchInterface):
+    """
+    A search interface whose results depend only upon the query terms.
+    """
+    def issue_query(self, query, top=100):
+        offset = sum(query.terms)
+        return Response(['DOC-{0}'.format((offset + rank * 7) % 40) for rank in range(min(top, 20))])
+
+    def get_document(self, document_id):
+        return Document(document_id, 'Title', 'Content', document_id)
+
+
+class RecordingOutputController(object):
+    """
+    Keeps the interaction and query logs in memory.
+    """
+    def __init__(self):
+        self.entries = []
+        self.queries = []
+
+    def log(self, entry):
+        self.entries.append(entry)
+
+    def log_info(self, info_type=None, text=""):
+        self.entries.append("INFO {0} {1}".format(info_type, text))
+
+    def log_query(self, query):
+        self.queries.append(query)
+
+
+class Configuration(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestSnapshot")
+        self.directory = tempfile.mkdtemp()
+        self.qrel_file = os.path.join(self.directory, 'qrels.txt')
+        self.query_file = os.path.join(self.directory, 'queries.csv')
+
+        with open(self.qrel_file, 'w') as f:
+            for i in range(0, 40, 3):
+                f.write('401 0 DOC-{0} {1}\n'.format(i, 1 + i % 2))
+
+        with open(self.query_file, 'w') as f:
+            for i, terms in enumerate(['wildlife extinction', 'oil spill', 'coastal fisheries', 'court ruling', 'election results',
+                                       'market report', 'species decline', 'habitat loss']):
+                f.write('{0},user,401,{1}\n'.format(i, terms))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_user(self, decision_maker_class=INSTDecisionMaker, **kwargs):
+        topic = Topic('401')
+        user_context = Memory(FixedSearchInterface(), None, topic)
+        user_context.user_id = 'user'
+        output = RecordingOutputController()
+        logger = FixedCostLogger(output, user_context, time_limit=400)
+
+        user = Configuration(user_context=user_context,
+                             logger=logger,
+                             query_generator=PredeterminedQueryGenerator([], self.query_file, 'user'),
+                             serp_impression=SimpleSERPImpression(user_context, self.qrel_file),
+                             snippet_classifier=StochasticInformedTrecTextClassifier(topic, user_context, self.qrel_file, rprob=0.8, nprob=0.7),
+                             document_classifier=StochasticInformedTrecTextClassifier(topic, user_context, self.qrel_file, rprob=0.9, nprob=0.6),
+                             decision_maker=decision_maker_class(user_context, logger, **kwargs))
+
+        return SimulatedUser(Configuration(user=user, output=output))
+
+    def simulate(self, user, steps=None):
+        """
+        Runs the given user until the session ends, or for the given number of steps. Returns the user's interaction log.
+        """
+        while not user.is_finished() and steps != 0:
+            user.decide_action()
+
+            if steps is not None:
+                steps = steps - 1
+
+        return user.get_configuration().output.entries
+
+    def test_restore(self):
+        self.logger.debug("Test a session restored from a snapshot continues exactly as the uninterrupted session")
+        random.seed(42)  # The random decision maker draws from the global random number generator.
+        expected = list(self.simulate(self.make_user(RandomDecisionMaker)))
+
+        random.seed(42)
+        user = self.make_user(RandomDecisionMaker)
+        self.simulate(user, steps=40)
+        snapshot = user.snapshot()
+        self.assertEqual(list(self.simulate(user)), expected)
+
+        for _ in range(2):  # A snapshot can be restored any number of times.
+            user.restore(snapshot)
+            self.assertFalse(user.is_finished())
+            self.assertEqual(list(self.simulate(user)), expected)
+
+        self.assertTrue(len(expected) > 40)
+        self.assertTrue(len(user.get_configuration().user.user_context.get_issued_queries()) > 1)
+
+    def test_fork(self):
+        self.logger.debug("Test a forked user and the original both continue exactly as the uninterrupted session")
+        expected = list(self.simulate(self.make_user()))
+
+        user = self.make_user()
+        self.simulate(user, steps=40)
+        forked = user.fork()
+        self.assertEqual(list(self.simulate(forked)), expected)
+        self.assertEqual(list(self.simulate(user)), expected)
+
+        # Copied components refer to each other, not to the originals; read-only resources are shared.
+        configuration = forked.get_configuration().user
+        self.assertIsNot(configuration.user_context, user.get_configuration().user.user_context)
+        self.assertIs(configuration.decision_maker._user_context, configuration.user_context)
+        self.assertIs(configuration.snippet_classifier._user_context, configuration.user_context)
+        self.assertIs(configuration.user_context._search_interface, user.get_configuration().user.user_context._search_interface)
+        self.assertIs(configuration.snippet_classifier._data_handler, user.get_configuration().user.snippet_classifier._data_handler)
+
+    def test_set_decision_maker(self):
+        self.logger.debug("Test a forked user can be given another stopping strategy without affecting the original")
+        expected = list(self.simulate(self.make_user()))
+
+        user = self.make_user()
+        self.simulate(user, steps=40)
+        forked = user.fork()
+        context = forked.get_configuration().user.user_context
+        decision_maker = FixedDepthDecisionMaker(context, forked.get_configuration().user.logger, depth=2)
+        forked.set_decision_maker(decision_maker)
+
+        self.assertIs(forked.get_configuration().user.decision_maker, decision_maker)
+        self.assertIn(decision_maker, context._depth_limiters)
+        self.assertNotIn(decision_maker, user.get_configuration().user.user_context._depth_limiters)
+        self.assertNotEqual(list(self.simulate(forked)), expected)
+        self.assertEqual(list(self.simulate(user)), expected)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestSnapshot").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
@@ -0,0 +1,89 @@
+from simiir.utils.term_scores import TermScoreTable
+from random import Random
+import math
+import unittest
+import logging
+import sys
+
+
+class Model(object):
+    """
+    A model giving each term an arbitrary score, counting the scores it computes.
+    """
+    def __init__(self, random):
+        self.scores = {}
+        self.random = random
+        self.computed = 0
+
+    def get_term_score(self, term):
+        self.computed = self.computed + 1
+
+        if term not in self.scores:
+            self.scores[term] = math.log(self.random.random()) * self.random.choice([1e-6, 1.0, 1e6])
+
+        return self.scores[term]
+
+
+def get_total_score(terms, score_function):
+    """
+    Sums the scores of the given terms with a scalar loop, as the classifiers did before the table was used.
+    """
+    total = 0.0
+
+    for term in terms:
+        total = total + score_function(term)
+
+    return total
+
+
+class TestTermScores(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestTermScores")
+        self.random = Random(41)
+        self.vocabulary = ['term{0}'.format(i) for i in range(300)]  # More terms than the table initially holds.
+
+    def get_terms(self):
+        return [self.random.choice(self.vocabulary[:self.random.choice([5, 50, 300])]) for _ in range(self.random.randrange(40))]
+
+    def test_total_score(self):
+        self.logger.debug("Test totals equal a scalar sum loop, with repeated terms")
+        table = TermScoreTable()
+        model = Model(self.random)
+
+        for _ in range(200):
+            terms = self.get_terms()
+            self.assertEqual(table.get_total_score(terms, (model, 'jm'), model.get_term_score), get_total_score(terms, model.get_term_score))
+
+        terms = ['term1'] * 10 + ['term2', 'term1']
+        self.assertEqual(table.get_total_score(terms, (model, 'jm'), model.get_term_score), get_total_score(terms, model.get_term_score))
+        self.assertEqual(table.get_total_score([], (model, 'jm'), model.get_term_score), 0.0)
+
+    def test_model_swap(self):
+        self.logger.debug("Test totals follow the model in use when the key changes, and scores are only computed once per key")
+        table = TermScoreTable()
+        models = [Model(self.random), Model(self.random)]
+
+        for swap in range(20):
+            model = models[swap % 2]
+            key = (model, 'jm', 0.1 * (swap % 3))
+
+            for _ in range(10):
+                terms = self.get_terms()
+                computed = model.computed
+                total = table.get_total_score(terms, key, model.get_term_score)
+                table_computed = model.computed - computed
+                self.assertEqual(total, get_total_score(terms, model.get_term_score))
+                self.assertTrue(table_computed <= len(set(terms)))
+
+            terms = self.get_terms()
+            table.get_total_score(terms, key, model.get_term_score)
+            computed = model.computed
+            table.get_total_score(terms, key, model.get_term_score)
+            self.assertEqual(model.computed, computed)  # The key is unchanged, so no scores are recomputed.
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestTermScores").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
@@ -0,0 +1,94 @@
+from ifind.search.engines import whooshtrec
+from ifind.search.engines.whooshtrec import Whooshtrec, load_index_into_memory
+from ifind.search.query import Query
+from simiir.search.interfaces.whoosh import WhooshSearchInterface
+from whoosh.fields import Schema, TEXT, ID, STORED
+from whoosh.index import create_in
+import shutil
+import tempfile
+import unittest
+import logging
+import sys
+
+WORDS = ['wildlife', 'extinction', 'oil', 'spill', 'coastal', 'fisheries', 'report', 'market', 'court', 'election']
+
+
+def build_index(directory, count=30):
+    """
+    Builds a small Whoosh index, with the fields of the TREC indexes used by simiir, in the given directory.
+    """
+    schema = Schema(title=TEXT(stored=True), content=TEXT(stored=True), docid=ID(stored=True), timedate=STORED, source=STORED)
+    index = create_in(directory, schema)
+    writer = index.writer()
+
+    for i in range(count):
+        content = ' '.join(WORDS[(i * j) % len(WORDS)] for j in range(1, 40))
+        writer.add_document(title='Document {0}'.format(i), content=content, docid='DOC-{0:03d}'.format(i), timedate='1998', source='APW')
+
+    writer.commit()
+
+
+class TestWhooshMemory(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestWhooshMemory")
+        self.directory = tempfile.mkdtemp()
+        build_index(self.directory)
+        self.doc_index = Whooshtrec.__dict__.get('docIndex')
+
+    def tearDown(self):
+        whooshtrec._memory_indexes.clear()
+
+        if self.doc_index is None:
+            if 'docIndex' in Whooshtrec.__dict__:
+                del Whooshtrec.docIndex
+        else:
+            Whooshtrec.docIndex = self.doc_index
+
+        shutil.rmtree(self.directory)
+
+    def make_query(self, terms, top=10):
+        query = Query(terms, top=top)
+        query.skip = 1  # The first page of results, as the user context issues queries.
+        return query
+
+    def search(self, engine, terms):
+        response = engine.search(self.make_query(terms))
+        return [(result.docid, result.score) for result in response.results]
+
+    def test_loaded_once(self):
+        self.logger.debug("Test an index is loaded into memory once")
+        index = load_index_into_memory(self.directory)
+        self.assertIs(load_index_into_memory(self.directory), index)
+        self.assertEqual(index.doc_count(), 30)
+        self.assertTrue(index.memory_size > 0)
+        self.assertTrue(index.load_time >= 0)
+
+    def test_same_results(self):
+        self.logger.debug("Test an in-memory index gives the same results as the index on disk")
+        if 'docIndex' in Whooshtrec.__dict__:
+            del Whooshtrec.docIndex
+
+        engine = Whooshtrec(whoosh_index_dir=self.directory, model=1, implicit_or=True)
+        on_disk = [self.search(engine, terms) for terms in ['wildlife extinction', 'oil spill', 'court']]
+
+        engine = Whooshtrec(whoosh_index_dir=self.directory, model=1, implicit_or=True, in_memory=True)
+        self.assertIs(Whooshtrec.docIndex, load_index_into_memory(self.directory))
+        in_memory = [self.search(engine, terms) for terms in ['wildlife extinction', 'oil spill', 'court']]
+        self.assertEqual(in_memory, on_disk)
+        self.assertTrue(all(on_disk))
+
+    def test_interface(self):
+        self.logger.debug("Test the search interface reads documents from the in-memory index")
+        interface = WhooshSearchInterface(self.directory, model=1, in_memory=True)
+        response = interface.issue_query(self.make_query('fisheries'), top=5)
+        self.assertEqual(len(response.results), 5)
+        document = interface.get_document(response.results[0].whooshid)
+        self.assertEqual(document.doc_id, response.results[0].docid)
+        self.assertEqual(document.source, 'APW')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(stream=sys.stderr)
+    logging.getLogger("TestWhooshMemory").setLevel(logging.DEBUG)
+    unittest.main(exit=False)
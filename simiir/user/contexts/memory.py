@@ -1,8 +1,12 @@
 import os
 import abc
+import time
+import threading
 from simiir.user.loggers import Actions
 from ifind.search.query import Query
 from simiir.search.interfaces import Document
+from simiir.user.contexts.session_trace import SessionTrace
+from simiir.utils.snapshot import copy_sharing
 import logging
 
 log = logging.getLogger('user_context.user_context')
@@ -40,6 +44,101 @@ class RelevanceRevision(NoRelevanceRevision):
         super(RelevanceRevision, self).add_irrelevant_document(document)
 
 
+class RunningAggregates(object):
+    """
+    Running statistics over a chronological sequence of examined items (snippets or documents).
+    Each item is folded in exactly once (see add()), so reading any of the statistics is a constant time operation.
+    Judgments follow the usual convention: 1 (or more) is relevant, 0 is nonrelevant and -1 is unjudged (e.g. a snippet seen previously).
+    """
+    def __init__(self):
+        self.count = 0                      # The number of items examined.
+        self.relevant = 0                   # Items with a judgment > 0.
+        self.nonrelevant = 0                # Items with a judgment of 0.
+        self.gain = 0                       # The cumulative gain, with unjudged items contributing nothing.
+        self.seen_before = 0                # Items whose doc_id had already been examined earlier in the sequence.
+        
+        self.nonrelevant_run = 0            # The length of the current run of consecutive nonrelevant items.
+        self.max_nonrelevant_run = 0        # The longest such run.
+        self.new_nonrelevant = 0            # Nonrelevant items, ignoring those whose doc_id was first judged nonrelevant earlier in the sequence.
+        self.new_nonrelevant_run = 0        # Consecutive run of the above; only a judgment other than 0 breaks the run.
+        self.max_new_nonrelevant_run = 0    # The longest such run.
+        
+        self.last_relevant_rank = 0         # The SERP rank of the most recent relevant item (0 if none have been found).
+        
+        self.__first_judgments = {}         # doc_id -> the judgment given to the first item with that doc_id.
+        self.__judgments = []               # Every judgment, in order; used for computing discounted gains on demand.
+        self.__discounted_gains = {}        # discount -> [items folded in, discounted cumulative gain]
+    
+    def add(self, item, rank_function=None):
+        """
+        Folds the given item (with its judgment set) into the running statistics.
+        If provided, rank_function is called with the item's doc_id to obtain its SERP rank when the item is relevant.
+        """
+        judgment = item.judgment
+        previous_judgment = self.__first_judgments.get(item.doc_id, -1)
+        
+        if item.doc_id in self.__first_judgments:
+            self.seen_before = self.seen_before + 1
+        else:
+            self.__first_judgments[item.doc_id] = judgment
+        
+        self.count = self.count + 1
+        self.__judgments.append(judgment)
+        
+        if judgment > 0:
+            self.relevant = self.relevant + 1
+            self.gain = self.gain + judgment
+            
+            if rank_function is not None:
+                self.last_relevant_rank = rank_function(item.doc_id)
+        
+        if judgment == 0:
+            self.nonrelevant = self.nonrelevant + 1
+            self.nonrelevant_run = self.nonrelevant_run + 1
+            self.max_nonrelevant_run = max(self.max_nonrelevant_run, self.nonrelevant_run)
+            
+            if previous_judgment != 0:
+                self.new_nonrelevant = self.new_nonrelevant + 1
+                self.new_nonrelevant_run = self.new_nonrelevant_run + 1
+                self.max_new_nonrelevant_run = max(self.max_new_nonrelevant_run, self.new_nonrelevant_run)
+        else:
+            self.nonrelevant_run = 0
+            self.new_nonrelevant_run = 0
+    
+    def was_seen(self, doc_id):
+        """
+        Returns True iif an item with the given doc_id has been folded in.
+        """
+        return doc_id in self.__first_judgments
+    
+    def get_first_judgment(self, doc_id):
+        """
+        Returns the judgment of the first item with the given doc_id, or -1 if no such item has been folded in.
+        """
+        return self.__first_judgments.get(doc_id, -1)
+    
+    def get_discounted_gain(self, discount):
+        """
+        Returns the discounted cumulative gain, sum(gain_i / i**discount), over all items folded in so far.
+        Sums are kept per discount value, so each item is only ever added once for a given discount.
+        """
+        entry = self.__discounted_gains.setdefault(discount, [0, 0.0])
+        position, discounted_gain = entry
+        
+        while position < len(self.__judgments):
+            judgment = float(self.__judgments[position])
+            position = position + 1
+            
+            if judgment < 0:
+                judgment = 0
+            
+            discounted_gain += (judgment)*(1.0/(float(position)**discount))
+        
+        entry[0] = position
+        entry[1] = discounted_gain
+        return discounted_gain
+
+
 class Memory(object):
     """
     The "memory" of the simulated user.
@@ -58,9 +157,14 @@ class Memory(object):
         self._search_interface = search_interface
         self._output_controller = output_controller
         self.topic = topic
+        self.user_id = None                      # The ID of the simulated user (set by the user's component generator); keys random draws.
         
-        self._actions = []                       # A list of all of the actions undertaken by the simulated user in chronological order.
-        self._depths = []                        # Documents and snippets examined for previous queries.
+        # A compact (array-backed) record of the session; see get_trace().
+        # The Document lists below are kept alongside it, not replaced by views over it. Each examination is its own Document
+        # (a snippet seen again is a new, unjudged Document), and components read their text and revise their judgments in place,
+        # so a doc_id -> Document table could not stand in for them. The lists hold references, and the trace adds 9 bytes per item.
+        self._trace = SessionTrace()
+        self._actions = self._trace.get_action_sequence()  # A list of all of the actions undertaken by the simulated user in chronological order.
         
         self._last_query = None                  # The Query object that was issued.
         self._last_results = None                # Results for the query.
@@ -83,9 +187,34 @@ class Memory(object):
         
         self._relevant_documents = []            # All documents marked relevant throughout the search session.
         self._irrelevant_documents = []          # All documents marked irrelevant throughout the search session.
+        
+        # Indexes over the lists above, keyed by doc_id. Each maps to the positions of that doc_id in the corresponding list.
+        self._snippet_positions = {}             # Positions within _all_snippets_examined.
+        self._document_positions = {}            # Positions within _all_documents_examined.
+        
+        # Running aggregates over the examined snippets and documents, for the current query and the whole session.
+        # Items are folded in when the aggregates are next read, by which point the user has judged them (see _update_aggregates()).
+        self._query_snippet_aggregates = RunningAggregates()
+        self._query_document_aggregates = RunningAggregates()
+        self._session_snippet_aggregates = RunningAggregates()
+        self._session_document_aggregates = RunningAggregates()
+        self._aggregated_snippets = 0            # The number of items in _snippets_examined folded into the aggregates.
+        self._aggregated_documents = 0           # The number of items in _documents_examined folded into the aggregates.
+        self._result_ranks = None                # doc_id -> rank for the current SERP, built on demand.
 
         self.query_limit = 0                     # 0 - no limit on the number issued. Otherwise, the number of queries is capped
         self.relevance_revision = 0              # 0 - no revising of relevance judgements, 1- updates the relevance judgement of snippets
+        self.prefetch_queries = False            # If True, the predicted next query is issued in the background while the current SERP is examined.
+        
+        self._depth_limiters = []                # Components bounding how deep into a SERP the user can go (see set_depth_hint_providers()).
+        self._depth_requirements = []            # Components requiring a minimum number of results.
+        
+        self._prefetch = None                    # The outstanding prefetch; a (key, thread, holder) tuple.
+        self._search_lock = threading.Lock()     # Serialises every call to the search interface (which a prefetch makes from another thread).
+        self._prefetch_issued = 0                # Number of queries prefetched.
+        self._prefetch_hits = 0                  # Number of issued queries answered by a prefetch.
+        self._prefetch_wasted = 0                # Number of prefetched queries that were never issued.
+        self._prefetch_wasted_time = 0.0         # Time (in seconds) spent on prefetched queries that were never issued.
         
         self.action_mappings = {
             Actions.UTTERANCE:      self._set_utterance_action,
@@ -100,6 +229,15 @@ class Memory(object):
             Actions.MARK:           self._set_mark_action
         }
     
+    def __deepcopy__(self, memo):
+        """
+        Copies the user context when a simulated user is snapshotted or forked.
+        The search lock is shared (as is the search interface); an outstanding prefetch stays with the original.
+        """
+        result = copy_sharing(self, memo, shared_attributes=('_search_lock', '_prefetch'))
+        result._prefetch = None
+        return result
+    
     @property
     def relevance_revision(self):
         """
@@ -140,6 +278,15 @@ class Memory(object):
             Number of Attractive SERPs Examined: {self._attractive_serp_count}
             Number of Unattractive SERPs Examined: {self._unattractive_serp_count}"""
         
+        if self.prefetch_queries:
+            self._discard_prefetch()  # Anything still outstanding was never used.
+            hit_rate = self._prefetch_hits / float(len(self._issued_queries)) if self._issued_queries else 0.0
+            
+            return_string = f"""{return_string}
+            Number of Queries Prefetched: {self._prefetch_issued}
+            Prefetch Hit Rate: {hit_rate:.3f}
+            Number of Wasted Prefetches: {self._prefetch_wasted} ({self._prefetch_wasted_time:.3f} seconds)"""
+        
         self._output_controller.log_info(info_type="SUMMARY")
         self._output_controller.log_info(info_type="TOTAL_QUERIES_ISSUED", text=len(self._issued_queries))
         self._output_controller.log_info(info_type="TOTAL_SNIPPETS_EXAMINED", text=len(self._all_snippets_examined))
@@ -148,6 +295,12 @@ class Memory(object):
         self._output_controller.log_info(info_type="TOTAL_ATTRACTIVE_SERP_IMPRESSIONS", text=self._attractive_serp_count)
         self._output_controller.log_info(info_type="TOTAL_UNATTRACTIVE_SERP_IMPRESSIONS", text=self._unattractive_serp_count)
         
+        if self.prefetch_queries:
+            self._output_controller.log_info(info_type="TOTAL_QUERIES_PREFETCHED", text=self._prefetch_issued)
+            self._output_controller.log_info(info_type="TOTAL_PREFETCH_HITS", text=self._prefetch_hits)
+            self._output_controller.log_info(info_type="TOTAL_PREFETCH_WASTED", text=self._prefetch_wasted)
+            self._output_controller.log_info(info_type="TOTAL_PREFETCH_WASTED_SECONDS", text="{0:.3f}".format(self._prefetch_wasted_time))
+        
         return return_string
 
     def get_last_action(self):
@@ -177,14 +330,17 @@ class Memory(object):
         Called when a new query is issued by the simulated user.
         Resets the appropriate counters for the next iteration; stores the previously examined snippets and documents for reference.
         """
-        if len(self._issued_queries) > 0:
-            #  If a query has been issued previously, store the snippets and documents examined for reference later on.
-            self._depths.append((self._snippets_examined, self._documents_examined))
+        self._update_aggregates()  # Anything not yet folded into the session aggregates belongs to the previous query.
 
         # Reset our counters for the next query.
         self._snippets_examined = []
         self._documents_examined = []
         
+        self._query_snippet_aggregates = RunningAggregates()
+        self._query_document_aggregates = RunningAggregates()
+        self._aggregated_snippets = 0
+        self._aggregated_documents = 0
+        
         self._current_document = None
         self._current_snippet = None
         
@@ -209,12 +365,15 @@ class Memory(object):
         result = self._last_results[self._current_serp_position]
         snippet = Document(result.whooshid, result.title, result.summary, result.docid)
 
+        self._snippet_positions.setdefault(snippet.doc_id, []).append(len(self._all_snippets_examined))
+        self._trace.add_snippet(snippet.doc_id, len(self._issued_queries) - 1)
         self._snippets_examined.append(snippet)
         self._all_snippets_examined.append(snippet)
         self._current_snippet = snippet
         
         # Sets the current document
-        self._current_document = self._search_interface.get_document(snippet.id)
+        with self._search_lock:
+            self._current_document = self._search_interface.get_document(snippet.id)
 
     def _set_response_action(self):
         """
@@ -266,6 +425,8 @@ class Memory(object):
         """
         Called when a document is to be assessed for relevance.
         """
+        self._document_positions.setdefault(self._current_document.doc_id, []).append(len(self._all_documents_examined))
+        self._trace.add_document(self._current_document.doc_id, len(self._issued_queries) - 1)
         self._documents_examined.append(self._current_document)
         self._all_documents_examined.append(self._current_document)
     
@@ -275,31 +436,142 @@ class Memory(object):
         """
         pass
     
-    def add_issued_query(self, query_text, page=1, page_len=1000):
+    def _create_query_object(self, query_text, page, page_len):
         """
-        Adds a query to the stack of previously issued queries.
+        Returns a Query object for the given query string, page number and page length, with the response from the search interface attached.
         """
-        def create_query_object():
-            """
-            Nested method which returns a Query object for the given query string, page number and page length attributes from the parent method.
-            """
-            query_object = Query(query_text)
-            query_object.skip = page
-            query_object.top = page_len
-            query_object.topic = self.topic
-            
-            response = self._search_interface.issue_query(query_object)
-            query_object.response = response
+        query_object = Query(query_text)
+        query_object.skip = page
+        query_object.top = page_len
+        query_object.topic = self.topic
+        
+        depth = self.get_depth_hint()
+        default_top = getattr(self._search_interface, 'default_top', None)
+        
+        with self._search_lock:
+            if depth is not None and default_top is not None and depth < default_top:
+                response = self._search_interface.issue_query(query_object, top=depth)
+            else:
+                response = self._search_interface.issue_query(query_object)
+        
+        query_object.response = response
+        return query_object
+    
+    def set_depth_hint_providers(self, limiters, requirements=()):
+        """
+        Registers the components used to work out how many results to retrieve for a query.
+        limiters provide get_max_depth() (e.g. the stopping decision maker and the logger); the smallest limit is used.
+        requirements provide get_required_depth() (e.g. the SERP impression); at least this many results are always retrieved.
+        """
+        self._depth_limiters = [limiter for limiter in limiters if hasattr(limiter, 'get_max_depth')]
+        self._depth_requirements = [requirement for requirement in requirements if hasattr(requirement, 'get_required_depth')]
+    
+    def get_depth_hint(self):
+        """
+        Returns the maximum number of results the user could make use of for the next query, or None if it is unbounded.
+        """
+        limits = [limiter.get_max_depth() for limiter in self._depth_limiters]
+        limits = [limit for limit in limits if limit is not None]
+        
+        if not limits:
+            return None
+        
+        depth = min(limits)
+        
+        for requirement in self._depth_requirements:
+            required_depth = requirement.get_required_depth()
             
-            return query_object
+            if required_depth is not None and required_depth > depth:
+                depth = required_depth
         
+        return depth
+    
+    def add_issued_query(self, query_text, page=1, page_len=1000):
+        """
+        Adds a query to the stack of previously issued queries.
+        If the query was prefetched (see prefetch_query()), the prefetched response is used.
+        """
         # Obtain the Query object and append it to the issued queries list.
-        query_object = create_query_object()
+        query_object = self._take_prefetched_query((query_text, page, page_len))
+        
+        if query_object is None:
+            query_object = self._create_query_object(query_text, page, page_len)
         
         self._issued_queries.append(query_object)
         self._last_query = query_object
         self._last_results = self._last_query.response.results
+        self._result_ranks = None
     
+    def prefetch_query(self, query_text, page=1, page_len=1000):
+        """
+        Speculatively issues the given query (the predicted next query) in a background thread, so that it is ready when add_issued_query() is called.
+        Does nothing unless prefetch_queries is True. Only one prefetch is outstanding at a time; a previous unused prefetch is counted as wasted.
+        Search interfaces are not thread-safe, so the prefetch holds the search lock (as every call to the interface does) while it searches.
+        """
+        if not self.prefetch_queries:
+            return
+        
+        key = (query_text, page, page_len)
+        
+        if self._prefetch is not None:
+            if self._prefetch[0] == key:
+                return
+            
+            self._discard_prefetch()
+        
+        holder = {}
+        
+        def run():
+            start_time = time.time()
+            
+            try:
+                holder['query'] = self._create_query_object(query_text, page, page_len)
+            except Exception as e:
+                log.warning("Prefetching query '{0}' failed: {1}".format(query_text, e))
+            
+            holder['time'] = time.time() - start_time
+        
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        
+        self._prefetch = (key, thread, holder)
+        self._prefetch_issued = self._prefetch_issued + 1
+    
+    def _take_prefetched_query(self, key):
+        """
+        Returns the prefetched Query object for the given (query_text, page, page_len) key, waiting for it if it is still in progress.
+        Returns None if there is no matching (successful) prefetch.
+        """
+        if self._prefetch is None:
+            return None
+        
+        if self._prefetch[0] != key:
+            self._discard_prefetch()
+            return None
+        
+        _, thread, holder = self._prefetch
+        self._prefetch = None
+        thread.join()
+        
+        if 'query' not in holder:
+            return None
+        
+        self._prefetch_hits = self._prefetch_hits + 1
+        return holder['query']
+    
+    def _discard_prefetch(self):
+        """
+        Drops the outstanding prefetch (if any), recording it as wasted work.
+        """
+        if self._prefetch is None:
+            return
+        
+        _, thread, holder = self._prefetch
+        self._prefetch = None
+        thread.join()
+        
+        self._prefetch_wasted = self._prefetch_wasted + 1
+        self._prefetch_wasted_time = self._prefetch_wasted_time + holder.get('time', 0.0)
     
     def get_last_query(self):
         """
@@ -347,39 +619,109 @@ class Memory(object):
         Returns a zero or positive integer representing the number of times the simulated user has seen the given document in previous SERPs.
         If the returned value is 0, the document is new to the user, otherwise the document has been seen as many times as the returned value.
         """
-        occurrences = 0
-        
-        for document in self._all_documents_examined:
-            if document.doc_id == selected_document.doc_id:
-                occurrences = occurrences + 1
-        
-        return occurrences
+        return len(self._document_positions.get(selected_document.doc_id, ()))
     
     def get_snippet_observation_count(self, selected_snippet):
         """
         Returns a zero or positive integer representing the number of times the simulated user has seen the given snippet in previous SERPs.
         If the returned value is 0, the document is new to the user, otherwise the snippet has been seen as many times as the returned value.
         """
-        occurrences = 0
+        return len(self._snippet_positions.get(selected_snippet.doc_id, ()))
+    
+    def get_snippet_observation_judgment(self, selected_snippet, last=False):
+        """
+        Returns the historic judgment for a snippet - the first judgment made, or the most recent if last is True.
+        If the snippet passed has not been seen (or judged) previously, -1 will be returned.
+        """
+        positions = self._snippet_positions.get(selected_snippet.doc_id, ())
         
-        for snippet in self._all_snippets_examined:
-            if snippet.doc_id == selected_snippet.doc_id:
-                occurrences = occurrences + 1
+        if last:
+            positions = reversed(positions)
+        
+        for position in positions:
+            snippet = self._all_snippets_examined[position]
+            
+            if snippet.judgment > -1:
+                return snippet.judgment
         
-        return occurrences
+        return -1
     
-    def get_snippet_observation_judgment(self, selected_snippet):
+    def _get_result_rank(self, doc_id):
         """
-        Returns the historic judgment for a snippet.
-        If the snippet passed has not been seen previously, -1 will be returned.
+        Returns the (1-based) rank of the given doc_id on the current SERP, or 0 if it does not appear.
+        If the doc_id appears more than once, its last (deepest) position is returned.
         """
-        if self.get_snippet_observation_count(selected_snippet) > 0:
-            for snippet in self._all_snippets_examined:
-                if snippet.doc_id == selected_snippet.doc_id:
-                    if snippet.judgment > -1:
-                        return snippet.judgment
+        if self._result_ranks is None:
+            self._result_ranks = {}
+            
+            for rank, result in enumerate(self._last_results or [], 1):
+                self._result_ranks[result.docid] = rank
         
-        return -1
+        return self._result_ranks.get(doc_id, 0)
+    
+    def _update_aggregates(self):
+        """
+        Folds any snippets and documents examined since the last call into the running aggregates.
+        This is done lazily, as an item's judgment is set by the simulated user after the corresponding action has been recorded here.
+        """
+        # The current query's items are the tail of the session-wide lists (and so of the trace).
+        trace_position = len(self._all_snippets_examined) - len(self._snippets_examined) + self._aggregated_snippets
+        
+        for snippet in self._snippets_examined[self._aggregated_snippets:]:
+            self._query_snippet_aggregates.add(snippet, self._get_result_rank)
+            self._session_snippet_aggregates.add(snippet)
+            self._trace.snippet_judgments[trace_position] = snippet.judgment
+            trace_position = trace_position + 1
+        
+        trace_position = len(self._all_documents_examined) - len(self._documents_examined) + self._aggregated_documents
+        
+        for document in self._documents_examined[self._aggregated_documents:]:
+            self._query_document_aggregates.add(document, self._get_result_rank)
+            self._session_document_aggregates.add(document)
+            self._trace.document_judgments[trace_position] = document.judgment
+            trace_position = trace_position + 1
+        
+        self._aggregated_snippets = len(self._snippets_examined)
+        self._aggregated_documents = len(self._documents_examined)
+    
+    def get_trace(self):
+        """
+        Returns the SessionTrace for the search session so far, with the judgments of all examined snippets and documents filled in.
+        Call to_numpy() on the returned object to obtain the trace as NumPy arrays.
+        """
+        self._update_aggregates()
+        return self._trace
+    
+    def get_query_examinations(self, query_index):
+        """
+        Returns a (snippets, documents) tuple of the lists of Document objects examined for the given query (by index into the issued queries).
+        """
+        (snippet_start, snippet_end), (document_start, document_end) = self._trace.get_query_bounds(query_index)
+        return (self._all_snippets_examined[snippet_start:snippet_end], self._all_documents_examined[document_start:document_end])
+    
+    def get_snippet_aggregates(self, session=False):
+        """
+        Returns the RunningAggregates object for the snippets examined for the CURRENT QUERY,
+        or over the ENTIRE SEARCH SESSION if session is True.
+        """
+        self._update_aggregates()
+        
+        if session:
+            return self._session_snippet_aggregates
+        
+        return self._query_snippet_aggregates
+    
+    def get_document_aggregates(self, session=False):
+        """
+        Returns the RunningAggregates object for the documents examined for the CURRENT QUERY,
+        or over the ENTIRE SEARCH SESSION if session is True.
+        """
+        self._update_aggregates()
+        
+        if session:
+            return self._session_document_aggregates
+        
+        return self._query_document_aggregates
     
     def get_current_document(self):
         """
@@ -0,0 +1,124 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+
+# The order in which actions are encoded. Codes are indexes into this tuple, and fit in a signed byte.
+# (The Actions enumerator is a set, and so has no stable order of its own.)
+ACTION_NAMES = ('START', 'QUERY', 'SERP', 'SNIPPET', 'DOC', 'MARK', 'UTTERANCE', 'CSRP', 'RESPONSE', 'MARKRESPONSE', 'STOP', 'UNKNOWN')
+ACTION_CODES = dict((name, code) for code, name in enumerate(ACTION_NAMES))
+
+
+class ActionSequence(Sequence):
+    """
+    A list-like view over the action codes stored in a SessionTrace.
+    Items are returned as action names (i.e. the values of the Actions enumerator); append() encodes a new action.
+    """
+    def __init__(self, codes):
+        self._codes = codes
+
+    def __len__(self):
+        return len(self._codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ACTION_NAMES[code] for code in self._codes[index]]
+
+        return ACTION_NAMES[self._codes[index]]
+
+    def append(self, action):
+        self._codes.append(ACTION_CODES[action])
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class SessionTrace(object):
+    """
+    A compact record of a simulated search session.
+    Actions are stored as byte codes (see ACTION_NAMES). Examined snippets and documents are stored as parallel arrays of
+    interned document references, the index of the query they were examined for, and their judgments.
+    Use to_numpy() to obtain the trace as a dictionary of NumPy arrays for analysis.
+    """
+    def __init__(self):
+        self.actions = array('b')
+
+        self.snippet_docs = array('i')          # Interned doc_id of each examined snippet.
+        self.snippet_queries = array('i')       # Index of the query each snippet was examined for (-1 if none).
+        self.snippet_judgments = array('b')     # -1 (unjudged), 0 (nonrelevant) or 1 (relevant).
+
+        self.document_docs = array('i')
+        self.document_queries = array('i')
+        self.document_judgments = array('b')
+
+        self.__doc_ids = []                     # Reference -> doc_id
+        self.__doc_refs = {}                    # doc_id -> reference
+
+    def get_action_sequence(self):
+        """
+        Returns a list-like view of the recorded actions.
+        """
+        return ActionSequence(self.actions)
+
+    def intern(self, doc_id):
+        """
+        Returns the integer reference for the given doc_id, assigning a new reference if the doc_id has not been seen before.
+        """
+        reference = self.__doc_refs.get(doc_id)
+
+        if reference is None:
+            reference = len(self.__doc_ids)
+            self.__doc_refs[doc_id] = reference
+            self.__doc_ids.append(doc_id)
+
+        return reference
+
+    def get_doc_id(self, reference):
+        """
+        Returns the doc_id for the given integer reference.
+        """
+        return self.__doc_ids[reference]
+
+    def add_snippet(self, doc_id, query_index, judgment=-1):
+        """
+        Records an examined snippet. Returns its position in the trace.
+        """
+        self.snippet_docs.append(self.intern(doc_id))
+        self.snippet_queries.append(query_index)
+        self.snippet_judgments.append(judgment)
+        return len(self.snippet_docs) - 1
+
+    def add_document(self, doc_id, query_index, judgment=-1):
+        """
+        Records an examined document. Returns its position in the trace.
+        """
+        self.document_docs.append(self.intern(doc_id))
+        self.document_queries.append(query_index)
+        self.document_judgments.append(judgment)
+        return len(self.document_docs) - 1
+
+    def get_query_bounds(self, query_index):
+        """
+        Returns the ((snippet_start, snippet_end), (document_start, document_end)) positions of the items examined for the given query.
+        Items are recorded in chronological order, so the items for a query are contiguous.
+        """
+        def bounds(queries):
+            return bisect_left(queries, query_index), bisect_right(queries, query_index)
+
+        return bounds(self.snippet_queries), bounds(self.document_queries)
+
+    def to_numpy(self):
+        """
+        Returns the trace as a dictionary of NumPy arrays.
+        Document references (snippet_docs, document_docs) index into the doc_ids array; action codes index into action_names.
+        """
+        import numpy
+
+        return {'actions': numpy.array(self.actions, dtype=numpy.int8),
+                'action_names': numpy.array(ACTION_NAMES),
+                'snippet_docs': numpy.array(self.snippet_docs, dtype=numpy.int32),
+                'snippet_queries': numpy.array(self.snippet_queries, dtype=numpy.int32),
+                'snippet_judgments': numpy.array(self.snippet_judgments, dtype=numpy.int8),
+                'document_docs': numpy.array(self.document_docs, dtype=numpy.int32),
+                'document_queries': numpy.array(self.document_queries, dtype=numpy.int32),
+                'document_judgments': numpy.array(self.document_judgments, dtype=numpy.int8),
+                'doc_ids': numpy.array(self.__doc_ids, dtype=object)}
@@ -1,5 +1,6 @@
 from simiir.user.contexts.memory import Memory
-from ifind.seeker.trec_qrel_handler import TrecQrelHandler
+from ifind.seeker.compiled_qrels import load_qrels
+from simiir.utils.data_handlers import get_qrels_topics
 import os
 
 
@@ -10,7 +11,7 @@ class TRECMemory(Memory):
 
     def __init__(self, search_interface, output_controller, topic, qrel_file):
         
-        self._qrel_handler = TrecQrelHandler(qrel_file)
+        self._qrel_handler = load_qrels(qrel_file, topics=get_qrels_topics())
         super(TRECMemory, self).__init__(search_interface, output_controller, topic)
 
     def _assess_documents(self):
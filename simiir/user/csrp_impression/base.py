@@ -1,5 +1,5 @@
 import abc
-import random
+from simiir.utils.random_streams import RandomStream
 
 class BaseCSRPImpression(object):
     """
@@ -7,9 +7,11 @@ class BaseCSRPImpression(object):
     Contains the abstract signature for the is_serp_attractive() method.
     Rolls a dice and randomly returns True or False.
     90% it will return True, 10% it will return False.
+    The dice roll for a CSRP depends only upon the seed, topic, user and utterance number (see simiir.utils.random_streams).
     """
-    def __init__(self, user_context):
+    def __init__(self, user_context, base_seed=0):
         self._user_context = user_context
+        self._random = RandomStream(base_seed, 'BaseCSRPImpression')
     
     #@abc.abstractmethod
     def is_csrp_attractive(self):
@@ -19,7 +21,7 @@ class BaseCSRPImpression(object):
         to implement this functionality.
         """
 
-        if random.random() < 0.9:
+        if self._random.random(self._user_context, len(self._user_context.get_issued_utterances())) < 0.9:
             return True
         else:
             return False
@@ -1,5 +1,6 @@
 import abc
 from simiir.user.loggers import Actions
+from simiir.utils.snapshot import copy_sharing
 
 class BaseLogger(object):
     """
@@ -25,6 +26,12 @@ class BaseLogger(object):
             Actions.STOP: self._log_stop
         }
     
+    def __deepcopy__(self, memo):
+        """
+        Copies the logger when a simulated user is snapshotted or forked. Progress bars (which write to the terminal) are shared.
+        """
+        return copy_sharing(self, memo, shared_attributes=('_bar',))
+    
     def log_action(self, action_name, **kwargs):
         """
         A nice helper method which is publicly exposed for logging an event.
@@ -48,6 +55,13 @@ class BaseLogger(object):
     def get_last_relevant_snippet_time(self):
         return 1
     
+    def get_max_depth(self):
+        """
+        Returns the maximum number of results the user could examine for a new query before the logger ends the session,
+        or None if there is no such limit. Used as a hint to retrieve fewer results.
+        """
+        return None
+    
     def get_progress(self):
         """
         Abstract method. Returns a value between 0 and 1 representing the progress of the simulation.
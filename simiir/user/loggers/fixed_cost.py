@@ -1,3 +1,4 @@
+import math
 from simiir.user.loggers import Actions
 from simiir.user.loggers.base import BaseLogger
 import progressbar
@@ -60,6 +61,17 @@ class FixedCostLogger(BaseLogger):
     def get_last_relevant_snippet_time(self):
         return self._last_relevant_snippet_time
     
+    def get_max_depth(self):
+        """
+        Returns the number of snippets that fit into the remaining time (plus one for the end of SERP check).
+        With no time limit (or no snippet cost), there is no limit, and None is returned.
+        """
+        if self._time_limit <= 0 or self._snippet_cost <= 0:
+            return None
+        
+        remaining_time = max(0, self._time_limit - self._total_time)
+        return int(math.ceil(remaining_time / float(self._snippet_cost))) + 1
+    
     def get_progress(self):
         """
         Concrete implementation of the abstract get_progress() method.
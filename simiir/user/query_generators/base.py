@@ -1,11 +1,11 @@
 import abc
-from whoosh.lang.porter import stem
 from simiir.utils import lm_methods
 from ifind.search.query import Query
 from ifind.common.query_ranker import QueryRanker
-from ifind.common.language_model import LanguageModel
+from ifind.common.array_language_model import ArrayLanguageModel
 from ifind.common.query_generation import SingleQueryGeneration, BiTermQueryGeneration, TriTermQueryGeneration
 from ifind.common.smoothed_language_model import BayesLanguageModel
+from ifind.common.stem_cache import get_stem_cache
 
 import logging
 
@@ -44,7 +44,7 @@ class BaseQueryGenerator(object):
         document_term_counts = lm_methods.extract_term_dict_from_text(topic_text, self._stopword_file)
 
         # The language model we return is simply a representation of the number of times terms occur within the topic text.
-        topic_language_model = LanguageModel(term_dict=document_term_counts)
+        topic_language_model = ArrayLanguageModel(term_dict=document_term_counts)
         return topic_language_model
 
 
@@ -82,8 +82,9 @@ class BaseQueryGenerator(object):
         """
         Applies the Porter stemming algorithm (implementation from the Whoosh IR toolkit) to a given term, term.
         The returned string represents the stemmed version of the term.
+        Stems are cached for the process (see ifind.common.stem_cache), so each term is only stemmed once.
         """
-        return stem(term)
+        return get_stem_cache().stem(term)
     
 
     def update_model(self, user_context):
@@ -1,11 +1,11 @@
 from simiir.user.query_generators.base import BaseQueryGenerator
 from simiir.utils import lm_methods
-from ifind.common.language_model import LanguageModel
+from ifind.common.array_language_model import ArrayLanguageModel
 from ifind.common.query_generation import SingleQueryGeneration
 from ifind.common.smoothed_language_model import BayesLanguageModel, SmoothedLanguageModel
 from ifind.common.query_generation import SingleQueryGeneration, BiTermQueryGeneration, TriTermQueryGeneration
 from ifind.common.query_ranker import QueryRanker
-from bs4 import BeautifulSoup
+from ifind.common.markup import html_to_text
 
 
 class SmarterQueryGenerator(BaseQueryGenerator):
@@ -33,7 +33,7 @@ class SmarterQueryGenerator(BaseQueryGenerator):
         topic_term_counts = lm_methods.extract_term_dict_from_text(topic_text, self._stopword_file)
 
         
-        topic_language_model = LanguageModel(term_dict=topic_term_counts)
+        topic_language_model = ArrayLanguageModel(term_dict=topic_term_counts)
         if self.background_language_model:
             smoothed_topic_language_model = SmoothedLanguageModel(topic_language_model, self.background_language_model)
             return smoothed_topic_language_model
@@ -104,7 +104,7 @@ class SmarterQueryGenerator(BaseQueryGenerator):
             #topic_language_model = BayesLanguageModel(title_language_model, snippet_language_model, beta=10)
             
             term_counts = lm_methods.extract_term_dict_from_text(all_text, self._stopword_file)
-            language_model = LanguageModel(term_dict=term_counts)
+            language_model = ArrayLanguageModel(term_dict=term_counts)
             
             self.topic_lang_model = language_model
             if self.background_language_model:
@@ -118,16 +118,10 @@ class SmarterQueryGenerator(BaseQueryGenerator):
     def _get_snip_text(self, user_context):
         document_list = user_context.get_all_examined_snippets()
         
-        # iterate through document_list, pull out relevant snippets / text
+        # iterate through document_list, pull out the text of relevant snippets (each is only cleaned once, see ifind.common.markup)
         rel_text_list = []
-        snippet_text = ''
         for doc in document_list:
             if doc.judgment > 0:
-                rel_text_list.append('{0} {1}'.format(doc.title, doc.content))
+                rel_text_list.append(html_to_text('{0} {1}'.format(doc.title, doc.content), docid=doc.doc_id))
         
-        if rel_text_list:
-            snippet_text = ' '.join(rel_text_list)
-        
-        snippet_soup = BeautifulSoup(snippet_text,'html.parser')
-        
-        return snippet_soup.get_text()
\ No newline at end of file
+        return ' '.join(rel_text_list)
\ No newline at end of file
@@ -1,9 +1,36 @@
 import abc
-from ifind.common.language_model import LanguageModel
+import functools
+from ifind.common.background_model import load_background_language_model
+from simiir.utils.tidy import clean_html
+from simiir.utils.judgment_cache import get_judgment_cache, make_key, make_key_prefix
+
+
+def _cached_judgment(is_relevant):
+    """
+    Wraps a classifier's is_relevant() method, so that its judgments are cached (see BaseTextClassifier._judge()).
+    """
+    @functools.wraps(is_relevant)
+    def cached_is_relevant(self, document):
+        return self._judge(document, is_relevant)
+    
+    return cached_is_relevant
+
 
 class BaseTextClassifier(object):
     """
+    Judgments are cached (see simiir.utils.judgment_cache) for classifiers that declare themselves cacheable - those whose
+    judgment depends only upon their parameters, the topic, and the document. Classifiers that roll dice, or hold other
+    state, are not cacheable; nor is any classifier while it is updating its model.
     """
+    cacheable = False
+    judgment_state = ('doc_score', 'cache_judgments', '_judging', '_judgment_store', '_key_prefix')  # Attributes that are not parameters.
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        
+        if 'is_relevant' in cls.__dict__:
+            cls.is_relevant = _cached_judgment(cls.__dict__['is_relevant'])
+    
     def __init__(self, topic, user_context, stopword_file=[], background_file=[]):  # Refactor; is this the best way to pass in details?
         self._stopword_file = stopword_file
         self._background_file = background_file
@@ -12,6 +39,9 @@ class BaseTextClassifier(object):
         self.doc_score = 0.0
         self.updating = False
         self.update_method = 1
+        self._forward_index = None
+        self.cache_judgments = True
+        self._judgment_store = None
         
         if self._background_file:
             self.read_in_background(self._background_file)
@@ -24,19 +54,118 @@ class BaseTextClassifier(object):
         """
         return True
     
-    def read_in_background(self, vocab_file):
+    def __setattr__(self, name, value):
         """
-        Helper method to read in a file containing terms and construct a background language model.
+        Sets the attribute; setting a parameter (any attribute other than those in judgment_state) discards the
+        classifier's key prefix (see _judge()), so that later judgments are keyed by the new parameters.
+        """
+        super(BaseTextClassifier, self).__setattr__(name, value)
+        
+        if name not in self.judgment_state:
+            self.__dict__.pop('_key_prefix', None)
+    
+    def is_cacheable(self):
+        """
+        Returns True if the classifier's judgments can be cached: it is declared cacheable, caching has not been
+        switched off (with the cache_judgments attribute), and the classifier is not updating its model.
+        """
+        return self.cacheable and getattr(self, 'cache_judgments', True) and not self.updating
+    
+    def _judge(self, document, is_relevant):
+        """
+        Returns the judgment of the given is_relevant() method for the document - from the judgment cache, if the
+        classifier is cacheable and the document has been judged before. The document's score (doc_score) is cached
+        along with the judgment, and restored with it.
         """
-        vocab = {}
-        f = open(vocab_file, 'r')
+        if getattr(self, '_judging', False) or not self.is_cacheable():
+            return is_relevant(self, document)
         
-        for line in f:
-            tc = line.split(',')
-            vocab[tc[0]] = int(tc[1])
+        cache = get_judgment_cache()
+        store = self.judgment_store
+        prefix = self.__dict__.get('_key_prefix')
         
-        f.close()
-        self.background_language_model = LanguageModel(term_dict=vocab)
+        if prefix is None:  # The parameters and files are only examined once, until a parameter is set.
+            prefix = make_key_prefix(self, exclude=self.judgment_state)
+            self._key_prefix = prefix
+        
+        key = make_key(self, self._topic.id, document, prefix=prefix)
+        judgment = cache.get(key, store)
+        
+        if judgment is not None:
+            relevant, self.doc_score = judgment
+            return relevant
+        
+        self._judging = True  # An is_relevant() that calls an overridden is_relevant() is only cached once.
+        
+        try:
+            relevant = is_relevant(self, document)
+        finally:
+            self._judging = False
+        
+        cache.put(key, (relevant, self.doc_score), store)
+        return relevant
+    
+    @property
+    def judgment_store(self):
+        """
+        The (optional) JudgmentStore in which judgments are kept on disk, so that they persist across runs.
+        """
+        return getattr(self, '_judgment_store', None)
+    
+    @judgment_store.setter
+    def judgment_store(self, value):
+        """
+        Sets the judgment store; value may be a JudgmentStore, or the filename of one (e.g. from a configuration attribute).
+        An empty value keeps judgments in memory only.
+        """
+        if isinstance(value, str):
+            from simiir.utils.judgment_cache import open_judgment_store
+            value = open_judgment_store(value) if value else None
+        
+        self._judgment_store = value
+    
+    @property
+    def forward_index(self):
+        """
+        The (optional) memory-mapped ForwardIndex from which the terms of documents are read.
+        """
+        return getattr(self, '_forward_index', None)
+    
+    @forward_index.setter
+    def forward_index(self, value):
+        """
+        Sets the forward index; value may be a ForwardIndex, or the filename of one (e.g. from a configuration attribute).
+        An empty value disables the index.
+        """
+        if isinstance(value, str):
+            from simiir.search.forward_index import open_forward_index
+            value = open_forward_index(value) if value else None
+        
+        self._forward_index = value
+    
+    def _get_terms(self, document, field):
+        """
+        Returns clean_html() of the given field ('title' or 'content') of the document.
+        The terms are read from the forward index if one is set and it holds the document - and the field's text is the
+        text the index was built from (so snippets, and modified documents, are still tokenised from their own text).
+        Otherwise the field's text is cleaned, memoised under the document's docid.
+        """
+        text = getattr(document, field)
+        index = self.forward_index
+        
+        if index is not None:
+            terms = index.get_terms(document.doc_id, field, text=text)
+            
+            if terms is not None:
+                return terms
+        
+        return clean_html(text, docid=getattr(document, 'doc_id', None))
+    
+    def read_in_background(self, vocab_file):
+        """
+        Helper method to read in a file containing terms and construct a background language model.
+        """
+        self.background_language_model = load_background_language_model(vocab_file)
 
 
     def update_model(self, user_context):
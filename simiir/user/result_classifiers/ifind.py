@@ -3,6 +3,8 @@ from ifind.common.language_model import LanguageModel
 from ifind.common.query_generation import SingleQueryGeneration
 from ifind.common.smoothed_language_model import SmoothedLanguageModel
 from simiir.user.result_classifiers.base import BaseTextClassifier
+from simiir.utils.term_scores import TermScoreTable
+from simiir.utils.lm_methods import RelevantTermCounts
 import logging
 
 log = logging.getLogger('ifind_classifer.IFindTextClassifier')
@@ -12,6 +14,8 @@ class IFindTextClassifier(BaseTextClassifier):
     """
     
     """
+    cacheable = True  # Unless updating (see BaseTextClassifier.is_cacheable()).
+    
     def __init__(self, topic, user_context, stopword_file=[], background_file=[]):
         """
         
@@ -19,6 +23,8 @@ class IFindTextClassifier(BaseTextClassifier):
         super(IFindTextClassifier, self).__init__(topic, user_context, stopword_file, background_file)
         self.threshold = 0.0
         self.mu = 100.0
+        self._term_scores = TermScoreTable()
+        self._relevant_term_counts = RelevantTermCounts(self._stopword_file)
         self.make_topic_language_model()
 
 
@@ -27,7 +33,7 @@ class IFindTextClassifier(BaseTextClassifier):
         """
         
         """
-        topic_text = '{title} {title} {title} {content}'.format(**self._topic.__dict__)
+        topic_text = '{0} {0} {0} {1}'.format(self._topic.title, self._topic.content)
 
         document_extractor = SingleQueryGeneration(minlen=3, stopwordfile=self._stopword_file)
         document_extractor.extract_queries_from_text(topic_text)
@@ -40,18 +46,14 @@ class IFindTextClassifier(BaseTextClassifier):
     
     def is_relevant(self, document):
         """
-        
+        Scores the document as the mean term score of its title and content.
+        Term scores are looked up from a table that is only recomputed when the language models change.
         """
-        score = 0.0
-        count = 0.0
-        
-        for term in document.title.split(' '):
-            score = score + self.__get_term_score(term)
-            count = count + 1.0
+        terms = document.title.split(' ') + document.content.split(' ')
+        key = (self.topic_language_model, self.background_language_model)
         
-        for term in document.content.split(' '):
-            score = score + self.__get_term_score(term)
-            count = count + 1.0
+        score = self._term_scores.get_total_score(terms, key, self.__get_term_score)
+        count = float(len(terms))
 
         self.doc_score = (score/count)
         if self.doc_score > self.threshold:
@@ -82,30 +84,22 @@ class IFindTextClassifier(BaseTextClassifier):
             else:
                 document_list = user_context.get_all_examined_snippets()
 
-            # iterate through document_list, pull out relevant snippets / text
-            rel_text_list = []
-            for doc in document_list:
-                if doc.judgment > 0:
-                    rel_text_list.append('{0} {1}'.format(doc.title, doc.content))
-            if rel_text_list:
-                self.__update_topic_language_model(rel_text_list)
-                return True
-            else:
-                return False
-
-    def __update_topic_language_model(self, text_list):
+            # Count the terms of the relevant snippets / documents examined since the last update;
+            # the topic language model is only rebuilt if new relevant text has been seen.
+            if self._relevant_term_counts.update(document_list):
+                self.__update_topic_language_model(self._relevant_term_counts.get_counts())
+            
+            return self._relevant_term_counts.get_relevant_count() > 0
 
-        topic_text =  '{title} {title} {title} {content}'.format(**self._topic.__dict__)
+    def __update_topic_language_model(self, document_term_counts):
 
-        n = len(text_list)
-        snippet_text = ' '.join(text_list)
+        topic_text =  '{0} {0} {0} {1}'.format(self._topic.title, self._topic.content)
 
         term_extractor = SingleQueryGeneration(minlen=3, stopwordfile=self._stopword_file)
         term_extractor.extract_queries_from_text(topic_text)
         topic_term_counts = term_extractor.query_count
 
-        term_extractor.extract_queries_from_text(snippet_text)
-        new_text_term_counts = term_extractor.query_count
+        new_text_term_counts = document_term_counts
 
         for term in topic_term_counts:
             if term in new_text_term_counts:
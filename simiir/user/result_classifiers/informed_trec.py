@@ -12,6 +12,8 @@ class InformedTrecTextClassifier(BaseInformedTrecTextClassifier):
     A concrete implementation of BaseInformedTrecTextClassifier.
     No dice rolling here. What ever is in the judgement file is used.
     """
+    cacheable = False  # Looking the judgment up in the qrels is cheaper than computing a cache key.
+
     def __init__(self, topic, user_context, qrel_file):
         """
         Initialise an instance of the InformedTrecTextClassifier.
@@ -3,7 +3,6 @@
 
 from simiir.user.result_classifiers.base import BaseTextClassifier
 from simiir.user.utils.langchain_wrapper import LangChainWrapper
-from simiir.utils.tidy import clean_html
 from langchain_core.prompts import PromptTemplate
 from langchain.output_parsers import ResponseSchema, StructuredOutputParser
 
@@ -32,13 +31,21 @@ class LangChainTextClassifier(BaseTextClassifier):
     Prompts have four available variables to be used: the topic title ({topic_title}), the topic
     description ({topic_description}), the document (or snippet) title ({doc_title}), and 
     the document (or snippet) contents ({doc_content}).
+
+    Judgments are only cached when the temperature is 0, when the LLM's response to a prompt is (near enough) deterministic.
     """
+    cacheable = True
+
     def __init__(self, topic, user_context, prompt_file, result_type_str, provider = 'ollama', model = 'mistral', temperature = 0.0, verbose = False):
         """
 
         """
         super(LangChainTextClassifier, self).__init__(topic, user_context)
         self.updating = False
+        self._result_type = result_type_str
+        self._provider = provider
+        self._model = model
+        self._temperature = temperature
         prompt_template = ""
         with open(prompt_file,'r') as prompt:
             prompt_template = prompt.read()
@@ -58,11 +65,17 @@ class LangChainTextClassifier(BaseTextClassifier):
         
         self._llm = LangChainWrapper(self._prompt, provider, model, temperature, verbose)
 
+    def is_cacheable(self):
+        """
+        Judgments are only cached when the temperature is 0.
+        """
+        return super(LangChainTextClassifier, self).is_cacheable() and float(self._temperature) == 0.0
+
     def is_relevant(self, document):
         """
         """
-        doc_title = " ".join(clean_html(document.title))
-        doc_content = " ".join(clean_html(document.content))
+        doc_title = " ".join(self._get_terms(document, 'title'))
+        doc_content = " ".join(self._get_terms(document, 'content'))
         topic_title = self._topic.title
         topic_description  = self._topic.content
 
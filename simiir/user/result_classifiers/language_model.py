@@ -4,8 +4,8 @@ from ifind.common.language_model import LanguageModel
 from ifind.common.query_generation import SingleQueryGeneration
 from simiir.user.result_classifiers.base import BaseTextClassifier
 from ifind.common.smoothed_language_model import SmoothedLanguageModel
-from simiir.utils.tidy import clean_html
-from simiir.utils.lm_methods import extract_term_dict_from_text
+from simiir.utils.lm_methods import extract_term_dict_from_text, RelevantTermCounts
+from simiir.utils.term_scores import TermScoreTable
 import logging
 
 log = logging.getLogger('lm_classifer.LMTextClassifier')
@@ -15,6 +15,8 @@ class LMTextClassifier(BaseTextClassifier):
     """
 
     """
+    cacheable = True  # Unless updating (see BaseTextClassifier.is_cacheable()).
+
     def __init__(self, topic, user_context, stopword_file=[], background_file=[]):
         """
 
@@ -29,6 +31,8 @@ class LMTextClassifier(BaseTextClassifier):
         self.updating = False
         self.title_weight = 1
         self.title_only = False
+        self._term_scores = TermScoreTable()
+        self._relevant_term_counts = RelevantTermCounts(self._stopword_file)
         self.make_topic_language_model()
 
 
@@ -71,31 +75,26 @@ class LMTextClassifier(BaseTextClassifier):
             else:
                 document_list = user_context.get_all_examined_snippets()
 
-            # iterate through document_list, pull out relevant snippets / text
-            rel_text_list = []
-            for doc in document_list:
-                if doc.judgment > 0:
-                    rel_text_list.append('{0} {1}'.format(doc.title, doc.content))
-            if rel_text_list:
-                self._update_topic_language_model(rel_text_list)
-                return True
-            else:
-                return False
+            # Count the terms of the relevant snippets / documents examined since the last update;
+            # the topic language model is only rebuilt if new relevant text has been seen.
+            if self._relevant_term_counts.update(document_list):
+                self._update_topic_language_model(self._relevant_term_counts.get_counts())
+            
+            return self._relevant_term_counts.get_relevant_count() > 0
 
         return False
 
-    def _update_topic_language_model(self, text_list):
-        topic_text = self._make_topic_text(document_text=text_list)
-
-        n = len(text_list)
-        snippet_text = ' '.join(text_list)
+    def _update_topic_language_model(self, document_term_counts):
+        """
+        Rebuilds the topic language model from the topic text and the given term counts of the relevant text seen so far.
+        """
+        topic_text = self._make_topic_text()
 
         term_extractor = SingleQueryGeneration(minlen=3, stopwordfile=self._stopword_file)
         term_extractor.extract_queries_from_text(topic_text)
         topic_term_counts = term_extractor.query_count
 
-        term_extractor.extract_queries_from_text(snippet_text)
-        new_text_term_counts = term_extractor.query_count
+        new_text_term_counts = document_term_counts
 
         for term in topic_term_counts:
             if term in new_text_term_counts:
@@ -113,22 +112,17 @@ class LMTextClassifier(BaseTextClassifier):
 
     def is_relevant(self, document):
         """
-
+        Scores the document as the mean term score of its title (and content, unless title_only is set).
+        Term scores are looked up from a table that is only recomputed when the language models or parameters change.
         """
-        score = 0.0
-        count = 0.0
-        
-        title_stripped = clean_html(document.title)
-        content_stripped = clean_html(document.content)
-        
-        for term in title_stripped:
-            score = score + self.get_term_score(term)
-            count = count + 1.0
+        title_stripped = self._get_terms(document, 'title')
+        terms = title_stripped
         
         if not self.title_only:
-            for term in content_stripped:
-                score = score + self.get_term_score(term)
-                count = count + 1.0
+            terms = title_stripped + self._get_terms(document, 'content')
+        
+        score = self._term_scores.get_total_score(terms, self._get_term_score_key(), self.get_term_score)
+        count = float(len(terms))
         
         self.doc_score = (score/count)
         if self.doc_score > self.threshold:
@@ -136,6 +130,12 @@ class LMTextClassifier(BaseTextClassifier):
         
         return False
     
+    def _get_term_score_key(self):
+        """
+        Returns a tuple of everything the term scores depend upon; when any of these change, the scores are recomputed.
+        """
+        return (self.topic_language_model, self.background_language_model, self.method, self.lam, self.mu, self.alpha)
+    
     def get_term_score(self, term):
         """
         Returns a probability score for the given term when considering both the background and topic language models.
@@ -40,16 +40,14 @@ class TopicBasedLMTextClassifier(LMTextClassifier):
 
         log.debug("Making topic {0}".format(self._topic.id))
 
-    def _update_topic_language_model(self, text_list):
+    def _update_topic_language_model(self, document_term_counts):
         """
-        Updates the language model for the topic, given snippet/document text (text_list) and prior (knowledge) text.
+        Updates the language model for the topic, given the term counts of the relevant snippet/document text seen so far and prior (knowledge) text.
         """
         topic_text = self._make_topic_text()
-        document_text = ' '.join(text_list)
         
         topic_term_counts = extract_term_dict_from_text(topic_text, self._stopword_file)
         background_scores = self._topic.background_terms
-        document_term_counts = extract_term_dict_from_text(document_text, self._stopword_file)
         
         combined_term_counts = {}
         combined_term_counts = self._combine_dictionaries(combined_term_counts, topic_term_counts, self.topic_weighting)
@@ -5,6 +5,8 @@ class PerfectTrecTextClassifier(StochasticInformedTrecTextClassifier):
     """
     A simple text classifier that only judges items as relevant if they are actually TREC relevant.
     """
+    cacheable = False  # Looking the judgment up in the qrels is cheaper than computing a cache key.
+    
     def __init__(self, topic, user_context, qrel_file, host=None, port=0):
         super(StochasticInformedTrecTextClassifier, self).__init__(topic, user_context, qrel_file, host=None, port=0)
     
@@ -2,7 +2,7 @@ __author__ = 'leif'
 
 
 import abc
-from random import Random
+from simiir.utils.random_streams import RandomStream
 from simiir.user.result_classifiers.base_informed_trec import BaseInformedTrecTextClassifier
 from ifind.seeker.trec_qrel_handler import TrecQrelHandler
 
@@ -14,7 +14,12 @@ class StochasticInformedTrecTextClassifier(BaseInformedTrecTextClassifier):
 
     rprob and nprob are set to 1.0 by default, so that the classifier is deterministic,
     i.e. it always clicks or judges relevant
+
+    The dice roll for a judgment depends only upon the seed, topic, user, and the action (snippet or document) and docid
+    being judged - not upon how many judgments were made before it (see simiir.utils.random_streams).
     """
+    cacheable = False  # Each judgment rolls the dice.
+
     def __init__(self, topic, user_context, qrel_file, rprob=1.0, nprob=1.0, base_seed=0, host=None, port=0):
         """
 
@@ -25,8 +30,7 @@ class StochasticInformedTrecTextClassifier(BaseInformedTrecTextClassifier):
         self._nrel_prob = nprob
 
         
-        self.__random = Random()
-        self.__random.seed(base_seed + 256)
+        self.__random = RandomStream(base_seed, 'StochasticInformedTrecTextClassifier')
 
     @abc.abstractmethod
     def is_relevant(self, document):
@@ -34,7 +38,7 @@ class StochasticInformedTrecTextClassifier(BaseInformedTrecTextClassifier):
         Rolls the dice, and decides whether a relevant document stays relevant or not (and similarly for a non-relevant).
         """
         val = self._get_judgment(self._topic.id, document.doc_id)
-        dp = self.__random.random()
+        dp = self.__random.random(self._user_context, self._user_context.get_last_action(), document.doc_id)
 
 
         #print(self._rel_prob, self._nrel_prob, dp, val)
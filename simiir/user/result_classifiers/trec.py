@@ -10,6 +10,8 @@ class TrecTextClassifier(BaseTextClassifier):
     """
 
     """
+    cacheable = False  # Every judgment is True; there is nothing to save.
+
     def __init__(self, topic, user_context, stopword_file=[], background_file=[]):
         """
 
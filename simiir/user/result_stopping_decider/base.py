@@ -14,4 +14,11 @@ class BaseDecisionMaker(object):
         Abstract method - must be implemented by an inheriting class.
         Returns an action - from the loggers.Actions enum.
         """
-        pass
\ No newline at end of file
+        pass
+    
+    def get_max_depth(self):
+        """
+        Returns the maximum number of results (from the top of a SERP) this decision maker could require for a query,
+        or None if there is no such limit. Used as a hint to retrieve fewer results.
+        """
+        return None
\ No newline at end of file
@@ -1,5 +1,5 @@
 from simiir.user.loggers import Actions
-from lxml.html.clean import Cleaner
+from ifind.common.markup import html_to_text
 from utils import difference_methods
 from simiir.user.result_stopping_decider.base import BaseDecisionMaker
 
@@ -53,18 +53,18 @@ class DifferenceDecisionMaker(BaseDecisionMaker):
         current_snippet.title = current_snippet.title.encode('utf-8', errors='ignore')
         current_snippet.content = current_snippet.content.encode('utf-8', errors='ignore')
                 
-        new_text = "{0} {1}".format(current_snippet.title, self.__clean_markup(current_snippet.content))
+        new_text = "{0} {1}".format(current_snippet.title, self.__clean_markup(current_snippet.content, current_snippet.doc_id))
 
         for snippet in remaining_snippets:
             seen_text = ''.join([i if ord(i) < 128 else ' ' for i in seen_text])
             snippet.title = ''.join([i if ord(i) < 128 else ' ' for i in snippet.title])
             snippet.content = ''.join([i if ord(i) < 128 else ' ' for i in snippet.content])
             
-            seen_text = "{0} {1} {2}".format(seen_text, snippet.title, self.__clean_markup(snippet.content))
+            seen_text = "{0} {1} {2}".format(seen_text, snippet.title, self.__clean_markup(snippet.content, snippet.doc_id))
         
         topic = self._user_context.get_topic()
-        seen_text = "{0} {1} {2}".format(seen_text, topic.title, self.__clean_markup(snippet.content))
-        seen_text = "{0} {1} {2}".format(seen_text, topic.content, self.__clean_markup(snippet.content))
+        seen_text = "{0} {1} {2}".format(seen_text, topic.title, self.__clean_markup(snippet.content, snippet.doc_id))
+        seen_text = "{0} {1} {2}".format(seen_text, topic.content, self.__clean_markup(snippet.content, snippet.doc_id))
 
         score = self.__decision_maker.difference(new_text,seen_text)
         #print "diff", score
@@ -80,17 +80,15 @@ class DifferenceDecisionMaker(BaseDecisionMaker):
         return Actions.SNIPPET  #  Different enough, so proceed to examine the next snippet.
 
     
-    def __clean_markup(self, string_repr):
+    def __clean_markup(self, string_repr, docid=None):
         """
         Given a string representation of a document or snippet, removes all HTML markup and returns it, cleaned.
+        Entities are decoded; the text of each snippet is memoised under its docid (see ifind.common.markup).
         """
         if string_repr == "":
             return string_repr
         
-        cleaner = Cleaner(allow_tags=[''], remove_unknown_tags=False)
-        cleaned_text = cleaner.clean_html(string_repr)
-        
-        return cleaned_text[5:][:-6]  # Removes the extra <div>...</div> that is added
+        return html_to_text(string_repr, docid=docid)
     
     def __get_stopwords_list(self, stopwords_filename):
         """
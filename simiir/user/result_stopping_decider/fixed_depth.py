@@ -18,4 +18,11 @@ class FixedDepthDecisionMaker(BaseDecisionMaker):
         if self._user_context.get_current_serp_position() < self.__depth:
             return Actions.SNIPPET
         
-        return Actions.QUERY
\ No newline at end of file
+        return Actions.QUERY
+    
+    def get_max_depth(self):
+        """
+        The user never looks beyond depth snippets. One further result is required so that the end of the SERP
+        is not considered to be reached (and logged) any earlier than with the full result list.
+        """
+        return self.__depth + 1
\ No newline at end of file
@@ -31,16 +31,9 @@ class IftBasedDecisionMaker(BaseDecisionMaker):
         if self._user_context.get_current_serp_position() <  self.__rank_threshold:
             return Actions.SNIPPET
         
-        dis_cum_gain = 0.0
-        pos = 0.0
-        examined_snippets = self._user_context.get_examined_snippets()
-        
-        for snippet in examined_snippets:
-            pos = pos + 1.0
-            j = float(snippet.judgment)
-            if j <0:
-                j = 0
-            dis_cum_gain += (j)*(1.0/(pos**self.__discount))
+        aggregates = self._user_context.get_snippet_aggregates()
+        dis_cum_gain = aggregates.get_discounted_gain(self.__discount)
+        pos = float(aggregates.count)
 
         #The average rate of gain, ie. gain per second
         total_time = (float(self.__query_time) + (float(self.__doc_time)*pos))
@@ -83,20 +76,13 @@ class Ift2BasedDecisionMaker(BaseDecisionMaker):
             return Actions.SNIPPET
 
 
-        dis_cum_gain = 0.0
-        pos = 0.0
-        examined_snippets = self._user_context.get_examined_snippets()
-        examined_docs = self._user_context.get_examined_documents()
-        for doc in examined_docs:
-            pos = pos + 1.0
-            j = float(doc.judgment)
-            if j <0:
-                j = 0
-            dis_cum_gain += (j)*(1.0/(pos**self.__discount))
+        document_aggregates = self._user_context.get_document_aggregates()
+        dis_cum_gain = document_aggregates.get_discounted_gain(self.__discount)
+        pos = float(document_aggregates.count)
 
         #The average rate of gain, ie. gain per second
-        ns = float(len(examined_snippets))
-        nd = float(len(examined_docs))
+        ns = float(self._user_context.get_snippet_aggregates().count)
+        nd = float(document_aggregates.count)
 
         total_time = self.__query_time + (nd * self.__doc_time) +(ns * self.__snip_time )
         avg_dis_cum_gain = dis_cum_gain / total_time
@@ -1,4 +1,4 @@
-from random import Random
+from simiir.utils.random_streams import RandomStream
 from simiir.user.loggers import Actions
 from simiir.user.result_stopping_decider.base import BaseDecisionMaker
 
@@ -6,6 +6,7 @@ class INSTDecisionMaker(BaseDecisionMaker):
     """
     A decision maker implementing the INST metric.
     Equations from Moffat et al. (ADCS 2015)
+    The dice roll at each rank depends only upon the seed, topic, user, query number and rank (see simiir.utils.random_streams).
     """
     def __init__(self, user_context, logger, t=5, base_seed=0):
         """
@@ -14,8 +15,7 @@ class INSTDecisionMaker(BaseDecisionMaker):
         super(INSTDecisionMaker, self).__init__(user_context, logger)
         self.__t = t
         
-        self.__random = Random()
-        self.__random.seed(base_seed + 1024)
+        self.__random = RandomStream(base_seed, 'INSTDecisionMaker')
         
     def decide(self):
         """
@@ -23,9 +23,10 @@ class INSTDecisionMaker(BaseDecisionMaker):
         should continue examining the SERP, or stop and abandon it.
         """
         examined_snippets = self._user_context.get_examined_snippets()
-        rank = len(examined_snippets) # Assumption here that the rank is == to the number of snippets examined.
+        aggregates = self._user_context.get_snippet_aggregates()
+        rank = aggregates.count # Assumption here that the rank is == to the number of snippets examined.
         
-        r_i = self.__calculate_R_i(rank, examined_snippets)
+        r_i = aggregates.gain  # The cumulative gain over all examined snippets, with unjudged content assumed to be not relevant.
         t_i = self.__calculate_T_i(r_i)
         w_i = self.__calculate_W(rank, t_i)
         
@@ -34,7 +35,7 @@ class INSTDecisionMaker(BaseDecisionMaker):
         else:
             w_1 = self.__calculate_W1(examined_snippets)
         
-        dp = self.__random.random()
+        dp = self.__random.random(self._user_context, len(self._user_context.get_issued_queries()), rank)
         
         if dp > (w_i / w_1):
             return Actions.QUERY
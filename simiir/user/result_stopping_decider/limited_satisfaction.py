@@ -33,8 +33,14 @@ class LimitedSatisfactionDecisionMaker(SatisfactionDecisionMaker):
         """
         satisfaction_decision = super(LimitedSatisfactionDecisionMaker, self).decide()
         serp_position = self._user_context.get_current_serp_position()
-        relevant_count = self.__get_relevant_count()
-        last_relevant_rank = self.__get_last_relevant_rank()
+        
+        if self.__consider_documents:
+            aggregates = self._user_context.get_document_aggregates()
+        else:
+            aggregates = self._user_context.get_snippet_aggregates()
+        
+        relevant_count = aggregates.relevant  # Snippets/documents judged relevant for the current query.
+        last_relevant_rank = aggregates.last_relevant_rank  # The rank of the last relevant snippet/document; 0 if there are none.
         
         # If we are on the first SERP page, return the satisfaction decision.
         if serp_position < self.__serp_size:
@@ -47,50 +53,3 @@ class LimitedSatisfactionDecisionMaker(SatisfactionDecisionMaker):
             return Actions.QUERY
         
         return satisfaction_decision
-    
-    def __get_relevant_count(self):
-        """
-        Returns a count of the number of snippets/documents that have been judged relevant for the current query.
-        """
-        count = 0
-        
-        if self.__consider_documents:
-            items = self._user_context.get_examined_documents()
-        else:
-            items = self._user_context.get_examined_snippets()
-        
-        for item in items:
-            if item.judgment > 0:
-                count = count + 1
-        
-        return count
-    
-    def __get_last_relevant_rank(self):
-        """
-        What was the rank of the last snippet/document considered relevant?
-        If no documents have been marked, 0 is returned.
-        """
-        serp_order = self._user_context.get_current_results()
-        last_rank = 0
-        rank = 1
-        
-        if self.__consider_documents:
-            items = self._user_context.get_examined_documents()
-        else:
-            items = self._user_context.get_examined_snippets()
-        
-        for item in items:
-            item_doc_id = item.doc_id
-            item_rank = 0
-            i = 1
-            
-            for res in serp_order:
-                if res.docid == item_doc_id:
-                    item_rank = i
-                
-                i = i + 1
-            
-            if item.judgment > 0:
-                last_rank = item_rank
-        
-        return last_rank
\ No newline at end of file
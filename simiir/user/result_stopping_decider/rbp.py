@@ -1,4 +1,4 @@
-from random import Random
+from simiir.utils.random_streams import RandomStream
 from simiir.user.loggers import Actions
 from simiir.user.result_stopping_decider.base import BaseDecisionMaker
 
@@ -6,6 +6,7 @@ class RBPDecisionMaker(BaseDecisionMaker):
     """
     An implementation of Rank-Biased Precision, operationalised as a stopping strategy. Uses a stochastic roll of the dice to determine
     if a searcher continues or not. Implemented as per Moffat and Zobel (2008).
+    The dice roll at each rank depends only upon the seed, topic, user, query number and rank (see simiir.utils.random_streams).
     """
     def __init__(self, user_context, logger, patience=0.5, base_seed=0):
         """
@@ -15,8 +16,7 @@ class RBPDecisionMaker(BaseDecisionMaker):
         super(RBPDecisionMaker, self).__init__(user_context, logger)
         self.__patience = patience
         
-        self.__random = Random()
-        self.__random.seed(base_seed + 1024)
+        self.__random = RandomStream(base_seed, 'RBPDecisionMaker')
         
     def decide(self):
         """
@@ -25,7 +25,7 @@ class RBPDecisionMaker(BaseDecisionMaker):
         """
         rank = self._user_context.get_current_serp_position()
         rbp_score = self.__patience ** (rank - 1)
-        dp = self.__random.random()
+        dp = self.__random.random(self._user_context, len(self._user_context.get_issued_queries()), rank)
         
         if dp > rbp_score:
             return Actions.QUERY
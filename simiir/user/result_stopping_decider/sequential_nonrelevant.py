@@ -15,18 +15,8 @@ class SequentialNonrelDecisionMaker(BaseDecisionMaker):
         If the user's current position in the current SERP is < the maximum depth, look at the next snippet in the SERP.
         Otherwise, a new query should be issued.
         """
-        counter = 0
-        examined_snippets = self._user_context.get_examined_snippets()
-        
-        for snippet in examined_snippets:
-            judgment = snippet.judgment
-            
-            if judgment == 0:
-                counter = counter + 1
-                
-                if counter == self.__nonrelevant_threshold:
-                    return Actions.QUERY
-            else:
-                counter = 0  # Break the sequence; found something relevant, reset the counter.
+        # The longest sequence of nonrelevant snippets seen for this query; anything other than a nonrelevant judgment breaks a sequence.
+        if self._user_context.get_snippet_aggregates().max_nonrelevant_run >= self.__nonrelevant_threshold:
+            return Actions.QUERY
         
         return Actions.SNIPPET
\ No newline at end of file
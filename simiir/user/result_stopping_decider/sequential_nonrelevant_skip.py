@@ -15,34 +15,9 @@ class SequentialNonrelDecisionMakerSkip(BaseDecisionMaker):
         If the user's current position in the current SERP is < the maximum depth, look at the next snippet in the SERP.
         Otherwise, a new query should be issued.
         """
-        counter = 0
-        examined_snippets = self._user_context.get_examined_snippets()
-        previous = []
+        # The longest sequence of nonrelevant snippets for this query, skipping over documents already judged nonrelevant for the query.
+        # The sequence is reset when we have seen a relevant document! Either seen previously or not seen previously.
+        if self._user_context.get_snippet_aggregates().max_new_nonrelevant_run >= self.__nonrelevant_threshold:
+            return Actions.QUERY
         
-        for snippet in examined_snippets:
-            judgment = snippet.judgment
-            
-            if judgment == 0:
-                if self.__get_previous_judgment(previous, snippet) != 0:
-                    counter = counter + 1
-
-                    if counter == self.__nonrelevant_threshold:
-                        return Actions.QUERY
-            else:
-                # Reset the counter; we have seen a relevant document! Either seen previously or not seen previously.
-                counter = 0
-            
-            previous.append(snippet)
-        
-        return Actions.SNIPPET
-        
-    def __get_previous_judgment(self, previously_seen, snippet):
-        """
-        Looking through the list of previously examined snippets, returns the judgment for that snippet.
-        If the snippet has not been seen before, -1 is returned.
-        """
-        for previous_snippet in previously_seen:
-            if previous_snippet.doc_id == snippet.doc_id:
-                return previous_snippet.judgment
-
-        return -1
\ No newline at end of file
+        return Actions.SNIPPET
\ No newline at end of file
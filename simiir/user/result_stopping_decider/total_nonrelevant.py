@@ -15,19 +15,11 @@ class TotalNonrelDecisionMaker(BaseDecisionMaker):
         If the user's current position in the current SERP is < the maximum depth, look at the next snippet in the SERP.
         Otherwise, a new query should be issued.
         """
-        counter = 0
-        examined_snippets = self._user_context.get_examined_snippets()
-        
         # If the judgment for a snippet is -1, then it was seen previously and was therefore not judged - so we should skip it.
+        counter = self._user_context.get_snippet_aggregates().nonrelevant
         
-        for snippet in examined_snippets:
-            judgment = snippet.judgment
-            
-            if judgment == 0:
-                counter = counter + 1  # Found something nonrelevant; increment counter
-
-                if counter == self.__nonrelevant_threshold:
-                    return Actions.QUERY
+        if counter >= self.__nonrelevant_threshold:
+            return Actions.QUERY
 
         # If we get here, we are okay - so we examine the next snippet.
         return Actions.SNIPPET
\ No newline at end of file
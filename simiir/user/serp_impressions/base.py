@@ -99,6 +99,13 @@ class BaseSERPImpression(object):
         return judgements
     
     
+    def get_required_depth(self):
+        """
+        Returns the number of results that this component examines on a SERP (the viewport).
+        """
+        return self.viewport_size
+    
+    
     def _set_query_patch_type(self, patch_type):
         """
         Gets the current query from the search context, and adds the computed patch type to it.
@@ -1,4 +1,4 @@
-from random import Random
+from simiir.utils.random_streams import RandomStream
 from simiir.user.serp_impressions.base import BaseSERPImpression
 
 class StochasticSERPImpression(BaseSERPImpression):
@@ -7,6 +7,7 @@ class StochasticSERPImpression(BaseSERPImpression):
     Works out the judged precision. If the precision is less than a certain threshold,
     we roll the dice (bad_abandon_probability) -- and if it is above, we also roll the
     dice (good_abandon_probability).
+    The dice roll for a SERP depends only upon the seed, topic, user and query number (see simiir.utils.random_streams).
     """
     def __init__(self,
                  user_context,
@@ -26,8 +27,7 @@ class StochasticSERPImpression(BaseSERPImpression):
         self.__bad_abandon_probability = bad_abandon_probability
         self.__viewport_precision_threshold = viewport_precision_threshold
         
-        self.__random = Random()
-        self.__random.seed(base_seed + 0)
+        self.__random = RandomStream(base_seed, 'StochasticSERPImpression')
     
     
     def is_serp_attractive(self):
@@ -44,7 +44,7 @@ class StochasticSERPImpression(BaseSERPImpression):
         # Now work out whether we enter the SERP or not.
         # Again, we use the TREC QREL judgements here (is that correct, should this be rolled, too? So confusing.).
         judged_precision = sum(judgements) / float(len(judgements))
-        die_roll = self.__random.random()
+        die_roll = self.__random.random(self._user_context, len(self._user_context.get_issued_queries()))
         
         # Work out whether the SERP should be considered attractive or not here.
         threshold = self.__bad_abandon_probability
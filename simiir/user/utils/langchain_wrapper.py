@@ -33,6 +33,12 @@ class LangChainWrapper(object):
       self._prompt = prompt
       self._chain = self._prompt | self._llm
 
+   def __deepcopy__(self, memo):
+      """
+      The LLM client holds no simulation state, so it is shared (not copied) when a simulated user is snapshotted or forked.
+      """
+      return self
+
    @retry(wait=wait_exponential(multiplier=1,min=1,max=5), stop=stop_after_attempt(10))
    def generate_response(self, output_parser, params, response_schema):
       """
@@ -1,6 +1,6 @@
 import abc
 import logging
-import random
+from simiir.utils.random_streams import RandomStream
 
 log = logging.getLogger('utterance_generators.base_generator')
 
@@ -8,8 +8,10 @@ class BaseUtteranceGenerator(object):
     """
     The base Utterance generator class.
     You can use this to inherit from to make your own query generator
+    The utterance chosen depends only upon the seed, topic, user and utterance number (see simiir.utils.random_streams).
     """
-    def __init__(self):
+    def __init__(self, base_seed=0):
+        self._random = RandomStream(base_seed, 'BaseUtteranceGenerator')
         self._utterance_list = [
             'What is information retrieval?',
             'What is a search engine?',
@@ -52,7 +54,7 @@ class BaseUtteranceGenerator(object):
         
         # randomly select a utterances from the self._utterance_list
         # randomly select an item from the list
-        candidate_utterance = random.choice(self._utterance_list)
+        candidate_utterance = self._random.choice(self._utterance_list, user_context, len(issued_utterance_list))
 
         return candidate_utterance
             
\ No newline at end of file
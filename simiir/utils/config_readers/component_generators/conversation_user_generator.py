@@ -20,6 +20,7 @@ class ConversationUserComponentGenerator(BaseComponentGenerator):
                                                                      ('output_controller', self.__simulation_components.output),
                                                                      ('topic', self.__simulation_components.topic),
                                                                     ])
+        self.user_context.user_id = self.id  # Identifies the user's random draws (see simiir.utils.random_streams).
 
         self.logger = self._get_object_reference(config_details=self._config_dict['logger'],
                                                          package='user.loggers',
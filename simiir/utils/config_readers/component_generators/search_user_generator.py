@@ -26,6 +26,7 @@ class SearchUserComponentGenerator(BaseComponentGenerator):
                                                                      ('output_controller', self.__simulation_components.output),
                                                                      ('topic', self.__simulation_components.topic),
                                                                     ])
+        self.user_context.user_id = self.id  # Identifies the user's random draws (see simiir.utils.random_streams).
         
         # Create the user's snippet classifier.
         self.snippet_classifier = self._get_object_reference(config_details=self._config_dict['textClassifiers']['snippetClassifier'],
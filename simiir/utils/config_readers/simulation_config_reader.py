@@ -2,6 +2,7 @@ from itertools import product
 from simiir.utils.config_readers import ConfigReaderError
 from simiir.utils.config_readers.base_config_reader import BaseConfigReader
 from simiir.utils.config_readers import parse_boolean, empty_string_check, filesystem_exists_check, check_attributes
+from simiir.utils.data_handlers import set_qrels_topics, set_qrels_cache_dir
 
 class SimulationConfigReader(BaseConfigReader):
     """
@@ -16,6 +17,12 @@ class SimulationConfigReader(BaseConfigReader):
         self.__iterables = ['topics', 'users']
         
         self.__calculate_iterations()
+        
+        # Qrels handlers need only read the judgements for the topics being simulated up front.
+        set_qrels_topics(self.get_topic_ids())
+        
+        # Compiled qrels are only cached on disk if a cache directory is given.
+        set_qrels_cache_dir(self._config_dict['output']['@qrelsCacheDirectory'])
     
     def __iter__(self):
         """
@@ -28,7 +35,24 @@ class SimulationConfigReader(BaseConfigReader):
         Returns the base directory for the simulations as a string.
         """
         return self._config_dict['output']['@baseDirectory']
-    
+
+    def get_topic_ids(self):
+        """
+        Returns a list of the IDs of the topics to be simulated.
+        """
+        topics = self._config_dict['topics']['topic']
+        
+        if type(topics) != list:
+            topics = [topics]
+        
+        return [topic['@id'] for topic in topics]
+
+    def get_search_interface_config(self):
+        """
+        Returns the (validated) configuration dictionary for the search interface.
+        """
+        return self._config_dict['searchInterface']
+
     def __next__(self):
         """
         Acts as an interator - returns the next set of components for next iteration of the simulation.
@@ -101,6 +125,11 @@ class SimulationConfigReader(BaseConfigReader):
         self._config_dict['output']['@saveRelevanceJudgments'] = parse_boolean(self._config_dict['output']['@saveRelevanceJudgments'])
         self._config_dict['output']['@trec_eval'] = parse_boolean(self._config_dict['output']['@trec_eval'])
         
+        if '@qrelsCacheDirectory' in self._config_dict['output']:  # A compiled qrels cache directory was specified.
+            empty_string_check(self._config_dict['output']['@qrelsCacheDirectory'])
+        else:
+            self._config_dict['output']['@qrelsCacheDirectory'] = None  # Qrels files are read directly.
+        
         # Topics
         def check_topic(t):
             """
@@ -2,11 +2,7 @@ __author__ = 'David'
 __version__ = 2
 
 
-import os
-import redis
-import base64
-import pickle as cPickle
-from ifind.seeker.trec_qrel_handler import TrecQrelHandler
+from ifind.seeker.compiled_qrels import load_qrels, get_cached_qrels
 
 
 #
@@ -16,11 +12,53 @@ from ifind.seeker.trec_qrel_handler import TrecQrelHandler
 #
 
 
-def get_data_handler(filename=None, host=None, port=None, key_prefix=None):
+#
+# The topics being simulated, as set by the SimulationConfigReader.
+# When set, data handlers only parse the judgements for these topics (and the fallback topic) up front.
+#
+_qrels_topics = None
+_qrels_cache_dir = None
+
+
+def set_qrels_topics(topic_ids):
+    """
+    Sets the list of topic IDs that data handlers created from now on should load up front.
+    Judgements for other topics are loaded on first access. Supply None to load every topic up front.
+    """
+    global _qrels_topics
+    _qrels_topics = list(topic_ids) if topic_ids is not None else None
+
+
+def get_qrels_topics():
+    """
+    Returns the list of topic IDs to load up front, or None if every topic should be loaded up front.
+    """
+    return _qrels_topics
+
+
+def set_qrels_cache_dir(cache_dir):
+    """
+    Sets the directory of the compiled qrels cache used by get_data_handler() when no cache directory is supplied.
+    The cache is opt-in: supply None (the default) to read qrels files directly, through a FileDataHandler.
+    """
+    global _qrels_cache_dir
+    _qrels_cache_dir = cache_dir
+
+
+def get_qrels_cache_dir():
+    """
+    Returns the directory of the compiled qrels cache, or None if qrels files are read without the cache.
+    """
+    return _qrels_cache_dir
+
+
+def get_data_handler(filename=None, host=None, port=None, key_prefix=None, cache_dir=None):
     """
     Factory function that returns an instance of a data handler class.
     The exact type instantiated depends upon the arguments provided to the function.
     If an invalid combination is supplied, a ValueError exception is raised.
+    Qrels files are read through the cache of compiled qrels (see CachedDataHandler) if a cache directory is supplied or set with
+    set_qrels_cache_dir(), and shared through Redis if a host is given. Otherwise, a FileDataHandler reads the qrels file directly.
     """
     if filename is None:
         raise ValueError("You need to supply a filename for a data handler to work.")
@@ -30,29 +68,55 @@ def get_data_handler(filename=None, host=None, port=None, key_prefix=None):
             raise ValueError("Please supply a host, port and key prefix for the redis handler.")
         
         # All parameters are correct for a RedisDataHandler to be constructed.
-        return RedisDataHandler(filename=filename, host=host, port=port, key_prefix=key_prefix)
+        return RedisDataHandler(filename=filename, host=host, port=port, key_prefix=key_prefix, cache_dir=cache_dir)
+    
+    if cache_dir is None:
+        cache_dir = get_qrels_cache_dir()
+    
+    if cache_dir is not None:
+        return CachedDataHandler(filename=filename, cache_dir=cache_dir)
     
     # If we get here, we will simply return a FileDataHandler.
-    # No other option exists.
     return FileDataHandler(filename=filename)
 
 
 class FileDataHandler(object):
     """
     A simple, file-based data handler.
-    Assumes that the filename provided points to a TREC QREL formatted file.
+    Assumes that the filename provided points to a TREC QREL formatted file, or to a compiled qrels file
+    (see ifind.seeker.compiled_qrels). A TREC QREL file with an up-to-date compiled counterpart alongside it
+    (i.e. <filename>.qrelsbin) is read through the compiled file.
+    Only the judgements for the topics set with set_qrels_topics() (and the fallback topic '0') are read up front.
     """
     def __init__(self, filename):
         self._trec_qrels = self._initialise_handler(filename)
     
+    def __deepcopy__(self, memo):
+        """
+        The qrels are read-only, so a data handler is shared (not copied) when a simulated user is snapshotted or forked.
+        """
+        return self
+    
     
     def _initialise_handler(self, filename):
         """
         Instantiates the data handler object.
         Override this method to instantiate a different data handler, ensuring
-        that a TrecQrelHandler is returned.
+        that a TrecQrelHandler (or CompiledQrelHandler) is returned.
         """
-        return TrecQrelHandler(filename)
+        return load_qrels(filename, topics=self._get_topics())
+    
+    
+    def _get_topics(self):
+        """
+        Returns the list of topic IDs whose judgements should be read up front, or None to read every topic.
+        """
+        topics = get_qrels_topics()
+        
+        if topics is not None:
+            topics = topics + ['0']  # The fallback topic used by get_value_fallback().
+        
+        return topics
     
     
     def get_value(self, topic_id, doc_id):
@@ -80,40 +144,44 @@ class FileDataHandler(object):
         return val
 
 
-class RedisDataHandler(FileDataHandler):
+class CachedDataHandler(FileDataHandler):
     """
-    Extends the FileDataHandler to consider a TrecQrelHandler object stored in
-    a Redis cache. If it is found that a TrecQrelHandler object does not exist for
-    the given key, a new TrecQrelHandler is instantiated using the filename given.
-    This handler is then placed in the Redis cache, ready for the next use.
+    Extends the FileDataHandler to read the qrels through a cache of compiled qrels files (see ifind.seeker.compiled_qrels),
+    keyed by the hash of the qrels file contents. The first process to use a qrels file compiles it; every later process
+    (and every later launch) maps the compiled file directly, sharing its pages, without parsing the qrels.
+    If cache_dir is None, the default cache directory (in the user's home directory) is used.
+    If the cache cannot be written, or another user could write to it, the qrels file is read as the FileDataHandler reads it.
     """
-    def __init__(self, filename, host='localhost', port=6379, key_prefix=None):
-        self._trec_qrels = self._initialise_handler(filename=filename, host=host, port=port, key_prefix=key_prefix)
+    def __init__(self, filename, cache_dir=None):
+        self._trec_qrels = self._initialise_handler(filename=filename, cache_dir=cache_dir)
     
     
-    def _initialise_handler(self, filename, host, port, key_prefix):
+    def _initialise_handler(self, filename, cache_dir=None):
         """
-        Instantiates the handler if it is not in the cache, or loads from the cache if it is.
+        Returns the compiled qrels for the given file, compiling them into the cache if they are not already present.
         """
-        
-        key = os.path.split(filename)[-1] # Is there a better way to construct a unique key?
-                                          # Perhaps take the hash *from the file contents*.
-                                          # At present, the filename seems sufficient.
+        return get_cached_qrels(filename, cache_dir=cache_dir, topics=self._get_topics())
+
+
+class RedisDataHandler(CachedDataHandler):
+    """
+    Extends the CachedDataHandler to share compiled qrels through a Redis cache.
+    Compiled qrels are stored under the key '<key_prefix>::<hash of the qrels file contents>'.
+    If they are not present in either the local cache or Redis, the qrels file is compiled and placed in both,
+    ready for the next use - on this machine or any other using the same Redis instance.
+    """
+    def __init__(self, filename, host='localhost', port=6379, key_prefix=None, cache_dir=None):
+        self._trec_qrels = self._initialise_handler(filename=filename, host=host, port=port, key_prefix=key_prefix, cache_dir=cache_dir)
+    
+    
+    def _initialise_handler(self, filename, host, port, key_prefix, cache_dir=None):
+        """
+        Loads the compiled qrels from the local cache, or from Redis if they are not cached locally, compiling them if neither has them.
+        """
+        import redis
         
         if key_prefix is None:
             raise ValueError("A key prefix (string) must be specified for the RedisDataHandler.")
         
-        key = '{key_prefix}::{hashed_key}'.format(key_prefix=key_prefix, hashed_key=hash(key))
-        
         cache = redis.StrictRedis(host=host, port=port, db=0)
-        
-        if cache.get(key):
-            dumped = cache.get(key)
-            return cPickle.loads(dumped)
-        
-        # If we get here, the TrecQrelsHandler does not exist in the cache; create it, dump it.
-        handler = super(RedisDataHandler, self)._initialise_handler(filename)
-        dumped = cPickle.dumps(handler)
-        cache.set(key, dumped)
-        
-        return handler
\ No newline at end of file
+        return get_cached_qrels(filename, cache_dir=cache_dir, remote=cache, remote_prefix=key_prefix, topics=self._get_topics())
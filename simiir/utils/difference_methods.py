@@ -4,6 +4,7 @@ import abc
 import sys
 import math
 import collections
+from ifind.common.background_model import load_background
 
 class DifferenceHelper(object):
     """
@@ -39,15 +40,9 @@ class DifferenceHelper(object):
         :param vocab_file: Given a file which is a list of (word (string) ,count (int)) pairs on newlines
         :return: a dictionary of the words and their counts
         """
-        vocab = {}
         if vocab_file:
-            f = open(vocab_file, 'r')
-            for line in f:
-                split_line=line.strip().split(',')
-                term = split_line[0]
-                count = int(split_line[1])
-                vocab[term] = count
-        return vocab
+            return load_background(vocab_file).to_dict()
+        return {}
 
 
     def _tokeniser(self, _str, stopwords=['and', 'for', 'if', 'the', 'then', 'be', 'is', 'are', 'will', 'in', 'it', 'to', 'that']):
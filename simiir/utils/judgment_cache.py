@@ -0,0 +1,296 @@
+#
+# A cache of the judgments made by result classifiers.
+# A deterministic classifier gives the same judgment for the same document whenever it sees it - in every session, and
+# for every simulated user - so each judgment need only be made once. Judgments are keyed by the classifier's class and
+# parameters, the topic, the docid and the text judged (so a snippet and its document are judged separately).
+# Parameters naming files (e.g. the qrels, stopword or background files) are keyed by the contents of the files too, so
+# judgments are not reused by a later run once a file has changed. Within a run, each classifier computes this part of
+# the key once (and again whenever one of its attributes is set), as it reads its files when it is built.
+#
+# Judgments are held in memory (in a bounded, least recently used, cache shared by every classifier in the process),
+# and optionally in a JudgmentStore - an SQLite database on disk, so that judgments persist across runs, and are shared
+# by concurrent runs using the same file. See BaseTextClassifier (in simiir.user.result_classifiers.base) for how
+# classifiers use the cache.
+#
+
+import os
+import stat
+import json
+import atexit
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from ifind.seeker.compiled_qrels import hash_file
+
+log = logging.getLogger('simuser.utils.judgment_cache')
+
+CACHE_SIZE = 65536  # The number of judgments held in memory.
+FLUSH_SIZE = 1000  # The number of new judgments a JudgmentStore holds before writing them to disk.
+
+PARAMETER_TYPES = (str, bytes, int, float, bool, type(None))
+
+
+def get_parameters(classifier, exclude=()):
+    """
+    Returns a sorted tuple of the (name, value) pairs of the classifier's parameters - every attribute of the instance
+    holding a plain value (a string, number, boolean or None, or a list or tuple of them). Objects (e.g. language models
+    or data handlers) are not parameters; they are built from the parameters, topic and files named by the parameters.
+    Attributes named in exclude (state, rather than configuration) are left out.
+    """
+    parameters = []
+
+    for name, value in vars(classifier).items():
+        if name in exclude:
+            continue
+
+        if isinstance(value, (list, tuple)):
+            if not all(isinstance(item, PARAMETER_TYPES) for item in value):
+                continue
+
+            value = tuple(value)
+        elif not isinstance(value, PARAMETER_TYPES):
+            continue
+
+        parameters.append((name, value))
+
+    parameters.sort()
+    return tuple(parameters)
+
+
+def get_file_digest(value):
+    """
+    Returns the hash of the contents of the file named by the given value, or None if the value does not name a file.
+    The hash is only recomputed when the file's size or modification time changes (see hash_file()).
+    """
+    try:
+        status = os.stat(value)
+    except (OSError, ValueError):
+        return None
+
+    if not stat.S_ISREG(status.st_mode):
+        return None
+
+    return hash_file(value)
+
+
+def get_file_digests(parameters):
+    """
+    Returns a tuple of the (name, digest) pairs of the parameters that name files; a list or tuple parameter gives a pair
+    for each item naming a file, named '<name>[<index>]'.
+    """
+    digests = []
+
+    for name, value in parameters:
+        if isinstance(value, str):
+            values = [(name, value)]
+        elif isinstance(value, tuple):
+            values = [('{0}[{1}]'.format(name, index), item) for index, item in enumerate(value) if isinstance(item, str)]
+        else:
+            continue
+
+        for item_name, item in values:
+            digest = get_file_digest(item)
+
+            if digest is not None:
+                digests.append((item_name, digest))
+
+    return tuple(digests)
+
+
+def _encode(text):
+    if text is None:
+        return b''
+
+    if isinstance(text, bytes):
+        return text
+
+    return str(text).encode('utf-8', errors='surrogatepass')
+
+
+def make_key_prefix(classifier, exclude=()):
+    """
+    Returns the digest of the classifier's class, parameters, and the contents of the files its parameters name - the part
+    of the key of each of its judgments that does not depend upon the topic or document. See make_key().
+    """
+    cls = type(classifier)
+    parameters = get_parameters(classifier, exclude=exclude)
+    return hashlib.sha1(repr(('{0}.{1}'.format(cls.__module__, cls.__qualname__),
+                              parameters,
+                              get_file_digests(parameters))).encode('utf-8', errors='surrogatepass')).digest()
+
+
+def make_key(classifier, topic_id, document, exclude=(), prefix=None):
+    """
+    Returns the key (a hex digest) of the classifier's judgment of the given document for the given topic.
+    The prefix (from make_key_prefix()) is computed if it is not supplied; classifiers keep theirs, so that their parameters
+    and files are not examined for every judgment.
+    """
+    if prefix is None:
+        prefix = make_key_prefix(classifier, exclude=exclude)
+
+    digest = hashlib.sha1(prefix)
+    digest.update(repr((topic_id, getattr(document, 'doc_id', None))).encode('utf-8', errors='surrogatepass'))
+    digest.update(b'\0')
+    digest.update(_encode(getattr(document, 'title', None)))
+    digest.update(b'\0')
+    digest.update(_encode(getattr(document, 'content', None)))
+    return digest.hexdigest()
+
+
+class JudgmentStore(object):
+    """
+    Judgments stored on disk, in an SQLite database. New judgments are written in batches (and when the store is closed,
+    or the process exits), so a store can be shared by several processes without each judgment waiting on the disk.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self._connection = sqlite3.connect(filename, timeout=60, check_same_thread=False)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        with self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS judgments (key TEXT PRIMARY KEY, judgment TEXT NOT NULL)')
+
+    def __deepcopy__(self, memo):
+        """
+        A store holds a database connection, so it is shared (not copied) when a simulated user is snapshotted or forked.
+        """
+        return self
+
+    def get(self, key):
+        """
+        Returns the (judgment, score) pair stored for the given key, or None.
+        """
+        with self._lock:
+            judgment = self._pending.get(key)
+
+            if judgment is None:
+                row = self._connection.execute('SELECT judgment FROM judgments WHERE key = ?', (key,)).fetchone()
+
+                if row is None:
+                    return None
+
+                judgment = row[0]
+
+        return tuple(json.loads(judgment))
+
+    def put(self, key, judgment):
+        """
+        Stores the (judgment, score) pair for the given key.
+        """
+        with self._lock:
+            self._pending[key] = json.dumps(list(judgment))
+
+            if len(self._pending) >= FLUSH_SIZE:
+                self._flush()
+
+    def _flush(self):
+        if self._pending:
+            with self._connection:
+                self._connection.executemany('INSERT OR REPLACE INTO judgments (key, judgment) VALUES (?, ?)', self._pending.items())
+
+            self._pending.clear()
+
+    def flush(self):
+        """
+        Writes any new judgments to disk.
+        """
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+
+
+class JudgmentCache(object):
+    """
+    A bounded, least recently used, cache of judgments, in front of an (optional) JudgmentStore.
+    """
+    def __init__(self, size=CACHE_SIZE):
+        self._size = size
+        self._judgments = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, store=None):
+        """
+        Returns the (judgment, score) pair for the given key - from memory, or else from the store - or None.
+        """
+        with self._lock:
+            judgment = self._judgments.get(key)
+
+            if judgment is not None:
+                self._judgments.move_to_end(key)
+                return judgment
+
+        if store is None:
+            return None
+
+        judgment = store.get(key)
+
+        if judgment is not None:
+            self._remember(key, judgment)
+
+        return judgment
+
+    def put(self, key, judgment, store=None):
+        """
+        Caches the (judgment, score) pair for the given key, writing it to the store (if given).
+        """
+        self._remember(key, judgment)
+
+        if store is not None:
+            store.put(key, judgment)
+
+    def _remember(self, key, judgment):
+        with self._lock:
+            self._judgments[key] = judgment
+            self._judgments.move_to_end(key)
+
+            if len(self._judgments) > self._size:
+                self._judgments.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._judgments.clear()
+
+
+_cache = JudgmentCache()
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_judgment_cache():
+    """
+    Returns the in-memory judgment cache shared by the whole process.
+    """
+    return _cache
+
+
+def open_judgment_store(filename):
+    """
+    Returns a JudgmentStore for the given file. Each file is only opened once per process (a forked process opens its own connection).
+    """
+    key = (os.path.realpath(filename), os.getpid())
+
+    with _stores_lock:
+        store = _stores.get(key)
+
+        if store is None:
+            store = JudgmentStore(filename)
+            _stores[key] = store
+            log.debug("Opened judgment store {0}".format(filename))
+
+        return store
+
+
+@atexit.register
+def _flush_stores():
+    """
+    Writes the new judgments of the stores opened by this process when it exits.
+    """
+    for (filename, pid), store in list(_stores.items()):
+        if pid == os.getpid():
+            store.flush()
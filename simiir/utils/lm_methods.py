@@ -3,6 +3,7 @@ __author__ = 'david'
 from ifind.common.query_generation import SingleQueryGeneration
 from ifind.common.language_model import LanguageModel
 from ifind.common.query_ranker import QueryRanker
+from ifind.common.background_model import load_background_language_model
 
 def extract_term_dict_from_text(text, stopword_file):
     """
@@ -21,23 +22,78 @@ def read_in_background(vocab_file):
     Helper method to read in a file containing terms and construct a background language model.
     Returns a LanguageModel instance trained on the vocabulary file passed.
     """
-    vocab = {}
-    f = open(vocab_file, 'r')
+    return load_background_language_model(vocab_file)
 
-    for line in f:
-        tc = line.split(',')
-        vocab[tc[0]] = int(tc[1])
-
-    f.close()
-    return LanguageModel(term_dict=vocab)
+_last_ranker = [None]  # The QueryRanker used for the most recent call to rank_terms().
 
 def rank_terms(terms, **kwargs):
     """
     Ranks a list of potential terms by their discriminatory power.
     The length of the list returned == list of initial terms supplied.
+    Query generators rank many lists against the same language model (e.g. once per title term); the ranker - and so
+    the score of each term - is reused for as long as the same language model is supplied.
     """
     topic_language_model = kwargs.get('topic_language_model', None)
 
-    ranker = QueryRanker(smoothed_language_model=topic_language_model)
+    ranker = _last_ranker[0]
+
+    if ranker is None or ranker.lm is not topic_language_model:
+        ranker = QueryRanker(smoothed_language_model=topic_language_model)
+        _last_ranker[0] = ranker
+
     ranker.calculate_query_list_probabilities(terms)
-    return ranker.get_top_queries(len(terms))
\ No newline at end of file
+    return ranker.get_top_queries(len(terms))
+
+
+class RelevantTermCounts(object):
+    """
+    Running term counts over the text (title and content) of the relevant snippets or documents in a list from the user's memory.
+    The list is assumed to grow by appending, with each item's judgment set before the counts are next updated -
+    so only the items appended since the last update need to be tokenised, keeping updates linear in the length of a session.
+    The counts are identical to those from extract_term_dict_from_text() over the text of all relevant items, joined in order.
+    """
+    def __init__(self, stopword_file):
+        self.__extractor = SingleQueryGeneration(minlen=3, stopwordfile=stopword_file)
+        self.__items = None
+        self.__position = 0
+        self.__counts = {}
+        self.__relevant_count = 0
+    
+    def update(self, items):
+        """
+        Adds the counts for the relevant items appended to items since the last update.
+        If a different list is supplied, the counts are recalculated from the start of that list.
+        Returns True iif the counts changed.
+        """
+        if items is not self.__items or len(items) < self.__position:
+            self.__items = items
+            self.__position = 0
+            self.__counts = {}
+            self.__relevant_count = 0
+        
+        changed = False
+        
+        for item in items[self.__position:]:
+            if item.judgment > 0:
+                self.__extractor.extract_queries_from_text('{0} {1}'.format(item.title, item.content))
+                
+                for term, count in self.__extractor.query_count.items():
+                    self.__counts[term] = self.__counts.get(term, 0) + count
+                
+                self.__relevant_count = self.__relevant_count + 1
+                changed = True
+        
+        self.__position = len(items)
+        return changed
+    
+    def get_counts(self):
+        """
+        Returns a copy of the term counts.
+        """
+        return dict(self.__counts)
+    
+    def get_relevant_count(self):
+        """
+        Returns the number of relevant items counted.
+        """
+        return self.__relevant_count
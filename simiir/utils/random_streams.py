@@ -0,0 +1,72 @@
+#
+# Counter-based random numbers for stochastic components.
+# Rather than each component drawing from its own seeded random.Random (so that every outcome depends upon how many
+# numbers were drawn before it), each draw is a pure function of:
+#   (seed, topic, user, component, event)
+# where the event identifies what the draw decides - e.g. the action and docid of a judgment, or the query number and
+# rank of a stopping decision. The same event always gets the same number, whatever order events happen in - so runs are
+# reproducible when users are run in parallel, in batches, from cached judgments or from a restored snapshot.
+#
+# Keys are hashed (with BLAKE2b, which, unlike hash(), is the same in every process) and mixed with the seed using the
+# SplitMix64 finaliser, giving a uniformly distributed 64-bit value; the top 53 bits make the float in [0, 1).
+#
+
+import hashlib
+
+MASK = 0xFFFFFFFFFFFFFFFF
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def splitmix64(value):
+    """
+    Returns the SplitMix64 output for the given 64-bit state.
+    """
+    value = (value + GOLDEN_GAMMA) & MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+    return value ^ (value >> 31)
+
+
+def hash_key(key):
+    """
+    Returns a 64-bit hash of the given key (a tuple of strings, numbers and None), identical in every process.
+    """
+    digest = hashlib.blake2b(repr(key).encode('utf-8', errors='surrogatepass'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def draw(seed, *key):
+    """
+    Returns a float in [0, 1), determined entirely by the seed and the key.
+    """
+    value = splitmix64(splitmix64(int(seed) & MASK) ^ hash_key(key))
+    return (value >> 11) * (1.0 / (1 << 53))
+
+
+class RandomStream(object):
+    """
+    The random numbers of a single component, for a given seed. Draws are keyed by the topic and user of the given
+    user context (see Memory.user_id), along with the event being decided. A stream holds no state, so it can be copied,
+    snapshotted and shared freely.
+    """
+    def __init__(self, seed, component):
+        self.seed = seed
+        self.component = component
+
+    def _get_key(self, user_context, event):
+        topic = getattr(user_context, 'topic', None)
+        topic_id = getattr(topic, 'id', None)
+        user_id = getattr(user_context, 'user_id', None)
+        return (topic_id, user_id, self.component) + tuple(event)
+
+    def random(self, user_context, *event):
+        """
+        Returns the float in [0, 1) for the given event of the user context's topic and user.
+        """
+        return draw(self.seed, *self._get_key(user_context, event))
+
+    def choice(self, sequence, user_context, *event):
+        """
+        Returns the item of the (non-empty) sequence chosen for the given event.
+        """
+        return sequence[int(self.random(user_context, *event) * len(sequence))]
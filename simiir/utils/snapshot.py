@@ -0,0 +1,42 @@
+import copy
+import random
+
+#
+# Support for snapshotting and forking simulated users.
+# A snapshot is a deep copy of a user's state. Components holding read-only (or external) resources - search interfaces,
+# qrels, LLM clients, progress bars and locks - share those resources between copies rather than copying them; see copy_sharing().
+#
+
+
+def copy_sharing(obj, memo, shared_attributes=()):
+    """
+    Returns a deep copy of obj (for use within a __deepcopy__ implementation), where the instance variables named in
+    shared_attributes are shared with the original instead of being copied. Names not present on obj are ignored.
+    """
+    cls = obj.__class__
+    result = cls.__new__(cls)
+    memo[id(obj)] = result
+
+    for name, value in obj.__dict__.items():
+        if name in shared_attributes:
+            result.__dict__[name] = value
+        else:
+            result.__dict__[name] = copy.deepcopy(value, memo)
+
+    return result
+
+
+class Snapshot(object):
+    """
+    The saved state of a simulated user - a deep copy of its instance variables (and therefore its components),
+    along with the state of the global random number generator.
+    """
+    def __init__(self, state):
+        self.state = copy.deepcopy(state)
+        self.random_state = random.getstate()
+
+    def get_state(self):
+        """
+        Returns a fresh copy of the saved state; the snapshot itself is never modified, so it can be restored many times.
+        """
+        return copy.deepcopy(self.state)
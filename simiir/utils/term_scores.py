@@ -0,0 +1,78 @@
+import numpy
+
+
+class TermScoreTable(object):
+    """
+    A lookup table of per-term scores, used to score a list of terms with a single NumPy gather-and-sum.
+
+    Each table gives the terms it scores its own IDs (0, 1, 2, ... in the order it first sees them); the score of each term
+    (from the score function supplied) is stored at that position in a NumPy array. A table is therefore only as large as
+    the number of distinct terms it has scored, however many terms the rest of the process has seen. The scores depend on the models used
+    to compute them - the caller supplies a key (e.g. a tuple of the language models and parameters in use). When the key changes, every stored score becomes stale,
+    and is recomputed the next time its term is scored.
+    """
+    def __init__(self):
+        self.__term_ids = {}
+        self.__scores = numpy.zeros(64)
+        self.__generations = numpy.zeros(64, dtype=numpy.int64)  # The generation each score was computed in.
+        self.__generation = 0
+        self.__key = None
+
+    def __refresh(self, key):
+        """
+        Starts a new generation (making all stored scores stale) if the key has changed.
+        """
+        if self.__key is None or self.__key != key:
+            self.__generation = self.__generation + 1
+            self.__key = key
+
+    def __grow(self):
+        self.__scores = numpy.concatenate((self.__scores, numpy.zeros(len(self.__scores))))
+        self.__generations = numpy.concatenate((self.__generations, numpy.zeros(len(self.__generations), dtype=numpy.int64)))
+
+    def get_term_ids(self, terms):
+        """
+        Returns a list of the IDs of the given terms, giving an ID to any term that the table has not seen before.
+        """
+        term_ids = self.__term_ids
+        ids = []
+
+        for term in terms:
+            term_id = term_ids.get(term)
+
+            if term_id is None:
+                term_id = len(term_ids)
+                term_ids[term] = term_id
+
+            ids.append(term_id)
+
+        while len(term_ids) > len(self.__scores):
+            self.__grow()
+
+        return ids
+
+    def get_total_score(self, terms, key, score_function):
+        """
+        Returns the sum of the scores of the given terms (a list, which may contain repeated terms).
+        The scores are summed in order, so the total is identical to adding the score of each term to 0.0 in turn.
+        """
+        self.__refresh(key)
+        ids = numpy.array(self.get_term_ids(terms), dtype=numpy.int64)
+
+        if not len(ids):
+            return 0.0
+
+        stale = ids[self.__generations[ids] != self.__generation]
+
+        if len(stale):
+            stale_ids = set(stale.tolist())
+            get_id = self.__term_ids.get
+
+            for term in set(terms):
+                term_id = get_id(term)
+
+                if term_id in stale_ids:
+                    self.__scores[term_id] = score_function(term)
+                    self.__generations[term_id] = self.__generation
+
+        return float(numpy.cumsum(self.__scores[ids])[-1])
@@ -1,25 +1,16 @@
 # A small module containing functions to help tidy things up.
 
-import re
-import html
-# from html.parser import HTMLParser
+from ifind.common.markup import strip_tags
 
-def clean_html(input_str):
+def clean_html(input_str, docid=None):
     """
     Given an HTML-formatted string, decodes HTML entitles and removes any HTML tags.
     A list of terms is returned, leaving text. Punctuation is not removed.
+    If the docid of the document (or snippet) is given, the stripped text is memoised (see ifind.common.markup).
     """
-    # parser = HTMLParser.HTMLParser()
-    
-    # stripped = parser.unescape(input_str)
-    # stripped = re.sub('<.*?>', '', stripped)
-    
-    if isinstance(input_str, str):
-        stripped = re.sub('<.*?>', '', input_str)
-    else:
-        stripped = re.sub('<.*?>', '', input_str.decode("utf-8"))
+    stripped = strip_tags(input_str, docid=docid)
     
     stripped = stripped.lower()
     stripped_list = stripped.split(' ')
     
-    return stripped_list
\ No newline at end of file
+    return stripped_list